@@ -0,0 +1,228 @@
+from asyncio import iscoroutinefunction
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, connections
+from django.http import Http404
+from drf_spectacular.utils import extend_schema_view
+from rest_framework import exceptions, status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .conditional import not_modified, set_validators
+from .schemas import (order_create_schema, order_detail_schema,
+                      order_list_schema, signup_schema, token_post_schema)
+from .serializers import CurrentUserSerializer, SignUpSerializer
+from .views import (LIST_STATE, AccessOnlyTokenView, OrderViewSet, UserViewSet,
+                    signup, signup_conflict)
+
+User = get_user_model()
+
+# Потоки для хеширования паролей: PBKDF2 в hashlib отпускает GIL,
+# поэтому хеши считаются параллельно и не блокируют цикл событий.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    thread_name_prefix='password-hashing',
+)
+
+
+def in_password_pool(func):
+    """
+    Асинхронная обёртка, выполняющая func в password_executor.
+    Соединения с базой, открытые в потоке пула, закрываются после вызова.
+    """
+    @wraps(func)
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+
+    return sync_to_async(
+        run, thread_sensitive=False, executor=password_executor)
+
+
+class AsyncAPIViewMixin:
+    """
+    Асинхронный dispatch для представлений DRF под ASGI.
+    Аутентификация использует aauthenticate, если аутентификатор его
+    поддерживает. Асинхронные обработчики выполняются в цикле событий,
+    синхронные — через sync_to_async, как синхронные представления Django.
+    """
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        markcoroutinefunction(view)
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            handler = (
+                getattr(self, request.method.lower(),
+                        self.http_method_not_allowed)
+                if request.method.lower() in self.http_method_names
+                else self.http_method_not_allowed
+            )
+            if not iscoroutinefunction(handler):
+                handler = sync_to_async(handler)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """APIView.initial с асинхронной аутентификацией."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = (
+            self.perform_content_negotiation(request)
+        )
+        request.version, request.versioning_scheme = (
+            self.determine_version(request, *args, **kwargs)
+        )
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, 'aauthenticate', None)
+            if authenticate is None:
+                authenticate = sync_to_async(authenticator.authenticate)
+            try:
+                user_auth_tuple = await authenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()
+
+
+@extend_schema_view(
+    list=order_list_schema,
+    create=order_create_schema,
+    retrieve=order_detail_schema,
+)
+class AsyncOrderViewSet(AsyncAPIViewMixin, OrderViewSet):
+    # list, retrieve и create асинхронные, остальные действия
+    # выполняются синхронно в потоке. Описание в схеме API — как у
+    # синхронного варианта.
+    __doc__ = OrderViewSet.__doc__
+
+    async def list(self, request, *args, **kwargs):
+        queryset = await sync_to_async(self.filter_queryset)(
+            self.get_queryset())
+        etag = (None if request.user.is_staff
+                else self.list_etag(
+                    request, await queryset.aaggregate(**LIST_STATE)))
+        response = not_modified(request, etag)
+        if response is None:
+            queryset = self.values_queryset(queryset)
+            page = (None if self.paginator is None
+                    else await self.paginator.apaginate_queryset(
+                        queryset, request, view=self))
+            if page is None:
+                rows = [row async for row in queryset]
+            else:
+                rows = page
+            response = self.list_response(rows, page)
+        return set_validators(response, etag)
+
+    async def retrieve(self, request, *args, **kwargs):
+        queryset = await sync_to_async(self.filter_queryset)(
+            self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            order = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError,
+                DjangoValidationError):
+            raise Http404
+        self.check_object_permissions(request, order)
+        return self.retrieve_response(request, order)
+
+    async def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(self.perform_create)(serializer)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED,
+            headers=self.get_success_headers(serializer.data),
+        )
+
+
+class AsyncUserViewSet(AsyncAPIViewMixin, UserViewSet):
+    # Асинхронный только профиль текущего пользователя.
+    __doc__ = UserViewSet.__doc__
+
+    @wraps(UserViewSet.current_user)
+    async def current_user(self, request):
+        user = request.user
+        if request.method == 'GET':
+            return self.profile_response(request, user)
+        if request.method == 'DELETE':
+            await user.adelete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        serializer = CurrentUserSerializer(
+            user, data=request.data, partial=True)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        await sync_to_async(serializer.save)()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AsyncSignUpView(AsyncAPIViewMixin, APIView):
+    # Пароль хешируется в password_executor, запись в базу идёт
+    # из цикла событий.
+    __doc__ = signup.__doc__
+    permission_classes = (AllowAny,)
+    query_budgets = signup.query_budgets
+
+    @signup_schema
+    async def post(self, request):
+        serializer = SignUpSerializer(data=request.data)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        data = dict(serializer.validated_data)
+        password = data.pop('password')
+        user = User(**data)
+        await in_password_pool(user.set_password)(password)
+        try:
+            await user.asave()
+        except IntegrityError:
+            raise await sync_to_async(signup_conflict)(
+                serializer.validated_data)
+        serializer.instance = user
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class AsyncAccessOnlyTokenView(AsyncAPIViewMixin, AccessOnlyTokenView):
+    # Поиск пользователя и проверка пароля (PBKDF2) выполняются
+    # в password_executor.
+    __doc__ = AccessOnlyTokenView.__doc__
+
+    @token_post_schema
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            await in_password_pool(serializer.is_valid)(
+                raise_exception=True)
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
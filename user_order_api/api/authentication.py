@@ -0,0 +1,94 @@
+from asgiref.sync import sync_to_async
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from orders.routers import set_request_user
+from orders.user_cache import aget_cached_user, get_cached_user
+from user_order_api.metrics import timed
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация, которая берёт пользователя из кеша
+    (orders.user_cache) вместо запроса к базе на каждый запрос.
+    Проверки активности и отзыва токена те же, что в JWTAuthentication.
+    В кеше нет хеша пароля, поэтому с CHECK_REVOKE_TOKEN пользователь
+    читается из базы, как в JWTAuthentication.
+    aauthenticate — вариант для асинхронных представлений.
+    Время аутентификации учитывается в фазе auth метрик запроса.
+    Пользователь передаётся роутеру реплик (orders.routers).
+    """
+    def uses_cache(self):
+        return (
+            api_settings.USER_ID_FIELD == self.user_model._meta.pk.name
+            and not api_settings.CHECK_REVOKE_TOKEN
+        )
+
+    def get_user(self, validated_token):
+        if not self.uses_cache():
+            return super().get_user(validated_token)
+        try:
+            user = get_cached_user(
+                self.user_model, self.get_user_id(validated_token))
+        except (self.user_model.DoesNotExist, ValueError, TypeError):
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found')
+        return self.check_user(user, validated_token)
+
+    def authenticate(self, request):
+        with timed('auth'):
+            return self.report(super().authenticate(request))
+
+    async def aauthenticate(self, request):
+        with timed('auth'):
+            header = self.get_header(request)
+            if header is None:
+                return None
+            raw_token = self.get_raw_token(header)
+            if raw_token is None:
+                return None
+            validated_token = self.get_validated_token(raw_token)
+            return self.report(
+                (await self.aget_user(validated_token), validated_token))
+
+    @staticmethod
+    def report(result):
+        if result is not None:
+            set_request_user(result[0])
+        return result
+
+    async def aget_user(self, validated_token):
+        if not self.uses_cache():
+            return await sync_to_async(super().get_user)(validated_token)
+        try:
+            user = await aget_cached_user(
+                self.user_model, self.get_user_id(validated_token))
+        except (self.user_model.DoesNotExist, ValueError, TypeError):
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found')
+        return self.check_user(user, validated_token)
+
+    @staticmethod
+    def get_user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification'))
+
+    @staticmethod
+    def check_user(user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code='password_changed')
+        return user
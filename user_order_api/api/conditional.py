@@ -0,0 +1,49 @@
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """ETag из значений, однозначно определяющих содержимое ответа."""
+    return quote_etag(md5(repr(parts).encode()).hexdigest())
+
+
+def get_timestamp(last_modified):
+    return None if last_modified is None else int(last_modified.timestamp())
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Ответ 304 Not Modified (или 412), если If-None-Match /
+    If-Modified-Since клиента соответствуют текущим валидаторам;
+    иначе None. Без валидаторов всегда None.
+    """
+    if etag is None and last_modified is None:
+        return None
+    return get_conditional_response(
+        request, etag=etag, last_modified=get_timestamp(last_modified))
+
+
+def set_validators(response, etag, last_modified=None):
+    """Заголовки ETag и Last-Modified для ответов 2xx и 304."""
+    if 200 <= response.status_code < 300 or response.status_code == 304:
+        if etag is not None:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(
+                get_timestamp(last_modified))
+    return response
+
+
+def conditional(request, get_response, etag, last_modified=None):
+    """
+    Отвечает 304 Not Modified, если If-None-Match / If-Modified-Since
+    клиента соответствуют текущим валидаторам, не вызывая get_response
+    (и, значит, не выполняя сериализацию). Иначе возвращает ответ
+    get_response с заголовками ETag и Last-Modified.
+    """
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = get_response()
+    return set_validators(response, etag, last_modified)
@@ -1,11 +1,32 @@
+from functools import reduce
+from operator import or_
+
 import django_filters
 from django.contrib.auth import get_user_model
+from django.db import connections
+from django_filters.constants import EMPTY_VALUES
+from rest_framework.filters import SearchFilter
 
-from orders.models import Order
+from orders.models import Order, OrderWithArchived
+from orders.search import contains, get_search_backend
 
 User = get_user_model()
 
 
+class ContainsFilter(django_filters.CharFilter):
+    """Поиск подстроки без учёта регистра по триграммному индексу."""
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('lookup_expr', 'icontains')
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        if self.distinct:
+            qs = qs.distinct()
+        return self.get_method(qs)(contains(qs, self.field_name, value))
+
+
 class UserFilter(django_filters.FilterSet):
     age = django_filters.NumberFilter(method='filter_by_age')
     age_range = django_filters.NumericRangeFilter(method='filter_by_age_range')
@@ -16,26 +37,72 @@ class UserFilter(django_filters.FilterSet):
         fields = ('age', 'age_range', 'birth_date')
 
     def filter_by_age(self, users, name, value):
-        return users.filter(age=value)
+        return users.filter(User.age_condition(value, value))
 
     def filter_by_age_range(self, users, name, value):
-        if value.start is not None:
-            users = users.filter(age__gte=value.start)
-        if value.stop is not None:
-            users = users.filter(age__lte=value.stop)
-        return users
+        return users.filter(User.age_condition(value.start, value.stop))
 
 
 class OrderFilter(django_filters.FilterSet):
     username = django_filters.CharFilter(
         field_name='user__username', lookup_expr='exact'
     )
-    email = django_filters.CharFilter(
-        field_name='user__email', lookup_expr='icontains'
-    )
+    email = ContainsFilter(field_name='user__email')
     created_at = django_filters.DateFromToRangeFilter()
-    updated_at = django_filters.DateFromToRangeFilter()
+    updated_at = django_filters.DateFromToRangeFilter(
+        method='filter_by_updated_at')
 
     class Meta:
         model = Order
         fields = ('username', 'email', 'created_at', 'updated_at')
+
+    def filter_by_updated_at(self, orders, name, value):
+        if value.start is not None:
+            orders = orders.filter(updated_at__gte=value.start)
+        if value.stop is not None:
+            # created_at <= updated_at: по верхней границе created_at
+            # отбрасываются секции более новых заказов (orders.partitions).
+            orders = orders.filter(
+                updated_at__lte=value.stop, created_at__lte=value.stop)
+        return orders
+
+
+class OrderWithArchivedFilter(OrderFilter):
+    """Фильтры списка заказов вместе с архивными (?include_archived=1)."""
+
+    class Meta(OrderFilter.Meta):
+        model = OrderWithArchived
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    Поиск по search_fields в индексируемой форме (см. orders.search.contains).
+    Каждый терм должен встретиться хотя бы в одном из полей.
+    Префиксы полей (^, =, @, $) не поддерживаются.
+    """
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        terms = self.get_search_terms(request)
+        if not search_fields or not terms:
+            return queryset
+        for term in terms:
+            queryset = queryset.filter(reduce(or_, (
+                contains(queryset, field, term) for field in search_fields
+            )))
+        return queryset
+
+
+class FullTextSearchFilter(IndexedSearchFilter):
+    """
+    Поиск через полнотекстовый движок СУБД (см. orders.search).
+    Если движок недоступен, используется индексируемый поиск по search_fields.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        backend = get_search_backend(
+            connections[queryset.db], queryset.model)
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(queryset, terms)
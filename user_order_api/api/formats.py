@@ -0,0 +1,36 @@
+"""
+Кодирование JSON (orjson) и MessagePack (msgpack) для рендереров
+и парсеров API. JSON совпадает с выводом JSONRenderer DRF с одним
+отличием: float NaN и ±Infinity orjson кодирует как null, а JSONRenderer
+со STRICT_JSON выдаёт ошибку. Полей float в ответах API нет.
+"""
+import msgpack
+import orjson
+from rest_framework.utils.encoders import JSONEncoder
+
+# Типы, которые не кодируются напрямую (даты, Decimal, ленивые строки),
+# преобразуются так же, как в JSONRenderer DRF.
+encode_default = JSONEncoder().default
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps_json(data):
+    """Компактный JSON в UTF-8 без экранирования не-ASCII символов."""
+    content = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+    # Как в JSONRenderer: U+2028 и U+2029 недопустимы в JavaScript-строках.
+    return content.replace(
+        b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def loads_json(content):
+    """Разбирает JSON из bytes или str; ошибки — ValueError."""
+    return orjson.loads(content)
+
+
+def dumps_msgpack(data):
+    return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+def loads_msgpack(content):
+    return msgpack.unpackb(content, raw=False)
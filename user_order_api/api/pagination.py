@@ -0,0 +1,379 @@
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, Cursor,
+                                       CursorPagination, PageNumberPagination,
+                                       _reverse_ordering)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from orders.estimates import estimate_count
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная пагинация по составному ключу сортировки.
+    Позиция курсора хранит значения всех полей ordering, поэтому страница
+    выбирается диапазоном по индексу без OFFSET и без COUNT.
+    Последнее поле ordering должно быть уникальным (обычно id).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    position_separator = '|'
+    # {поле: поле, которое никогда не больше него}. Верхняя граница по
+    # первому полю ordering переносится и на второе поле: на таблице,
+    # секционированной по нему, СУБД отбрасывает более новые секции.
+    upper_bounds = {}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([instance async for instance in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """Queryset страницы с одной лишней записью для has_next."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor.reverse
+        self.position = None if self.cursor is None else self.cursor.position
+
+        queryset = queryset.order_by(
+            *(_reverse_ordering(self.ordering) if self.reverse
+              else self.ordering)
+        )
+        if self.position is not None:
+            queryset = queryset.filter(self.get_keyset_condition(
+                queryset.model, self.position, self.reverse))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        reverse, position = self.reverse, self.position
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = (
+                position is not None, has_following
+            )
+        else:
+            self.has_next, self.has_previous = (
+                has_following, position is not None
+            )
+        if self.page:
+            self.previous_position = self._get_position_from_instance(
+                self.page[0], self.ordering)
+            self.next_position = self._get_position_from_instance(
+                self.page[-1], self.ordering)
+        else:
+            self.previous_position = self.next_position = position
+        self.display_page_controls = (
+            self.has_next or self.has_previous
+        ) and self.template is not None
+        return self.page
+
+    def get_keyset_condition(self, model, position, reverse):
+        """
+        Строит условие «строго после позиции» для составного ключа:
+        (a < x) OR (a = x AND b < y) ... Дополнительная нестрогая граница
+        по первому полю позволяет СУБД начать сканирование индекса
+        сразу с нужного места.
+        """
+        raw_values = position.split(self.position_separator)
+        if len(raw_values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        names = [order.lstrip('-') for order in self.ordering]
+        try:
+            values = [
+                model._meta.get_field(name).to_python(raw_value)
+                for name, raw_value in zip(names, raw_values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        lookups = [
+            'lt' if order.startswith('-') != reverse else 'gt'
+            for order in self.ordering
+        ]
+        condition, equal = Q(), Q()
+        for name, value, lookup in zip(names, values, lookups):
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        bound = 'lte' if lookups[0] == 'lt' else 'gte'
+        condition &= Q(**{f'{names[0]}__{bound}': values[0]})
+        if bound == 'lte' and names[0] in self.upper_bounds:
+            condition &= Q(**{
+                f'{self.upper_bounds[names[0]]}__lte': values[0]})
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            name = order.lstrip('-')
+            value = (instance[name] if isinstance(instance, dict)
+                     else getattr(instance, name))
+            values.append(
+                value.isoformat() if hasattr(value, 'isoformat')
+                else str(value)
+            )
+        return self.position_separator.join(values)
+
+
+class PagePagination(PageNumberPagination):
+    """
+    Постраничная пагинация с асинхронным вариантом apaginate_queryset.
+    Параметр `count` выбирает подсчёт общего числа записей: exact
+    (по умолчанию) — точный COUNT(*), estimate — оценка
+    orders.estimates.estimate_count, none — без подсчёта, в ответе только
+    has_next. В режимах estimate и none страница выбирается с одной
+    лишней записью, по которой определяется наличие следующей.
+    """
+    count_query_param = 'count'
+    count_exact = 'exact'
+    count_estimate = 'estimate'
+    count_none = 'none'
+    count_modes = (count_exact, count_estimate, count_none)
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param)
+        return mode if mode in self.count_modes else self.count_exact
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = self.get_count_mode(request)
+        if self.count_mode == self.count_exact:
+            return super().paginate_queryset(queryset, request, view)
+        window = self.get_window_queryset(queryset, request)
+        if window is None:
+            return None
+        count = (estimate_count(queryset)
+                 if self.count_mode == self.count_estimate else None)
+        return self.set_window(list(window), count)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.count_mode = self.get_count_mode(request)
+        if self.count_mode != self.count_exact:
+            window = self.get_window_queryset(queryset, request)
+            if window is None:
+                return None
+            count = (await sync_to_async(estimate_count)(queryset)
+                     if self.count_mode == self.count_estimate else None)
+            return self.set_window(
+                [instance async for instance in window], count)
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)))
+        self.page.object_list = [
+            instance async for instance in self.page.object_list
+        ]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+    def get_window_queryset(self, queryset, request):
+        """Срез страницы с одной лишней записью для has_next."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        page_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            self.page_number = int(page_number)
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number,
+                message='Номер страницы должен быть целым числом.'))
+        offset = (self.page_number - 1) * self.page_size
+        return queryset[offset:offset + self.page_size + 1]
+
+    def set_window(self, results, count):
+        self.page = results[:self.page_size]
+        if not self.page and self.page_number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.page_number,
+                message='Страница не содержит результатов.'))
+        self.has_next = len(results) > len(self.page)
+        self.count = count
+        return self.page
+
+    def get_next_link(self):
+        if getattr(self, 'count_mode', self.count_exact) == self.count_exact:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if getattr(self, 'count_mode', self.count_exact) == self.count_exact:
+            return super().get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        if self.count_mode == self.count_exact:
+            return super().get_paginated_response(data)
+        if self.count_mode == self.count_estimate:
+            return Response({
+                'count': self.count,
+                'count_estimated': True,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'results': data,
+            })
+        return Response({
+            'has_next': self.has_next,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['required'] = ['results']
+        response_schema['properties'].update({
+            'count_estimated': {
+                'type': 'boolean',
+                'description': 'count — оценка (при count=estimate).',
+            },
+            'has_next': {
+                'type': 'boolean',
+                'description': 'Есть ли следующая страница (при count=none).',
+            },
+        })
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': self.count_query_param,
+            'required': False,
+            'in': 'query',
+            'description': (
+                'Подсчёт общего числа записей: exact (по умолчанию), '
+                'estimate (оценка) или none (без count, только has_next).'
+            ),
+            'schema': {'type': 'string', 'enum': list(self.count_modes)},
+        }]
+
+
+class OrderKeysetPagination(KeysetPagination):
+    ordering = ('-updated_at', '-id')
+    # created_at <= updated_at (ограничение модели Order).
+    upper_bounds = {'updated_at': 'created_at'}
+
+
+class UserKeysetPagination(KeysetPagination):
+    ordering = ('-date_joined', '-id')
+
+
+class SwitchablePagination(BasePagination):
+    """
+    Пагинация с выбором режима через параметры запроса.
+    По умолчанию постраничная; `?pagination=cursor` или наличие параметра
+    `cursor` включает курсорную пагинацию без подсчёта общего числа записей.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    page_class = PagePagination
+    cursor_class = KeysetPagination
+
+    def get_paginator(self, request):
+        if (request.query_params.get(self.mode_query_param)
+                == self.cursor_mode
+                or self.cursor_class.cursor_query_param
+                in request.query_params):
+            return self.cursor_class()
+        return self.page_class()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return await self.paginator.apaginate_queryset(
+            queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_class().get_paginated_response_schema(schema)
+
+    def get_page_metadata(self):
+        """Поля ответа текущей страницы, кроме results."""
+        data = self.get_paginated_response([]).data
+        data.pop('results')
+        return data
+
+    @property
+    def display_page_controls(self):
+        return getattr(self, 'paginator', None) is not None and (
+            self.paginator.display_page_controls
+        )
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [{
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Режим пагинации: page (по умолчанию) или cursor.',
+            'schema': {'type': 'string', 'enum': ['page', self.cursor_mode]},
+        }]
+        names = set()
+        for paginator in (self.page_class(), self.cursor_class()):
+            for parameter in paginator.get_schema_operation_parameters(view):
+                if parameter['name'] not in names:
+                    names.add(parameter['name'])
+                    parameters.append(parameter)
+        return parameters
+
+
+class OrderPagination(SwitchablePagination):
+    cursor_class = OrderKeysetPagination
+
+
+class UserPagination(SwitchablePagination):
+    cursor_class = UserKeysetPagination
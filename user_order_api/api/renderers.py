@@ -0,0 +1,103 @@
+import csv
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from user_order_api.metrics import timed
+
+from .formats import dumps_json, dumps_msgpack
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer с кодированием через api.formats.dumps_json (orjson).
+    Вывод совпадает с JSONRenderer, кроме NaN и ±Infinity (см. api.formats).
+    Ответы с отступом (например, для Browsable API) и настройки
+    UNICODE_JSON, COMPACT_JSON и STRICT_JSON, отличные от значений
+    по умолчанию, обрабатывает JSONRenderer.
+    """
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.ensure_ascii or not self.compact or not self.strict
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps_json(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Ответ в MessagePack (Accept: application/msgpack)."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps_msgpack(data)
+
+
+class EchoBuffer:
+    """Псевдобуфер для csv.writer: write возвращает строку вместо записи."""
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Рендерер потоковой выгрузки. render обрабатывает обычные ответы
+    (например, ошибки), stream — построчно формирует выгрузку
+    из кортежей значений, объединяя строки в куски по chunk_size.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = [
+            row if isinstance(row, dict) else {'detail': row}
+            for row in (data if isinstance(data, list) else [data])
+        ]
+        fields = list(rows[0]) if rows else []
+        return ''.join(self.stream(
+            fields, ([row.get(field) for field in fields] for row in rows)
+        )).encode(self.charset)
+
+    def stream(self, fields, rows, chunk_size=1000):
+        lines = list(self.header(fields))
+        for row in rows:
+            lines.append(self.line(fields, row))
+            if len(lines) >= chunk_size:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+    def header(self, fields):
+        return ()
+
+    def line(self, fields, row):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def line(self, fields, row):
+        return dumps_json(dict(zip(fields, row))).decode() + '\n'
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    writer = csv.writer(EchoBuffer())
+
+    def header(self, fields):
+        return (self.writer.writerow(fields),)
+
+    def line(self, fields, row):
+        return self.writer.writerow(row)
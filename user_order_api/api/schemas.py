@@ -1,10 +1,19 @@
-from drf_spectacular.utils import OpenApiResponse, extend_schema
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (OpenApiParameter, OpenApiResponse,
+                                   extend_schema)
 from rest_framework import status
 
 from .serializers import (AccessOnlyTokenSerializer, CurrentUserSerializer,
                           OrderShortSerializer, SignUpSerializer,
                           UserSerializer)
 
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Схема Bearer JWT для кеширующей аутентификации."""
+    target_class = 'api.authentication.CachedJWTAuthentication'
+
+
 TAG_AUTH = 'Аутентификация'
 TAG_USERS = 'Управление пользователями'
 TAG_PROFILE = 'Пользователь'
@@ -123,9 +132,14 @@ user_delete_schema = extend_schema(
 )
 
 # Заказы
+include_archived = OpenApiParameter(
+    'include_archived', OpenApiTypes.BOOL,
+    description='Включая архивные заказы (1 или true)',
+)
 order_list_schema = extend_schema(
     tags=[TAG_ORDERS],
     summary='Список заказов',
+    parameters=[include_archived],
     responses={
         status.HTTP_200_OK: OrderShortSerializer(many=True),
         **AUTH_ERRORS,
@@ -140,9 +154,43 @@ order_create_schema = extend_schema(
         **VALIDATION_ERRORS,
     },
 )
+order_bulk_create_schema = extend_schema(
+    tags=[TAG_ORDERS],
+    summary='Массовое создание заказов',
+    description=(
+        'Принимает JSON-массив или NDJSON (application/x-ndjson). '
+        'Ошибки валидации возвращаются по номерам элементов, '
+        'заказы создаются одной транзакцией только при отсутствии ошибок.'
+    ),
+    request=OrderShortSerializer(many=True),
+    responses={
+        status.HTTP_201_CREATED: OrderShortSerializer(many=True),
+        **VALIDATION_ERRORS,
+    },
+)
+order_export_schema = extend_schema(
+    tags=[TAG_ORDERS],
+    summary='Выгрузка заказов',
+    description=(
+        'Потоковая выгрузка всех заказов с учётом фильтров и поиска '
+        'списка заказов, без пагинации.'
+    ),
+    parameters=[
+        OpenApiParameter(
+            'format', OpenApiTypes.STR, enum=['ndjson', 'csv'],
+            description='Формат выгрузки (по умолчанию ndjson)',
+        ),
+    ],
+    responses={
+        (status.HTTP_200_OK, 'application/x-ndjson'): OpenApiTypes.STR,
+        (status.HTTP_200_OK, 'text/csv'): OpenApiTypes.STR,
+        **AUTH_ERRORS,
+    },
+)
 order_detail_schema = extend_schema(
     tags=[TAG_ORDERS],
     summary='Детали заказа',
+    parameters=[include_archived],
     responses={
         status.HTTP_200_OK: OrderShortSerializer,
         **CRUD_ERRORS,
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
@@ -8,11 +10,66 @@ from orders.models import Order
 User = get_user_model()
 
 
+def values_fields(serializer_class):
+    """
+    Поля сериализатора для выборки через values_list(): кортежи
+    (имя поля, путь в ORM, преобразование значения как в to_representation).
+    """
+    fields = []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SlugRelatedField):
+            fields.append(
+                (name, f'{field.source}__{field.slug_field}', None))
+        else:
+            fields.append((name, field.source, field.to_representation))
+    return fields
+
+
+@lru_cache(maxsize=None)
+def compile_values_serializer(serializer_class):
+    """
+    Быстрый путь чтения списков: возвращает поля для values() и функцию,
+    строящую из строки values() тот же словарь, что и
+    serializer_class(instance).data. Поля и их преобразования
+    вычисляются один раз на класс сериализатора: значения берутся
+    из строки по ключу, None передаётся как есть, остальные значения
+    проходят to_representation поля (кроме CharField, где это str()).
+    Сериализаторы с omit_none = True не выводят поля со значением None.
+    """
+    fields = tuple(
+        (name, source,
+         None if convert is None or getattr(convert, '__func__', None)
+         is serializers.CharField.to_representation else convert)
+        for name, source, convert in values_fields(serializer_class)
+    )
+    omit_none = getattr(serializer_class, 'omit_none', False)
+
+    def to_representation(row):
+        data = {}
+        for name, source, convert in fields:
+            value = row[source]
+            if convert is not None and value is not None:
+                value = convert(value)
+            if omit_none and value is None:
+                continue
+            data[name] = value
+        return data
+
+    return (
+        tuple(dict.fromkeys(source for _, source, _ in fields)),
+        to_representation,
+    )
+
+
 class BaseUserSerializer(serializers.ModelSerializer):
     """
     Базовый сериализатор для пользователя.
     Автоматически исключает поля со значением None из ответа.
     """
+    omit_none = True
+
     class Meta:
         model = User
         fields = ('username', 'email', 'birth_date')
@@ -33,7 +90,9 @@ class UserSerializer(BaseUserSerializer):
     )
 
     class Meta(BaseUserSerializer.Meta):
-        fields = ('id', *BaseUserSerializer.Meta.fields, 'age')
+        fields = ('id', *BaseUserSerializer.Meta.fields, 'age',
+                  'orders_count')
+        read_only_fields = ('orders_count',)
 
 
 class CurrentUserSerializer(BaseUserSerializer):
@@ -44,6 +103,16 @@ class CurrentUserSerializer(BaseUserSerializer):
     class Meta(BaseUserSerializer.Meta):
         fields = BaseUserSerializer.Meta.fields
 
+    def update(self, instance, validated_data):
+        """
+        Сохраняет только переданные поля: request.user приходит из кеша
+        аутентификации, и остальные его поля могут быть устаревшими.
+        """
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
 
 class SignUpSerializer(BaseUserSerializer):
     """
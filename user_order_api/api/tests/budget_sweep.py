@@ -0,0 +1,211 @@
+"""
+Проверка бюджетов SQL-запросов (user_order_api.query_budgets) на данных
+растущего объёма. Каждый запрос к API и админке выполняется на каждом
+шаге размеров, и его число SQL-запросов сверяется с бюджетом. Используется
+тестом api.tests.test_query_budgets и командой check_query_budgets.
+"""
+from contextlib import ExitStack
+from io import StringIO
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from orders.archive import archive
+from orders.models import Order
+from orders.search import existing_tables
+from orders.user_cache import local_users
+from user_order_api.query_budgets import get_query_budget
+
+User = get_user_model()
+
+PASSWORD = 'Budget-password-1'
+
+
+def get_cases(context, step):
+    """
+    Проверяемые запросы: (название, клиент, метод, путь, данные,
+    заголовки). Клиенты: user — обычный пользователь с токеном, staff —
+    администратор с токеном, admin — администратор с сессией,
+    removed — пользователь, который удаляет свой профиль, anonymous.
+    """
+    order = context.order
+    fresh = context.fresh_order
+    return (
+        ('заказы', 'user', 'get', reverse('orders-list'), None, {}),
+        ('заказы, страница 2', 'user', 'get', reverse('orders-list'),
+         {'page': 2}, {}),
+        ('заказы, курсор', 'user', 'get', reverse('orders-list'),
+         {'pagination': 'cursor'}, {}),
+        ('заказы, поиск', 'user', 'get', reverse('orders-list'),
+         {'search': 'ремонт'}, {}),
+        ('заказы администратора', 'staff', 'get', reverse('orders-list'),
+         {'count': 'estimate'}, {}),
+        ('поиск администратора', 'staff', 'get', reverse('orders-list'),
+         {'search': 'ремонт ноутбука'}, {}),
+        ('заказы с архивом', 'user', 'get', reverse('orders-list'),
+         {'include_archived': 1}, {}),
+        ('заказ', 'user', 'get',
+         reverse('orders-detail', args=(order.pk,)), None, {}),
+        ('архивный заказ', 'user', 'get',
+         reverse('orders-detail', args=(context.archived_order.pk,)),
+         {'include_archived': 1}, {}),
+        ('создание заказа', 'user', 'post', reverse('orders-list'),
+         {'title': 'Ремонт', 'description': 'Замена экрана'}, {}),
+        ('массовое создание', 'user', 'post', reverse('orders-bulk-create'),
+         [{'title': f'Заказ {index}', 'description': 'Доставка'}
+          for index in range(5)], {}),
+        ('изменение заказа', 'user', 'patch',
+         reverse('orders-detail', args=(order.pk,)),
+         {'title': f'Ремонт {step}'}, {}),
+        ('удаление заказа', 'user', 'delete',
+         reverse('orders-detail', args=(fresh.pk,)), None, {}),
+        ('выгрузка', 'user', 'get', reverse('orders-export'), None,
+         {'HTTP_ACCEPT': 'application/x-ndjson'}),
+        ('пользователи', 'staff', 'get', reverse('users-list'), None, {}),
+        ('пользователь', 'staff', 'get',
+         reverse('users-detail', args=(context.user.username,)), None, {}),
+        ('изменение пользователя', 'staff', 'patch',
+         reverse('users-detail', args=(context.user.username,)),
+         {'birth_date': f'19{70 + step}-01-01'}, {}),
+        ('удаление пользователя', 'staff', 'delete',
+         reverse('users-detail', args=(context.fresh_user.username,)),
+         None, {}),
+        ('профиль', 'user', 'get', reverse('users-current-user'), None, {}),
+        ('изменение профиля', 'user', 'patch', reverse('users-current-user'),
+         {'birth_date': f'19{80 + step}-01-01'}, {}),
+        ('удаление профиля', 'removed', 'delete',
+         reverse('users-current-user'), None, {}),
+        ('токен', 'anonymous', 'post', reverse('token'),
+         {'username': context.user.username, 'password': PASSWORD}, {}),
+        ('регистрация', 'anonymous', 'post', reverse('signup'),
+         {'username': f'budget_signup_{step}',
+          'email': f'budget_signup_{step}@example.com',
+          'password': PASSWORD}, {}),
+        ('админка: заказы', 'admin', 'get',
+         reverse('admin:orders_order_changelist'), None, {}),
+        ('админка: поиск заказов', 'admin', 'get',
+         reverse('admin:orders_order_changelist'), {'q': 'ремонт'}, {}),
+        ('админка: заказы за год', 'admin', 'get',
+         reverse('admin:orders_order_changelist'),
+         {'created_at__year': order.created_at.year}, {}),
+        ('админка: новый заказ', 'admin', 'get',
+         reverse('admin:orders_order_add'), None, {}),
+        ('админка: заказ', 'admin', 'get',
+         reverse('admin:orders_order_change', args=(order.pk,)), None, {}),
+        ('админка: пользователи', 'admin', 'get',
+         reverse('admin:orders_user_changelist'), None, {}),
+        ('админка: пользователь', 'admin', 'get',
+         reverse('admin:orders_user_change', args=(context.user.pk,)),
+         None, {}),
+    )
+
+
+def token_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+def measure_request(client, method, path, data, headers):
+    """(число SQL-запросов, статус ответа, бюджет) одного запроса."""
+    # Кеши, в том числе кеши процесса (ContentType, существование
+    # таблиц поиска), сбрасываются: бюджет рассчитан на худший случай —
+    # первый запрос воркера.
+    cache.clear()
+    local_users.clear()
+    ContentType.objects.clear_cache()
+    existing_tables.clear()
+    with ExitStack() as stack:
+        contexts = [stack.enter_context(CaptureQueriesContext(connection))
+                    for connection in connections.all()]
+        response = getattr(client, method)(
+            path, data, **({} if method == 'get' else {'format': 'json'})
+            if isinstance(client, APIClient) else {}, **headers)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return (
+        sum(len(context) for context in contexts),
+        response.status_code,
+        get_query_budget(response.resolver_match, method),
+    )
+
+
+def measure(sizes):
+    """
+    Выполняет запросы get_cases на базе, которая растёт по шагам sizes
+    (заказов у проверяемого пользователя; всего создаётся в десять раз
+    больше пользователей и в сто раз больше заказов). Возвращает
+    {название: {'counts': [по шагам], 'statuses': set, 'budget': ...}}.
+    """
+    context = SimpleNamespace(
+        user=User.objects.create_user(
+            'budget_user', 'budget_user@example.com', PASSWORD),
+        staff=User.objects.create_superuser(
+            'budget_staff', 'budget_staff@example.com', PASSWORD),
+    )
+    clients = {
+        'anonymous': APIClient(),
+        'user': token_client(context.user),
+        'staff': token_client(context.staff),
+        'admin': Client(),
+    }
+    clients['admin'].force_login(context.staff)
+    results = {}
+    total = 0
+    for step, size in enumerate(sizes):
+        call_command('seed', users=size * 10 - total // 10,
+                     orders=size * 100 - total, prefix='budget_',
+                     random_seed=step, workers=1, stdout=StringIO())
+        Order.objects.bulk_create(
+            Order(user=context.user, title=f'Ремонт №{index}',
+                  description='Ремонт ноутбука, замена экрана')
+            for index in range(size - (sizes[step - 1] if step else 0))
+        )
+        total = size * 100
+        context.order = Order.objects.filter(user=context.user).first()
+        context.fresh_order = Order.objects.create(
+            user=context.user, title='Удалить', description='')
+        context.archived_order = Order.objects.create(
+            user=context.user, title='В архив', description='')
+        archive(Order.objects.filter(pk=context.archived_order.pk))
+        context.fresh_user, context.removed_user = (
+            User.objects.create_user(
+                f'budget_{name}_{step}',
+                f'budget_{name}_{step}@example.com', PASSWORD)
+            for name in ('fresh', 'removed')
+        )
+        clients['removed'] = token_client(context.removed_user)
+        for name, client, method, path, data, headers in get_cases(
+                context, step):
+            queries, status, budget = measure_request(
+                clients[client], method, path, data, headers)
+            result = results.setdefault(
+                name, {'counts': [], 'statuses': set(), 'budget': None})
+            result['counts'].append(queries)
+            result['statuses'].add(status)
+            result['budget'] = budget
+    return results
+
+
+def get_problems(result):
+    """Нарушения бюджета по результату measure для одного запроса."""
+    counts, budget = result['counts'], result['budget']
+    return [
+        message for failed, message in (
+            (budget is None, 'нет бюджета'),
+            (budget is not None and max(counts) > budget, 'сверх бюджета'),
+            (counts[-1] > counts[0], 'растёт с данными'),
+            (any(status >= 400 for status in result['statuses']),
+             f'ответ {sorted(result["statuses"])}'),
+        ) if failed
+    ]
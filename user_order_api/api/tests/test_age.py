@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orders.models import years_before
+
+User = get_user_model()
+
+
+class AgeConditionTests(TestCase):
+    """
+    Фильтр по диапазону birth_date (User.age_condition) отбирает тех же
+    пользователей, что и прежний фильтр по вычисленному возрасту
+    (User.calculate_age_expression).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        birth_dates = {date(2000, 2, 29), date(2004, 2, 29), None}
+        for years in (0, 1, 17, 18, 30, 64, 65):
+            birthday = years_before(today, years)
+            for days in (-1, 0, 1):
+                birth_dates.add(birthday + timedelta(days=days))
+        cls.users = User.objects.bulk_create(
+            User(username=f'user{index}', email=f'user{index}@example.com',
+                 birth_date=birth_date)
+            for index, birth_date in enumerate(
+                sorted(birth_dates, key=lambda value: value or date.min))
+        )
+
+    def by_condition(self, min_age, max_age):
+        return set(User.objects.filter(
+            User.age_condition(min_age, max_age)).values_list('pk', flat=True))
+
+    def by_annotation(self, min_age, max_age):
+        users = User.objects.annotate(age=User.calculate_age_expression())
+        if min_age is not None:
+            users = users.filter(age__gte=min_age)
+        if max_age is not None:
+            users = users.filter(age__lte=max_age)
+        return set(users.values_list('pk', flat=True))
+
+    def test_same_users(self):
+        for min_age, max_age in (
+            (0, 0), (1, 1), (17, 17), (18, 18), (18, None), (None, 17),
+            (18, 64), (26, 26), (65, 65), (30, 30), (17.5, 18.5),
+        ):
+            with self.subTest(min_age=min_age, max_age=max_age):
+                self.assertEqual(self.by_condition(min_age, max_age),
+                                 self.by_annotation(min_age, max_age))
+
+    def test_api_filters(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'))
+        for params, min_age, max_age in (
+            ({'age': 18}, 18, 18),
+            ({'age_range_min': 18, 'age_range_max': 30}, 18, 30),
+        ):
+            with self.subTest(params):
+                response = client.get(
+                    reverse('users-list'), {**params, 'page_size': 100})
+                self.assertEqual(
+                    {user['id'] for user in response.data['results']},
+                    self.by_annotation(min_age, max_age))
+                for user in response.data['results']:
+                    self.assertTrue(min_age <= user['age'] <= max_age)
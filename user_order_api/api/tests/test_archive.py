@@ -0,0 +1,86 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orders.models import ArchivedOrder, Order
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass')
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass')
+        self.old, self.recent, self.foreign = (
+            Order.objects.create(user=user, title=title, description='')
+            for user, title in ((self.user, 'Старый ремонт'),
+                                (self.user, 'Новый ремонт'),
+                                (self.other, 'Чужой ремонт'))
+        )
+        long_ago = timezone.now() - timedelta(days=400)
+        Order.objects.filter(pk__in=(self.old.pk, self.foreign.pk)).update(
+            created_at=long_ago, updated_at=long_ago)
+        call_command('archive_orders', days=365, stdout=StringIO())
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_ids(self, **params):
+        response = self.client.get(reverse('orders-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [order['id'] for order in response.data['results']]
+
+    def test_command_moves_old_orders(self):
+        self.assertEqual(
+            set(ArchivedOrder.objects.values_list('id', flat=True)),
+            {self.old.pk, self.foreign.pk})
+        self.assertEqual(
+            list(Order.objects.values_list('id', flat=True)),
+            [self.recent.pk])
+        archived = ArchivedOrder.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.title, 'Старый ремонт')
+        self.assertEqual(archived.user, self.user)
+
+    def test_list(self):
+        self.assertEqual(self.get_ids(), [self.recent.pk])
+        self.assertEqual(self.get_ids(include_archived=1),
+                         [self.recent.pk, self.old.pk])
+
+    def test_search(self):
+        self.assertEqual(self.get_ids(search='Старый'), [])
+        self.assertEqual(
+            self.get_ids(search='Старый', include_archived='true'),
+            [self.old.pk])
+
+    def test_detail(self):
+        url = reverse('orders-detail', args=(self.old.pk,))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(url, {'include_archived': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Старый ремонт')
+        self.assertEqual(
+            self.client.get(reverse('orders-detail', args=(self.foreign.pk,)),
+                            {'include_archived': 1}).status_code, 404)
+
+    def test_archived_orders_read_only(self):
+        url = reverse('orders-detail', args=(self.old.pk,))
+        response = self.client.patch(
+            f'{url}?include_archived=1', {'title': 'Новое'}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            ArchivedOrder.objects.get(pk=self.old.pk).title, 'Старый ремонт')
+
+    def test_staff_filters(self):
+        self.client.force_authenticate(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'))
+        self.assertEqual(
+            set(self.get_ids(include_archived=1, username='other')),
+            {self.foreign.pk})
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from orders.models import Order
+
+User = get_user_model()
+
+
+class OrderConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass')
+        self.orders = Order.objects.bulk_create(
+            Order(user=self.user, title=f'Заказ {i}') for i in range(3))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('orders-list')
+
+    def get_etag(self, url=None):
+        response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_list_not_modified_without_fetching_page(self):
+        etag = self.get_etag()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_list_has_no_last_modified(self):
+        self.assertNotIn('Last-Modified', self.client.get(self.url))
+
+    def test_list_changes_after_delete(self):
+        etag = self.get_etag()
+        # Удаляется не самый новый заказ: max(updated_at) не меняется.
+        Order.objects.filter(pk=self.orders[0].pk).delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_list_changes_after_update(self):
+        etag = self.get_etag()
+        order = Order.objects.get(pk=self.orders[0].pk)
+        order.title = 'Новое название'
+        order.save()
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+            200)
+
+    def test_list_etag_depends_on_query(self):
+        self.assertNotEqual(
+            self.get_etag(), self.get_etag(f'{self.url}?page_size=1'))
+
+    def test_staff_list_has_no_validators(self):
+        self.client.force_authenticate(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_detail_not_modified_since(self):
+        url = reverse('orders-detail', args=(self.orders[0].pk,))
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,74 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import UUID
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.formats import dumps_json, loads_json
+from api.renderers import FastJSONRenderer
+
+User = get_user_model()
+
+
+class JSONFormatTests(SimpleTestCase):
+    data = {
+        'text': 'Заказ "№1"\u2028\u2029\\',
+        'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456,
+                               tzinfo=timezone.utc),
+        'birth_date': date(1990, 2, 28),
+        'price': Decimal('10.50'),
+        'id': UUID('12345678-1234-5678-1234-567812345678'),
+        'lazy': gettext_lazy('Заказы'),
+        'items': [1, 2.5, None, True, {'nested': []}],
+        1: 'int key',
+    }
+
+    def test_same_output_as_drf(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data))
+
+    def test_round_trip(self):
+        self.assertEqual(loads_json(dumps_json({'a': ['б', 1]})),
+                         {'a': ['б', 1]})
+
+    def test_non_finite_floats_become_null(self):
+        # Отличие от JSONRenderer, который выдаёт ValueError.
+        self.assertEqual(dumps_json([float('nan'), float('inf')]),
+                         b'[null,null]')
+
+
+class MessagePackTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_and_list(self):
+        response = self.client.post(
+            reverse('orders-list'),
+            msgpack.packb({'title': 'Заказ', 'description': 'Описание'}),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['title'], 'Заказ')
+        response = self.client.get(
+            reverse('orders-list'), HTTP_ACCEPT='application/msgpack')
+        data = msgpack.unpackb(response.content)
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['description'], 'Описание')
+
+    def test_invalid_body(self):
+        response = self.client.post(
+            reverse('orders-list'), b'\xc1',
+            content_type='application/msgpack')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,40 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+
+class MetricsViewTests(TestCase):
+    url = '/metrics/'
+
+    @override_settings(METRICS_TOKEN='', DEBUG=True)
+    def test_not_found_without_token_setting(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requires_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_AUTHORIZATION='Bearer other')
+            .status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_renders_request_metrics(self):
+        self.client.get(reverse('orders-list'))
+        response = self.client.get(
+            self.url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_requests_total{view="orders-list",method="GET",'
+            'status="401"}', response.content.decode())
+
+
+class ServerTimingTests(TestCase):
+
+    def test_off_by_default(self):
+        response = APIClient().get(reverse('orders-list'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_phases_and_queries(self):
+        response = APIClient().get(reverse('orders-list'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+')
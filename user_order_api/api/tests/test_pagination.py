@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orders.models import Order
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass')
+        Order.objects.bulk_create(
+            Order(user=self.user, title=f'Заказ {i}') for i in range(25))
+        # Одинаковый updated_at: порядок внутри определяет id.
+        now = timezone.now()
+        Order.objects.filter(
+            pk__in=Order.objects.values('pk')[:10]
+        ).update(created_at=now, updated_at=now)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'{reverse("orders-list")}?pagination=cursor&page_size=4'
+
+    def get_pages(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            url = response.data['next']
+        return pages
+
+    def test_walks_all_orders_once_in_order(self):
+        pages = self.get_pages(self.url)
+        self.assertNotIn('count', pages[0])
+        self.assertEqual(
+            [order['id'] for page in pages for order in page['results']],
+            list(Order.objects.order_by('-updated_at', '-id')
+                 .values_list('id', flat=True)))
+
+    def test_previous_returns_same_page(self):
+        first, second, *_ = self.get_pages(self.url)
+        response = self.client.get(second['previous'])
+        self.assertEqual(response.data['results'], first['results'])
+        self.assertIsNone(first['previous'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'cD0yMDI0'):
+            with self.subTest(cursor):
+                response = self.client.get(
+                    reverse('orders-list'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_users(self):
+        for index in range(5):
+            User.objects.create_user(
+                username=f'user{index}', email=f'user{index}@example.com')
+        self.client.force_authenticate(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'))
+        pages = self.get_pages(
+            f'{reverse("users-list")}?pagination=cursor&page_size=2')
+        self.assertEqual(
+            [user['id'] for page in pages for user in page['results']],
+            list(User.objects.order_by('-date_joined', '-id')
+                 .values_list('id', flat=True)))
@@ -0,0 +1,61 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from orders import partitions
+from orders.models import Order, User
+
+CONSTRAINT = 'order_created_at_lte_updated_at'
+
+
+def is_validated(table, name):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT convalidated FROM pg_constraint '
+            'WHERE conrelid = %s::regclass AND conname = %s', [table, name])
+        return cursor.fetchone()[0]
+
+
+@skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+class PartitionTests(TestCase):
+    table = Order._meta.db_table
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com')
+        Order.objects.bulk_create(
+            Order(user=cls.user, title=f'Заказ {index}', description='')
+            for index in range(3))
+
+    def setUp(self):
+        # ALTER TABLE невозможен, пока в транзакции теста есть отложенные
+        # проверки внешних ключей.
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    def test_constraint_added_not_valid(self):
+        self.assertFalse(is_validated(self.table, CONSTRAINT))
+
+    def test_convert_validates_constraint(self):
+        moved = partitions.convert(connection, self.table, months_ahead=1)
+        self.assertEqual(moved, 3)
+        self.assertTrue(partitions.is_partitioned(connection, self.table))
+        self.assertTrue(is_validated(self.table, CONSTRAINT))
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_convert_rejects_rows_violating_constraint(self):
+        order = Order.objects.first()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'ALTER TABLE {self.table} DROP CONSTRAINT {CONSTRAINT}')
+            cursor.execute(
+                f'UPDATE {self.table} SET updated_at = %s WHERE id = %s',
+                [order.created_at - timedelta(days=1), order.pk])
+            cursor.execute(
+                f'ALTER TABLE {self.table} ADD CONSTRAINT {CONSTRAINT} '
+                f'CHECK (created_at <= updated_at) NOT VALID')
+        with self.assertRaisesMessage(ValueError, CONSTRAINT):
+            partitions.convert(connection, self.table, months_ahead=1)
+        self.assertFalse(partitions.is_partitioned(connection, self.table))
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import TransactionTestCase
+
+from user_order_api.db.postgresql_pool.base import pool_stats
+
+
+def query_in_thread(_):
+    try:
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    finally:
+        connections.close_all()
+
+
+@skipUnless(connection.vendor == 'postgresql'
+            and settings.DATABASES['default']['OPTIONS'].get('pool'),
+            'нужен PostgreSQL с пулом соединений')
+class PoolTests(TransactionTestCase):
+
+    def test_checkouts_counted_from_threads(self):
+        query_in_thread(None)
+        before = pool_stats()['default']['checkouts']
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(query_in_thread, range(200)))
+        stats = pool_stats()['default']
+        self.assertEqual(stats['checkouts'] - before, 200)
+        self.assertEqual(stats['in_use'], 0)
@@ -0,0 +1,20 @@
+from django.test import TransactionTestCase
+
+from .budget_sweep import get_problems, measure
+
+
+class QueryBudgetTests(TransactionTestCase):
+    """
+    Число SQL-запросов каждого запроса к API и админке не превышает
+    бюджета и не растёт вместе с числом заказов и пользователей.
+    Данные фиксируются: асинхронные представления обращаются к базе
+    и из других потоков (например, при проверке пароля).
+    """
+    databases = '__all__'
+    sizes = (10, 100)
+
+    def test_query_budgets(self):
+        for name, result in measure(self.sizes).items():
+            with self.subTest(name, counts=result['counts'],
+                              budget=result['budget']):
+                self.assertEqual(get_problems(result), [])
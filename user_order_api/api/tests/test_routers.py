@@ -0,0 +1,114 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from orders.constants import PRIMARY_PIN_KEY
+from orders.models import Order
+from orders.routers import (ReplicaRouter, RoutingState, pin_to_primary,
+                            replica_request, set_request_user)
+
+User = get_user_model()
+
+
+@mock.patch('orders.routers.get_available_replica',
+            mock.Mock(return_value='replica'))
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User(pk=1, username='owner')
+
+    def db_for_read(self, state, model=Order):
+        token = replica_request.set(state)
+        try:
+            return ReplicaRouter().db_for_read(model)
+        finally:
+            replica_request.reset(token)
+
+    def test_outside_request(self):
+        self.assertIsNone(ReplicaRouter().db_for_read(Order))
+
+    def test_safe_request(self):
+        self.assertEqual(self.db_for_read(RoutingState('GET')), 'replica')
+
+    def test_unsafe_request(self):
+        self.assertIsNone(self.db_for_read(RoutingState('POST')))
+
+    def test_other_apps(self):
+        from django.contrib.sessions.models import Session
+        self.assertIsNone(self.db_for_read(RoutingState('GET'), Session))
+
+    def test_pinned_user(self):
+        pin_to_primary(self.user.pk)
+        state = RoutingState('GET')
+        token = replica_request.set(state)
+        try:
+            set_request_user(self.user)
+        finally:
+            replica_request.reset(token)
+        self.assertEqual(state.user_id, self.user.pk)
+        self.assertIsNone(self.db_for_read(state))
+
+    def test_set_user_outside_request(self):
+        self.assertIs(set_request_user(self.user), self.user)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+@mock.patch('orders.routers.get_available_replica',
+            mock.Mock(return_value=None))
+class ReplicaRoutingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass')
+        self.states = []
+
+    def request(self, client, method, url, **kwargs):
+        original = ReplicaRouter.db_for_read
+
+        def db_for_read(router, model, **hints):
+            state = replica_request.get()
+            self.states.append(
+                (state.safe, state.user_id, state.pinned))
+            return original(router, model, **hints)
+
+        self.states.clear()
+        with mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read):
+            return getattr(client, method)(url, **kwargs)
+
+    def test_token_user_pinned_after_write(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        url = reverse('orders-list')
+        self.assertEqual(self.request(client, 'get', url).status_code, 200)
+        self.assertIn((True, self.user.pk, False), self.states)
+        response = self.request(
+            client, 'post', url, format='json',
+            data={'title': 'Заказ', 'description': 'Описание'})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(cache.get(PRIMARY_PIN_KEY.format(self.user.pk)))
+        self.request(client, 'get', url)
+        self.assertIn((True, self.user.pk, True), self.states)
+
+    def test_failed_write_not_pinned(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.request(client, 'post', reverse('orders-list'),
+                     data={}, format='json')
+        self.assertIsNone(cache.get(PRIMARY_PIN_KEY.format(self.user.pk)))
+
+    def test_session_user(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        response = self.request(
+            self.client, 'get', reverse('admin:orders_order_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn((True, admin.pk, False), self.states)
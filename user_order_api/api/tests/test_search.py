@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from orders.models import Order
+
+User = get_user_model()
+
+
+class OrderSearchTests(TestCase):
+    """Полнотекстовый поиск заказов (orders.search)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass')
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass')
+        self.laptop, self.phone, self.delivery = (
+            Order.objects.create(user=self.user, title=title,
+                                 description=description)
+            for title, description in (
+                ('Ремонт ноутбука', 'Замена экрана'),
+                ('Диагностика телефона', 'Не включается, нужен ремонт'),
+                ('Доставка техники', 'Курьер до двери'),
+            )
+        )
+        Order.objects.create(
+            user=self.other, title='Ремонт монитора', description='')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, query):
+        response = self.client.get(reverse('orders-list'), {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return {order['id'] for order in response.data['results']}
+
+    def test_title_and_description(self):
+        self.assertEqual(
+            self.search('ремонт'), {self.laptop.pk, self.phone.pk})
+
+    def test_all_terms_required(self):
+        self.assertEqual(self.search('ремонт экрана'), {self.laptop.pk})
+
+    def test_index_follows_changes(self):
+        Order.objects.filter(pk=self.delivery.pk).update(
+            title='Ремонт принтера')
+        self.laptop.delete()
+        self.assertEqual(
+            self.search('ремонт'), {self.phone.pk, self.delivery.pk})
+        self.assertEqual(self.search('доставка'), set())
+
+    def test_staff_sees_all_users(self):
+        self.client.force_authenticate(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'))
+        self.assertEqual(len(self.search('ремонт')), 3)
+
+    def test_title_ranked_first(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Веса полей есть только в PostgreSQL.')
+        response = self.client.get(
+            reverse('orders-list'), {'search': 'ремонт'})
+        self.assertEqual(response.data['results'][0]['id'], self.laptop.pk)
+
+
+class SubstringSearchTests(TestCase):
+    """Поиск подстроки по триграммным индексам (orders.search.contains)."""
+
+    def setUp(self):
+        self.alice, self.bob = (
+            User.objects.create_user(
+                username=name, email=email, password='pass')
+            for name, email in (('Alice_99', 'alice@mail.example'),
+                                ('bob', 'bob@post.example'))
+        )
+        self.order = Order.objects.create(
+            user=self.bob, title='Ремонт', description='')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(
+            username='admin', email='admin@corp.test', password='pass'))
+
+    def search_users(self, query):
+        response = self.client.get(reverse('users-list'), {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return {user['username'] for user in response.data['results']}
+
+    def test_users(self):
+        for query, expected in (
+            ('LICE', {'Alice_99'}),
+            ('post.exa', {'bob'}),
+            ('.example', {'Alice_99', 'bob'}),
+            ('e_9', {'Alice_99'}),
+            ('b', {'bob'}),
+            ('%', set()),
+        ):
+            with self.subTest(query):
+                self.assertEqual(self.search_users(query), expected)
+
+    def test_orders_by_email(self):
+        response = self.client.get(
+            reverse('orders-list'), {'email': 'POST.ex'})
+        self.assertEqual(
+            [order['id'] for order in response.data['results']],
+            [self.order.pk])
@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+User = get_user_model()
+
+
+class SeedTests(TestCase):
+
+    def seed(self, **options):
+        call_command(
+            'seed', prefix='bench_', workers=1, stdout=StringIO(), **options)
+
+    def usernames(self):
+        return set(User.objects.filter(username__startswith='bench_')
+                   .values_list('username', flat=True))
+
+    def test_numbers_follow_highest_existing(self):
+        for username in ('bench_0', 'bench_5', 'bench_x', 'bench_²'):
+            User.objects.create(
+                username=username, email=f'{username}@example.com')
+        self.seed(users=2, orders=0)
+        self.assertEqual(self.usernames(), {
+            'bench_0', 'bench_5', 'bench_x', 'bench_²', 'bench_6', 'bench_7'})
+
+    def test_repeated_runs_add_users(self):
+        self.seed(users=3, orders=0)
+        self.seed(users=2, orders=0)
+        self.assertEqual(
+            self.usernames(), {f'bench_{number}' for number in range(5)})
@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import (OrderSerializer, OrderShortSerializer,
+                             UserSerializer, compile_values_serializer)
+from api.views import UserViewSet
+from orders.models import Order
+
+User = get_user_model()
+
+
+class ValuesSerializerTests(TestCase):
+    """
+    Быстрый путь (values() и compile_values_serializer) даёт тот же JSON,
+    что и сериализаторы DRF над экземплярами моделей.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([
+            User(username='owner', email='owner@example.com',
+                 birth_date=date(1990, 2, 28)),
+            User(username='no_birth_date', email='nobody@example.com'),
+        ])
+        Order.objects.bulk_create(
+            Order(user=user, title=title, description=description)
+            for user in users
+            for title, description in (
+                ('Ремонт «ноутбука»', 'Замена экрана\nи клавиатуры'),
+                ('', ''),
+                ('Заказ "№1" ', '\\ \t 🙂'),
+            )
+        )
+
+    def assertSameJSON(self, serializer_class, queryset):
+        sources, to_representation = compile_values_serializer(
+            serializer_class)
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(
+                [to_representation(row) for row in queryset.values(*sources)]),
+            renderer.render(serializer_class(queryset, many=True).data))
+
+    def test_orders(self):
+        orders = Order.objects.select_related('user').order_by('id')
+        for serializer_class in (OrderShortSerializer, OrderSerializer):
+            with self.subTest(serializer_class.__name__):
+                self.assertSameJSON(serializer_class, orders)
+
+    def test_users(self):
+        self.assertSameJSON(
+            UserSerializer, UserViewSet().get_queryset().order_by('id'))
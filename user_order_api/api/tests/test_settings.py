@@ -0,0 +1,68 @@
+import os
+import runpy
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from user_order_api import settings
+
+
+def load_settings(**environ):
+    """Настройки, вычисленные заново с переменными окружения environ."""
+    with mock.patch.dict('os.environ', environ):
+        return runpy.run_path(settings.__file__)
+
+
+class ReplicaSettingsTests(SimpleTestCase):
+
+    def test_postgres_replicas_with_pool(self):
+        values = load_settings(
+            DB_TYPE='postgres', DB_POOL='True', DB_HOST='primary',
+            DB_PORT='5432', POSTGRES_DB='orders',
+            DB_REPLICAS='replica1:5433, replica2')
+        databases = values['DATABASES']
+        self.assertEqual(values['DATABASE_REPLICAS'],
+                         ['replica_1', 'replica_2'])
+        self.assertEqual(databases['default']['ENGINE'],
+                         'user_order_api.db.postgresql_pool')
+        for alias, host, port in (('replica_1', 'replica1', '5433'),
+                                  ('replica_2', 'replica2', '5432')):
+            with self.subTest(alias):
+                replica = databases[alias]
+                self.assertEqual(replica['ENGINE'],
+                                 databases['default']['ENGINE'])
+                self.assertEqual(
+                    (replica['HOST'], replica['PORT'], replica['NAME']),
+                    (host, port, 'orders'))
+                self.assertEqual(replica['TEST'], {'MIRROR': 'default'})
+
+    def test_postgres_replicas_without_pool(self):
+        databases = load_settings(
+            DB_TYPE='postgres', DB_POOL='False', DB_HOST='primary',
+            DB_REPLICAS='replica1:5433')['DATABASES']
+        self.assertEqual(databases['replica_1']['ENGINE'],
+                         'django.db.backends.postgresql')
+        self.assertEqual(
+            (databases['replica_1']['HOST'], databases['replica_1']['PORT']),
+            ('replica1', '5433'))
+
+    def test_sqlite_replicas(self):
+        databases = load_settings(
+            DB_TYPE='sqlite', DB_REPLICAS='/tmp/replica.sqlite3')['DATABASES']
+        self.assertEqual(databases['replica_1']['NAME'],
+                         '/tmp/replica.sqlite3')
+
+
+class ProfilingSettingsTests(SimpleTestCase):
+
+    def test_off_by_default(self):
+        with mock.patch.dict('os.environ'):
+            os.environ.pop('PROFILING_HEADER', None)
+            os.environ.pop('PROFILING_SAMPLE_RATE', None)
+            values = runpy.run_path(settings.__file__)
+        self.assertFalse(values['PROFILING_HEADER'])
+        self.assertEqual(values['PROFILING_SAMPLE_RATE'], 0)
+
+    def test_header_enabled(self):
+        self.assertTrue(load_settings(PROFILING_HEADER='True')[
+            'PROFILING_HEADER'])
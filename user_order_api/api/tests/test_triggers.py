@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from orders.archive import archive
+from orders.models import ArchivedOrder, Order
+
+User = get_user_model()
+
+COUNTER_TRIGGERS = {
+    f'orders_{table}_orders_count_{event}'
+    for table in ('order', 'archivedorder')
+    for event in ('insert', 'delete', 'move')
+}
+
+
+class TriggersInstalledTests(TestCase):
+    """Триггеры и служебные таблицы, которые создают миграции orders."""
+
+    def get_sqlite_objects(self, kind):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT name FROM sqlite_master WHERE type = %s', [kind])
+            return {name for name, in cursor.fetchall()}
+
+    def get_postgresql_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT tgname FROM pg_trigger WHERE NOT tgisinternal')
+            return {name for name, in cursor.fetchall()}
+
+    def get_postgresql_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT indexname FROM pg_indexes')
+            return {name for name, in cursor.fetchall()}
+
+    def test_triggers(self):
+        if connection.vendor == 'postgresql':
+            expected = {*COUNTER_TRIGGERS,
+                        'orders_order_search_vector_trigger'}
+            self.assertLessEqual(expected, self.get_postgresql_triggers())
+            return
+        expected = {
+            *COUNTER_TRIGGERS,
+            *(f'orders_order_fts_{event}' for event in ('ai', 'ad', 'au')),
+        }
+        if connection.Database.sqlite_version_info >= (3, 34):
+            expected |= {
+                f'orders_{table}_trgm_{event}'
+                for table in ('order', 'user')
+                for event in ('ai', 'ad', 'au')
+            }
+        self.assertLessEqual(expected, self.get_sqlite_objects('trigger'))
+
+    def test_search_structures(self):
+        if connection.vendor == 'postgresql':
+            self.assertLessEqual({
+                'orders_order_search_vector_idx',
+                'orders_archivedorder_search_vector_idx',
+                'orders_user_username_trgm_idx',
+                'orders_user_email_trgm_idx',
+                'orders_order_title_trgm_idx',
+            }, self.get_postgresql_indexes())
+            return
+        expected = {'orders_order_fts'}
+        if connection.Database.sqlite_version_info >= (3, 34):
+            expected |= {'orders_order_trgm', 'orders_user_trgm'}
+        self.assertLessEqual(expected, self.get_sqlite_objects('table'))
+
+    def test_archive_view(self):
+        with connection.cursor() as cursor:
+            self.assertIn('orders_order_with_archived', {
+                info.name for info
+                in connection.introspection.get_table_list(cursor)
+                if info.type == 'v'
+            })
+
+
+class OrdersCountTriggerTests(TestCase):
+
+    def setUp(self):
+        self.user, self.other = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass')
+            for name in ('owner', 'other')
+        )
+
+    def assertCounts(self, user_count, other_count):
+        self.assertEqual(
+            [User.objects.get(pk=user.pk).orders_count
+             for user in (self.user, self.other)],
+            [user_count, other_count])
+
+    def test_insert_and_delete(self):
+        Order.objects.create(user=self.user, title='Заказ')
+        Order.objects.bulk_create(
+            Order(user=self.user, title=f'Заказ {i}') for i in range(3))
+        self.assertCounts(4, 0)
+        Order.objects.filter(title='Заказ').delete()
+        self.assertCounts(3, 0)
+
+    def test_move(self):
+        order = Order.objects.create(user=self.user, title='Заказ')
+        Order.objects.filter(pk=order.pk).update(user=self.other)
+        self.assertCounts(0, 1)
+
+    def test_archive_keeps_count(self):
+        Order.objects.bulk_create(
+            Order(user=self.user, title=f'Заказ {i}') for i in range(3))
+        self.assertEqual(archive(Order.objects.all()), 3)
+        self.assertCounts(3, 0)
+        ArchivedOrder.objects.all().delete()
+        self.assertCounts(0, 0)
+
+    def test_full_save_keeps_count(self):
+        user = User.objects.get(pk=self.user.pk)
+        Order.objects.create(user=self.user, title='Заказ')
+        user.first_name = 'Имя'
+        user.save()
+        self.assertCounts(1, 0)
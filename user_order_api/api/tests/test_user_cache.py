@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from orders.constants import USER_CACHE_KEY
+from orders.user_cache import get_cached_user, local_users
+
+User = get_user_model()
+
+
+class UserCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.url = reverse('users-current-user')
+
+    def test_caches_no_password_hash(self):
+        user = get_cached_user(User, self.user.pk)
+        self.assertNotIn(self.user.password, repr(
+            cache.get(USER_CACHE_KEY.format(self.user.pk))))
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertEqual(user.username, 'owner')
+
+    def test_profile_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['email'], 'owner@example.com')
+
+    def test_profile_update_invalidates(self):
+        self.client.get(self.url)
+        response = self.client.patch(
+            self.url, {'email': 'new@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.client.get(self.url).data['email'], 'new@example.com')
+
+    def test_update_keeps_fields_not_sent(self):
+        self.client.get(self.url)
+        # Изменение в обход save(): кеш о нём не знает.
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.client.patch(
+            self.url, {'email': 'new@example.com'}, format='json')
+        self.assertTrue(User.objects.get(pk=self.user.pk).is_staff)
+
+    def test_deactivation_invalidates(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deletion_invalidates(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
@@ -1,9 +1,17 @@
+from django.conf import settings
 from django.urls import include, path
 from drf_spectacular.views import (SpectacularAPIView, SpectacularRedocView,
                                    SpectacularSwaggerView)
 from rest_framework.routers import DefaultRouter
 
-from .views import AccessOnlyTokenView, OrderViewSet, UserViewSet, signup
+if settings.ASYNC_VIEWS:
+    from .async_views import AsyncAccessOnlyTokenView as AccessOnlyTokenView
+    from .async_views import AsyncOrderViewSet as OrderViewSet
+    from .async_views import AsyncSignUpView
+    from .async_views import AsyncUserViewSet as UserViewSet
+    signup = AsyncSignUpView.as_view()
+else:
+    from .views import AccessOnlyTokenView, OrderViewSet, UserViewSet, signup
 
 router = DefaultRouter()
 router.register('users', UserViewSet, basename='users')
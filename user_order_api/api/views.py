@@ -1,34 +1,48 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
-from django.db.models import Case, IntegerField, When
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, IntegerField, Max, When
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema_view
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import ValidationError
-from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from orders.models import Order
+from orders.counters import invalidate_orders_count_histogram
+from orders.models import Order, OrderWithArchived
+from user_order_api.metrics import timed
+from user_order_api.query_budgets import declare_query_budgets
 
-from .filters import OrderFilter, UserFilter
+from .conditional import conditional, make_etag, not_modified, set_validators
+from .filters import (FullTextSearchFilter, IndexedSearchFilter, OrderFilter,
+                      OrderWithArchivedFilter, UserFilter)
+from .pagination import OrderPagination, UserPagination
+from .parsers import FastJSONParser, MessagePackParser, NDJSONParser
 from .permissions import IsOrdererOrAdmin
-from .schemas import (order_create_schema, order_delete_schema,
-                      order_detail_schema, order_list_schema,
+from .renderers import CSVRenderer, NDJSONRenderer
+from .schemas import (order_bulk_create_schema, order_create_schema,
+                      order_delete_schema, order_detail_schema,
+                      order_export_schema, order_list_schema,
                       order_patch_schema, signup_schema, token_post_schema,
                       user_delete_schema, user_destroy_schema, user_get_schema,
                       user_list_schema, user_partial_update_schema,
                       user_patch_schema, user_retrieve_schema)
 from .serializers import (AccessOnlyTokenSerializer, CurrentUserSerializer,
                           OrderSerializer, OrderShortSerializer,
-                          SignUpSerializer, UserSerializer)
+                          SignUpSerializer, UserSerializer,
+                          compile_values_serializer, values_fields)
 
 User = get_user_model()
 
+# Состояние отфильтрованных заказов для ETag списка.
+LIST_STATE = {'last_modified': Max('updated_at'), 'count': Count('pk')}
 
+
+@declare_query_budgets(post=3)
 @signup_schema
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -43,15 +57,19 @@ def signup(request):
     try:
         serializer.save()
     except IntegrityError:
-        raise ValidationError(
-            {'email': 'email уже занят.'}
-            if User.objects.filter(email=serializer.validated_data['email'])
-            .exists()
-            else {'username': 'username уже занят.'}
-        )
+        raise signup_conflict(serializer.validated_data)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+def signup_conflict(validated_data):
+    """Ошибка регистрации, когда username или email заняли параллельно."""
+    return ValidationError(
+        {'email': 'email уже занят.'}
+        if User.objects.filter(email=validated_data['email']).exists()
+        else {'username': 'username уже занят.'}
+    )
+
+
 class AccessOnlyTokenView(TokenObtainPairView):
     """
     Получение JWT токена для аутентификации.
@@ -59,6 +77,7 @@ class AccessOnlyTokenView(TokenObtainPairView):
     Возвращает access токен.
     """
     serializer_class = AccessOnlyTokenSerializer
+    query_budgets = {'post': 1}
 
     @token_post_schema
     def post(self, request, *args, **kwargs):
@@ -80,9 +99,20 @@ class UserViewSet(viewsets.ModelViewSet):
     lookup_field = 'username'
     http_method_names = ('get', 'patch', 'delete')
     permission_classes = (IsAdminUser,)
-    filter_backends = (DjangoFilterBackend, SearchFilter)
+    pagination_class = UserPagination
+    filter_backends = (DjangoFilterBackend, IndexedSearchFilter)
     filterset_class = UserFilter
     search_fields = ('username', 'email')
+    # Наибольшее число SQL-запросов (см. user_order_api.query_budgets);
+    # удаление пользователя каскадно удаляет его заказы, архивные заказы
+    # и связи.
+    query_budgets = {
+        'list': 3,
+        'retrieve': 2,
+        'partial_update': 3,
+        'destroy': 10,
+        'current_user': {'get': 1, 'patch': 2, 'delete': 9},
+    }
 
     def get_queryset(self):
         """Возвращает пользователей с вычисленным возрастом."""
@@ -96,6 +126,22 @@ class UserViewSet(viewsets.ModelViewSet):
         )
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """
+        Список пользователей: строки выбираются через values()
+        и сериализуются быстрым путём (см. compile_values_serializer).
+        """
+        sources, to_representation = compile_values_serializer(
+            self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *dict.fromkeys((*sources, 'id', 'date_joined')))
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        with timed('serialization'):
+            data = [to_representation(row) for row in rows]
+        return (Response(data) if page is None
+                else self.get_paginated_response(data))
+
     @user_get_schema
     @user_patch_schema
     @user_delete_schema
@@ -116,10 +162,7 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         user = request.user
         if request.method == 'GET':
-            return Response(
-                CurrentUserSerializer(user).data,
-                status=status.HTTP_200_OK,
-            )
+            return self.profile_response(request, user)
         if request.method == 'DELETE':
             user.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -129,6 +172,20 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def profile_response(self, request, user):
+        """Профиль с условным GET по отображаемым полям."""
+        def get_response():
+            with timed('serialization'):
+                data = CurrentUserSerializer(user).data
+            return Response(data, status=status.HTTP_200_OK)
+
+        return conditional(
+            request,
+            get_response,
+            etag=make_etag(
+                user.pk, user.username, user.email, user.birth_date),
+        )
+
 
 @extend_schema_view(
     list=order_list_schema,
@@ -146,13 +203,38 @@ class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.none()
     http_method_names = ('get', 'post', 'patch', 'delete')
     permission_classes = (IsOrdererOrAdmin,)
-    filter_backends = (DjangoFilterBackend, SearchFilter)
-    filterset_class = OrderFilter
+    pagination_class = OrderPagination
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter)
     search_fields = ('title', 'description')
+    # Наибольшее число SQL-запросов (см. user_order_api.query_budgets).
+    query_budgets = {
+        'list': 5,
+        'retrieve': 2,
+        'create': 2,
+        'partial_update': 3,
+        'destroy': 3,
+        'bulk_create': 4,
+        'export': 2,
+    }
+    include_archived_query_param = 'include_archived'
+
+    def includes_archived(self):
+        """Список и детали заказов читают и архив с ?include_archived=1."""
+        return (
+            self.action in ('list', 'retrieve')
+            and self.request.query_params.get(
+                self.include_archived_query_param) in ('1', 'true')
+        )
+
+    @property
+    def filterset_class(self):
+        return (OrderWithArchivedFilter if self.includes_archived()
+                else OrderFilter)
 
     def get_queryset(self):
         """Возвращает заказы в зависимости от прав пользователя."""
-        orders = Order.objects.select_related('user')
+        model = OrderWithArchived if self.includes_archived() else Order
+        orders = model.objects.select_related('user')
         return (orders if self.request.user.is_staff
                 else orders.filter(user=self.request.user))
 
@@ -165,14 +247,164 @@ class OrderViewSet(viewsets.ModelViewSet):
         if self.request.user.is_staff:
             return super().filter_queryset(queryset)
         else:
-            return SearchFilter().filter_queryset(self.request, queryset, self)
+            return FullTextSearchFilter().filter_queryset(
+                self.request, queryset, self)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Список заказов с условным GET. Валидатор строится одним агрегатом
+        по отфильтрованным заказам до выборки страницы, поэтому ответ 304
+        не выбирает строки и не выполняет сериализацию.
+        Строки выбираются через values() и сериализуются быстрым путём
+        (см. compile_values_serializer).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = (None if request.user.is_staff
+                else self.list_etag(request, queryset.aggregate(**LIST_STATE)))
+        response = not_modified(request, etag)
+        if response is None:
+            queryset = self.values_queryset(queryset)
+            page = self.paginate_queryset(queryset)
+            response = self.list_response(
+                list(queryset) if page is None else page, page)
+        return set_validators(response, etag)
+
+    def list_etag(self, request, state):
+        """
+        ETag списка: параметры запроса, наибольший updated_at и число
+        отфильтрованных заказов. Изменение заказа увеличивает updated_at,
+        удаление и архивирование уменьшают число строк. Last-Modified
+        у списка нет: удаление не меняет max(updated_at), и клиент
+        с одним If-Modified-Since получил бы устаревший ответ 304.
+        Списки администраторов валидаторов не имеют: они показывают имена
+        владельцев, изменение которых агрегат не видит, а COUNT по всей
+        таблице отменил бы смысл count=estimate и курсорной пагинации.
+        """
+        return make_etag(
+            request.user.pk,
+            self.get_serializer_class().__name__,
+            sorted(request.query_params.lists()),
+            state['last_modified'],
+            state['count'],
+        )
+
+    def values_queryset(self, queryset):
+        """Только поля сериализатора и ключ курсора."""
+        sources, _ = compile_values_serializer(self.get_serializer_class())
+        return queryset.values(
+            *dict.fromkeys((*sources, 'id', 'updated_at')))
+
+    def list_response(self, rows, page):
+        _, to_representation = compile_values_serializer(
+            self.get_serializer_class())
+        with timed('serialization'):
+            data = [to_representation(row) for row in rows]
+        return (Response(data) if page is None
+                else self.get_paginated_response(data))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Заказ с условным GET по времени его последнего изменения."""
+        return self.retrieve_response(request, self.get_object())
+
+    def retrieve_response(self, request, order):
+        serializer_class = self.get_serializer_class()
+
+        def get_response():
+            with timed('serialization'):
+                data = serializer_class(
+                    order, context=self.get_serializer_context()).data
+            return Response(data)
+
+        return conditional(
+            request,
+            get_response,
+            etag=make_etag(
+                order.pk, serializer_class.__name__, order.updated_at,
+                order.user.username if request.user.is_staff else None,
+            ),
+            last_modified=order.updated_at,
+        )
 
     def get_serializer_class(self):
         """Возвращает подходящий сериализатор в зависимости от пользователя."""
-        if self.request.user.is_staff and self.action != 'create':
+        if (self.request.user.is_staff
+                and self.action not in ('create', 'bulk_create')):
             return OrderSerializer
         return OrderShortSerializer
 
     def perform_create(self, serializer):
         """Автоматически привязывает заказ к текущему пользователю."""
         serializer.save(user=self.request.user)
+
+    @order_bulk_create_schema
+    @action(
+        detail=False,
+        methods=('post',),
+        url_path='bulk',
+        parser_classes=(FastJSONParser, NDJSONParser, MessagePackParser),
+    )
+    def bulk_create(self, request):
+        """
+        Массовое создание заказов текущего пользователя.
+        Все элементы валидируются за один проход, ошибки возвращаются
+        с номерами элементов. Заказы вставляются через bulk_create
+        пачками по ORDERS_BULK_BATCH_SIZE в одной транзакции.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError('Ожидается массив заказов.')
+        if len(request.data) > settings.ORDERS_BULK_MAX_ITEMS:
+            raise ValidationError(
+                f'Не более {settings.ORDERS_BULK_MAX_ITEMS} заказов '
+                f'за один запрос.'
+            )
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            raise ValidationError({
+                index: errors
+                for index, errors in enumerate(serializer.errors) if errors
+            })
+        orders = [
+            Order(user=request.user, **item)
+            for item in serializer.validated_data
+        ]
+        with transaction.atomic():
+            Order.objects.bulk_create(
+                orders, batch_size=settings.ORDERS_BULK_BATCH_SIZE)
+        invalidate_orders_count_histogram()
+        return Response(
+            self.get_serializer(orders, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @order_export_schema
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path='export',
+        renderer_classes=(NDJSONRenderer, CSVRenderer),
+    )
+    def export(self, request):
+        """
+        Потоковая выгрузка заказов в NDJSON или CSV.
+        Учитывает те же фильтры и поиск, что и список заказов.
+        Строки читаются из базы кусками через iterator() без создания
+        моделей, поэтому расход памяти не зависит от объёма выгрузки.
+        """
+        fields = values_fields(self.get_serializer_class())
+        converters = [convert for _, _, convert in fields]
+        rows = (
+            [value if value is None or convert is None else convert(value)
+             for convert, value in zip(converters, row)]
+            for row in self.filter_queryset(self.get_queryset())
+            .values_list(*(source for _, source, _ in fields))
+            .iterator(chunk_size=settings.ORDERS_EXPORT_CHUNK_SIZE)
+        )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream([name for name, _, _ in fields], rows),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="orders.{renderer.format}"'
+        )
+        return response
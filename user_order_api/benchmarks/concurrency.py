@@ -0,0 +1,183 @@
+"""
+Нагрузочный замер одного воркера: сколько параллельных запросов он
+обслуживает и с какими задержками.
+
+Клиент — asyncio на стандартной библиотеке, соединения keep-alive.
+Для каждого уровня параллельности из --concurrency в течение --duration
+секунд отправляются GET-запросы на --path; при --token-clients столько же
+клиентов параллельно получают токены (PBKDF2), чтобы показать, блокирует
+ли хеширование паролей остальные запросы.
+
+    python -m benchmarks.concurrency --base-url http://127.0.0.1:8000 \\
+        --username bench --password bench-password \\
+        --concurrency 1 8 32 --token-clients 2
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+class Connection:
+    """
+    HTTP/1.1-соединение keep-alive для простых запросов с JSON.
+    Заголовки последнего ответа (имена в нижнем регистре) — в headers.
+    """
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+        self.headers = {}
+
+    async def request(self, method, path, headers=None, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port)
+        payload = b'' if body is None else json.dumps(body).encode()
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}',
+                 f'Content-Length: {len(payload)}']
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        lines.extend(f'{name}: {value}'
+                     for name, value in (headers or {}).items())
+        self.writer.write(
+            ('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+        await self.writer.drain()
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        length, chunked, close = 0, False, False
+        self.headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            self.headers[name] = value.strip()
+            value = value.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'transfer-encoding' and 'chunked' in value:
+                chunked = True
+            elif name == 'connection' and value == 'close':
+                close = True
+        content = (await self.read_chunked() if chunked
+                   else await self.reader.readexactly(length))
+        if close:
+            self.close()
+        return status, content
+
+    async def read_chunked(self):
+        content = b''
+        while size := int(
+                (await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+            content += await self.reader.readexactly(size)
+            await self.reader.readexactly(2)
+        await self.reader.readuntil(b'\r\n')
+        return content
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def client(host, port, method, path, headers, body, deadline,
+                 latencies, errors):
+    connection = Connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status, _ = await connection.request(
+                    method, path, headers, body)
+            except (OSError, asyncio.IncompleteReadError):
+                connection.close()
+                errors.append(None)
+                continue
+            if status >= 400:
+                errors.append(status)
+            else:
+                latencies.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def measure(args, host, port, headers, credentials, concurrency):
+    deadline = time.perf_counter() + args.duration
+    latencies, errors, token_latencies, token_errors = [], [], [], []
+    tasks = [
+        client(host, port, 'GET', args.path, headers, None, deadline,
+               latencies, errors)
+        for _ in range(concurrency)
+    ] + [
+        client(host, port, 'POST', args.token_path, {}, credentials,
+               deadline, token_latencies, token_errors)
+        for _ in range(args.token_clients)
+    ]
+    await asyncio.gather(*tasks)
+    row = {
+        'concurrency': concurrency,
+        'rps': len(latencies) / args.duration,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'errors': len(errors),
+    }
+    if args.token_clients:
+        row['token_rps'] = len(token_latencies) / args.duration
+        row['token_p50_ms'] = (
+            statistics.median(token_latencies) * 1000
+            if token_latencies else float('nan'))
+    return row
+
+
+async def main(args):
+    url = urlsplit(args.base_url)
+    host, port = url.hostname, url.port or 80
+    credentials = {'username': args.username, 'password': args.password}
+    connection = Connection(host, port)
+    status, content = await connection.request(
+        'POST', args.token_path, body=credentials)
+    connection.close()
+    if status != 200:
+        raise SystemExit(f'Не удалось получить токен: {status} {content!r}')
+    headers = {'Authorization': f"Bearer {json.loads(content)['access']}"}
+    rows = [
+        await measure(args, host, port, headers, credentials, concurrency)
+        for concurrency in args.concurrency
+    ]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    columns = list(rows[0])
+    print(' '.join(f'{column:>12}' for column in columns))
+    for row in rows:
+        print(' '.join(
+            f'{row[column]:>12.1f}' if isinstance(row[column], float)
+            else f'{row[column]:>12}' for column in columns
+        ))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--path', default='/api/orders/')
+    parser.add_argument('--token-path', default='/api/auth/token/')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--token-clients', type=int, default=0)
+    parser.add_argument('--json', action='store_true')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,387 @@
+"""
+Воспроизводимый нагрузочный прогон API взвешенной смесью запросов:
+получение токена, регистрация, список заказов с фильтрами, поиск заказов,
+создание заказа и профиль. Запросы выполняются внутри процесса через
+тестовый клиент Django (WSGI или, с --asgi, ASGI) или по HTTP
+(--base-url). Отчёт в JSON: p50/p95/p99, req/s и число SQL-запросов на
+запрос по каждому эндпоинту (по HTTP — из заголовка Server-Timing)
+с хешем коммита, чтобы сравнивать прогоны между коммитами.
+
+    python -m benchmarks.load --seed-users 1000 --seed-orders 100000
+    python -m benchmarks.load --requests 2000 --output before.json
+    python -m benchmarks.load --requests 2000 --compare before.json
+    python -m benchmarks.load --base-url http://127.0.0.1:8000 \\
+        --requests 5000 --concurrency 16
+
+Запросы идут от имени тестовых пользователей bench_<n> с паролем
+--password; их и заказы создаёт отдельный запуск с --seed-users
+и --seed-orders через команду manage.py seed. Последовательность
+запросов определяется --random-seed и одинакова между прогонами.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from urllib.parse import quote
+
+from benchmarks.concurrency import Connection, percentile
+
+MIX = {
+    'token': 5,
+    'signup': 2,
+    'orders_list': 50,
+    'orders_search': 15,
+    'order_create': 8,
+    'users_me': 20,
+}
+ORDER_LIST_QUERIES = (
+    '',
+    '?page=2',
+    '?pagination=cursor',
+    '?count=estimate',
+    '?count=none&page=3',
+    '?created_at_after=2024-01-01',
+)
+WORDS = (
+    'ремонт', 'ноутбук', 'замена', 'экран', 'доставка', 'телефон',
+    'монитор', 'клавиатура', 'диагностика', 'настройка',
+)
+TOKEN_PATH = '/api/auth/token/'
+# Число SQL-запросов в заголовке Server-Timing (user_order_api.metrics).
+SERVER_TIMING_QUERIES = re.compile(r'\bdb;[^,]*desc="(\d+) queries"')
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in MIX:
+            raise argparse.ArgumentTypeError(
+                f'Неизвестный запрос {name}; доступны: {", ".join(MIX)}.')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def make_plan(args):
+    """
+    Список запросов (имя, метод, путь, тело, номер пользователя).
+    Номер пользователя — для заголовка Authorization, None — без него.
+    """
+    rng = random.Random(args.random_seed)
+    names, weights = zip(*args.mix.items())
+    run_id = int(time.time())
+    plan = []
+    for index in range(args.requests):
+        name = rng.choices(names, weights)[0]
+        user = rng.randrange(args.auth_users)
+        if name == 'token':
+            plan.append((name, 'POST', TOKEN_PATH, {
+                'username': f'bench_{user}', 'password': args.password,
+            }, None))
+        elif name == 'signup':
+            username = f'load_{run_id}_{index}'
+            plan.append((name, 'POST', '/api/auth/signup/', {
+                'username': username,
+                'email': f'{username}@example.com',
+                'password': args.password,
+                'birth_date': str(
+                    date(1960, 1, 1) + timedelta(days=rng.randrange(15000))),
+            }, None))
+        elif name == 'orders_list':
+            plan.append((name, 'GET', '/api/orders/'
+                         + rng.choice(ORDER_LIST_QUERIES), None, user))
+        elif name == 'orders_search':
+            plan.append((name, 'GET', '/api/orders/?search='
+                         + quote(rng.choice(WORDS)), None, user))
+        elif name == 'order_create':
+            plan.append((name, 'POST', '/api/orders/', {
+                'title': f'{rng.choice(WORDS).capitalize()} №{index}',
+                'description': ' '.join(rng.choices(WORDS, k=8)),
+            }, user))
+        else:
+            plan.append((name, 'GET', '/api/users/me/', None, user))
+    return plan
+
+
+def summarize(results, elapsed):
+    """Сводка по эндпоинтам: results — (имя, секунды, статус, запросов)."""
+    groups = {'total': results}
+    for result in results:
+        groups.setdefault(result[0], []).append(result)
+    report = {}
+    for name, group in groups.items():
+        latencies = [seconds for _, seconds, status, _ in group
+                     if status < 400]
+        queries = [count for *_, count in group if count is not None]
+        report[name] = {
+            'requests': len(group),
+            'errors': sum(1 for _, _, status, _ in group if status >= 400),
+            'rps': round(len(group) / elapsed, 1),
+            **{
+                f'p{round(fraction * 100)}_ms': (
+                    round(percentile(latencies, fraction) * 1000, 2)
+                    if latencies else None
+                )
+                for fraction in (0.5, 0.95, 0.99)
+            },
+            'queries_per_request': (
+                round(sum(queries) / len(queries), 2) if queries else None
+            ),
+        }
+    return report
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL, считающая запросы во всех соединениях."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        def add(connection):
+            if self not in connection.execute_wrappers:
+                connection.execute_wrappers.append(self)
+
+        # Соединения в потоках sync_to_async создаются позже.
+        connection_created.connect(
+            lambda sender, connection, **kwargs: add(connection), weak=False)
+        for connection in connections.all():
+            add(connection)
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'user_order_api.settings')
+    import django
+    django.setup()
+
+
+def seed(users, orders, password, random_seed):
+    """Тестовые пользователи bench_<n> с общим паролем и их заказы."""
+    from django.core.management import call_command
+
+    call_command('seed', users=users, orders=orders, prefix='bench_',
+                 password=password, random_seed=random_seed)
+
+
+def issue_tokens(plan):
+    """Токены доступа пользователей плана без запросов к API."""
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from orders.models import User
+
+    numbers = {user for *_, user in plan if user is not None}
+    users = User.objects.in_bulk(
+        [f'bench_{number}' for number in numbers], field_name='username')
+    missing = [number for number in numbers
+               if f'bench_{number}' not in users]
+    if missing:
+        raise SystemExit(f'Нет пользователей bench_<n> для n = '
+                         f'{sorted(missing)[:5]}..., запустите --seed-users.')
+    return {
+        number: str(AccessToken.for_user(users[f'bench_{number}']))
+        for number in numbers
+    }
+
+
+def run_wsgi(args, plan):
+    from django.test import Client
+
+    client = Client(raise_request_exception=False)
+    counter = QueryCounter()
+    counter.install()
+    tokens = issue_tokens(plan)
+    results = []
+    started = time.perf_counter()
+    for name, method, path, body, user in plan:
+        headers = ({} if user is None
+                   else {'Authorization': f'Bearer {tokens[user]}'})
+        counter.count = 0
+        request_started = time.perf_counter()
+        response = client.generic(
+            method, path, b'' if body is None else json.dumps(body),
+            content_type='application/json', headers=headers)
+        results.append((name, time.perf_counter() - request_started,
+                        response.status_code, counter.count))
+    return results, time.perf_counter() - started
+
+
+async def run_asgi(args, plan, tokens):
+    from django.test import AsyncClient
+
+    client = AsyncClient(raise_request_exception=False)
+    counter = QueryCounter()
+    counter.install()
+    results = []
+    started = time.perf_counter()
+    for name, method, path, body, user in plan:
+        headers = ({} if user is None
+                   else {'Authorization': f'Bearer {tokens[user]}'})
+        counter.count = 0
+        request_started = time.perf_counter()
+        response = await client.generic(
+            method, path, b'' if body is None else json.dumps(body),
+            content_type='application/json', headers=headers)
+        results.append((name, time.perf_counter() - request_started,
+                        response.status_code, counter.count))
+    return results, time.perf_counter() - started
+
+
+async def run_http(args, plan):
+    url = args.base_url.split('://', 1)[-1]
+    host, _, port = url.partition(':')
+    port = int(port or 80)
+    tokens = {}
+    connection = Connection(host, port)
+    for user in sorted({user for *_, user in plan if user is not None}):
+        status, content = await connection.request('POST', TOKEN_PATH, body={
+            'username': f'bench_{user}', 'password': args.password,
+        })
+        if status != 200:
+            raise SystemExit(f'bench_{user}: нет токена ({status}), '
+                             f'нужен --seed-users.')
+        tokens[user] = json.loads(content)['access']
+    connection.close()
+    queue = iter(plan)
+    results = []
+
+    async def client():
+        connection = Connection(host, port)
+        try:
+            for name, method, path, body, user in queue:
+                headers = ({} if user is None
+                           else {'Authorization': f'Bearer {tokens[user]}'})
+                request_started = time.perf_counter()
+                queries = None
+                try:
+                    status, _ = await connection.request(
+                        method, path, headers, body)
+                    match = SERVER_TIMING_QUERIES.search(
+                        connection.headers.get('server-timing', ''))
+                    if match:
+                        queries = int(match[1])
+                except (OSError, asyncio.IncompleteReadError):
+                    connection.close()
+                    status = 599
+                results.append((name, time.perf_counter() - request_started,
+                                status, queries))
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    return results, time.perf_counter() - started
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True, cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(endpoints, baseline=None):
+    columns = ('requests', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms',
+               'queries_per_request')
+    print(f'{"":<16}' + ''.join(
+        f'{column.replace("_per_request", ""):>13}' for column in columns))
+    for name, row in endpoints.items():
+        print(f'{name:<16}' + ''.join(
+            f'{"-" if row[column] is None else row[column]:>13}'
+            for column in columns))
+        before = (baseline or {}).get(name)
+        if before:
+            print(f'{"  изменение":<16}' + ''.join(
+                f'{change(before.get(column), row[column]):>13}'
+                for column in columns))
+
+
+def change(before, after):
+    if not before or after is None:
+        return ''
+    return f'{(after - before) / before * 100:+.1f}%'
+
+
+def main(args):
+    if args.base_url is None or args.seed_users or args.seed_orders:
+        setup_django()
+        from django.conf import settings
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    if args.seed_users or args.seed_orders:
+        seed(args.seed_users, args.seed_orders, args.password,
+             args.random_seed)
+        return
+    plan = make_plan(args)
+    if args.base_url is not None:
+        target = args.base_url
+        results, elapsed = asyncio.run(run_http(args, plan))
+    elif args.asgi:
+        target = 'asgi'
+        results, elapsed = asyncio.run(
+            run_asgi(args, plan, issue_tokens(plan)))
+    else:
+        target = 'wsgi'
+        results, elapsed = run_wsgi(args, plan)
+    report = {
+        'commit': git_commit(),
+        'target': target,
+        'requests': args.requests,
+        'concurrency': args.concurrency if args.base_url else 1,
+        'random_seed': args.random_seed,
+        'mix': args.mix,
+        'seconds': round(elapsed, 2),
+        'endpoints': summarize(results, elapsed),
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    baseline = (json.loads(Path(args.compare).read_text())['endpoints']
+                if args.compare else None)
+    print(f'{target}, коммит {report["commit"]}, {elapsed:.1f} с')
+    print_table(report['endpoints'], baseline)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base-url',
+                        help='Адрес сервера; без него — внутри процесса.')
+    parser.add_argument('--asgi', action='store_true',
+                        help='Внутри процесса через ASGI (AsyncClient).')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Параллельных соединений для --base-url.')
+    parser.add_argument('--mix', type=parse_mix, default=MIX,
+                        help='Веса запросов, например orders_list=80,'
+                             'users_me=20.')
+    parser.add_argument('--auth-users', type=int, default=20,
+                        help='Сколько пользователей bench_<n> в прогоне.')
+    parser.add_argument('--password', default='bench-password')
+    parser.add_argument('--random-seed', type=int, default=1)
+    parser.add_argument('--seed-users', type=int, default=0)
+    parser.add_argument('--seed-orders', type=int, default=0)
+    parser.add_argument('--output', help='Сохранить отчёт JSON в файл.')
+    parser.add_argument('--compare',
+                        help='Отчёт JSON предыдущего прогона для сравнения.')
+    parser.add_argument('--json', action='store_true')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(parse_args())
@@ -0,0 +1,112 @@
+"""
+Сравнение сериализации страницы списка двумя путями: модели + сериализатор
+DRF и values() + compile_values_serializer. Для каждого сериализатора
+проверяется, что JSON совпадает побайтно, и выводится время выборки,
+сериализации и рендеринга одной страницы.
+
+    python -m benchmarks.serialization --rows 100 --repeat 200 --create 1000
+
+С --create во временной транзакции создаются тестовые пользователи
+и заказы; транзакция откатывается после замера.
+"""
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'user_order_api.settings')
+django.setup()
+
+from django.db import transaction  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api import serializers  # noqa: E402
+from api.views import UserViewSet  # noqa: E402
+from orders.models import Order, User  # noqa: E402
+
+
+class Rollback(Exception):
+    pass
+
+
+def create_rows(count):
+    users = User.objects.bulk_create(
+        User(
+            username=f'bench_{index}',
+            email=f'bench_{index}@example.com',
+            birth_date=(None if index % 3 == 0
+                        else date(1960, 1, 1) + timedelta(days=index * 7)),
+        )
+        for index in range(max(count // 10, 1))
+    )
+    Order.objects.bulk_create(
+        Order(
+            user=users[index % len(users)],
+            title=f'Заказ №{index}',
+            description='Ремонт экрана ноутбука, замена матрицы. ' * 3,
+        )
+        for index in range(count)
+    )
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def compare(name, serializer_class, queryset, rows, repeat):
+    renderer = JSONRenderer()
+    sources, to_representation = serializers.compile_values_serializer(
+        serializer_class)
+
+    def models_path():
+        return renderer.render(
+            serializer_class(list(queryset[:rows]), many=True).data)
+
+    def values_path():
+        return renderer.render([
+            to_representation(row)
+            for row in queryset.values(*sources)[:rows]
+        ])
+
+    models_ms, models_json = timed(models_path, repeat)
+    values_ms, values_json = timed(values_path, repeat)
+    if models_json != values_json:
+        raise SystemExit(f'{name}: JSON различается')
+    print(f'{name:<22}{models_ms:>12.2f}{values_ms:>12.2f}'
+          f'{models_ms / values_ms:>10.1f}x')
+
+
+def main(args):
+    print(f'{"сериализатор":<22}{"модели, мс":>12}{"values, мс":>12}'
+          f'{"ускорение":>11}')
+    orders = Order.objects.select_related('user').order_by('-id')
+    compare('OrderShortSerializer', serializers.OrderShortSerializer,
+            orders, args.rows, args.repeat)
+    compare('OrderSerializer', serializers.OrderSerializer,
+            orders, args.rows, args.repeat)
+    compare('UserSerializer', serializers.UserSerializer,
+            UserViewSet().get_queryset().order_by('-id'),
+            args.rows, args.repeat)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--create', type=int, default=0)
+    args = parser.parse_args()
+    if not args.create:
+        main(args)
+    else:
+        try:
+            with transaction.atomic():
+                create_rows(args.create)
+                main(args)
+                raise Rollback
+        except Rollback:
+            pass
@@ -1,11 +1,20 @@
+from functools import reduce
+from operator import or_
+
 from django.conf import settings
 from django.contrib.admin import ModelAdmin, display, register, site
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
+from django.db import connections
+from django.utils.text import Truncator, smart_split, unescape_string_literal
 
+from .admin_changelist import LargeTableChangeList
 from .admin_filters import AgeGroupFilter, OrdersCountFilter
+from .constants import LIST_PREVIEW_LENGTH
+from .estimates import EstimatedCountPaginator
 from .models import Order
+from .search import contains, get_search_backend
 
 User = get_user_model()
 
@@ -18,8 +27,64 @@ site.empty_value_display = 'Не задано'
 site.unregister(Group)
 
 
+class EstimatedCountMixin:
+    """
+    Число записей в списке считается через estimate_count: оценка
+    планировщика на больших таблицах PostgreSQL, иначе кешированный
+    COUNT(*). Полный COUNT без фильтров («показать все») не выполняется.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class LargeTableMixin(EstimatedCountMixin):
+    """
+    Список для больших таблиц (admin_changelist.LargeTableChangeList):
+    длинные поля из list_preview_fields выводятся началом значения
+    (preview) и не читаются из базы целиком, периоды date_hierarchy
+    находятся по индексу поля.
+    """
+    list_preview_fields = ()
+
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
+
+    @staticmethod
+    def preview(value):
+        return Truncator(value).chars(LIST_PREVIEW_LENGTH)
+
+
+class IndexedSearchMixin:
+    """
+    Поиск в админке через индексируемые условия (orders.search.contains)
+    вместо ILIKE по всем search_fields. Поля из fulltext_search_fields
+    ищутся по полнотекстовому индексу, если он доступен.
+    """
+    fulltext_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term:
+            return queryset, False
+        backend = self.fulltext_search_fields and get_search_backend(
+            connections[queryset.db], queryset.model)
+        if backend:
+            search_fields = [field for field in search_fields
+                             if field not in self.fulltext_search_fields]
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            conditions = [
+                contains(queryset, field, bit) for field in search_fields
+            ]
+            if backend:
+                conditions.append(backend.match(queryset.model, [bit]))
+            queryset = queryset.filter(reduce(or_, conditions))
+        return queryset, False
+
+
 @register(User)
-class ExtendedUserAdmin(UserAdmin):
+class ExtendedUserAdmin(EstimatedCountMixin, IndexedSearchMixin, UserAdmin):
     list_display = (
         'id', 'username', 'email', 'birth_date', 'age', 'date_joined',
         'orders_count'
@@ -40,9 +105,12 @@ class ExtendedUserAdmin(UserAdmin):
             )
         }),
         ('Важные даты', {
-            'fields': ('last_login', 'date_joined')
+            'fields': ('last_login', 'date_joined', 'orders_count')
         }),
     )
+    readonly_fields = ('orders_count',)
+    # Наибольшее число SQL-запросов (см. user_order_api.query_budgets).
+    query_budgets = {'changelist': 6, 'change': 8}
 
     add_fieldsets = (
         (None, {'classes': ('wide',),
@@ -59,17 +127,41 @@ class ExtendedUserAdmin(UserAdmin):
     def age(self, obj):
         return obj.age
 
-    @display(description='Число заказов')
-    def orders_count(self, obj):
-        return obj.orders.count()
-
 
 @register(Order)
-class OrderAdmin(ModelAdmin):
+class OrderAdmin(LargeTableMixin, IndexedSearchMixin, ModelAdmin):
     list_display = (
-        'id', 'title', 'description', 'user', 'created_at', 'updated_at'
+        'id', 'title', 'description_preview', 'user', 'created_at',
+        'updated_at'
     )
     list_display_links = list_display
+    list_preview_fields = ('description',)
+    list_select_related = ('user',)
+    # Сортировка только по колонкам с индексом.
+    sortable_by = ('id', 'created_at', 'updated_at')
     search_fields = ('id', 'title', 'description', 'user__username',)
+    fulltext_search_fields = ('description',)
+    # Год, месяц и день иерархии фильтруются диапазоном created_at,
+    # как и list_filter, — по индексам created_at и updated_at.
+    date_hierarchy = 'created_at'
     list_filter = ('created_at', 'updated_at')
-    readonly_fields = ('user',)
+    autocomplete_fields = ('user',)
+    # В списке за год — до 13 запросов месяцев иерархии дат.
+    query_budgets = {'changelist': 18, 'change': 7, 'add': 5}
+
+    def get_ordering(self, request):
+        # При фильтре по дате список упорядочен по ней же: условие
+        # и сортировка идут по одному индексу, а не по индексу
+        # updated_at с отбрасыванием строк вне диапазона.
+        for field in ('created_at', 'updated_at'):
+            if any(name.startswith(f'{field}__') for name in request.GET):
+                return (f'-{field}',)
+        return super().get_ordering(request)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Владелец выбирается при создании заказа и больше не меняется.
+        return ('user',) if obj is not None else ()
+
+    @display(description='Описание')
+    def description_preview(self, obj):
+        return self.preview(obj.description_preview)
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Max, Min, QuerySet
+from django.db.models.functions import Left
+from django.utils import timezone
+
+from .constants import LIST_PREVIEW_LENGTH
+
+
+def start_of(value, kind):
+    """Начало года или месяца (kind), содержащего value."""
+    if isinstance(value, datetime):
+        value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if kind == 'year':
+        return value.replace(month=1, day=1)
+    return value.replace(day=1)
+
+
+class PeriodQuerySet(QuerySet):
+    """
+    datetimes() и dates() для иерархии дат админки без DISTINCT
+    по усечённой дате, который читает всю выборку. Годы — все от
+    первого до последнего по MIN/MAX поля. Месяцы с записями находятся
+    по индексу поля: MIN(поле) от начала выборки и затем от начала
+    каждого следующего месяца — не больше 13 запросов. Дни выбираются
+    обычным DISTINCT: выборка уже ограничена месяцем.
+    """
+
+    def localize(self, value, tzinfo):
+        return value if tzinfo is None else timezone.localtime(value, tzinfo)
+
+    def years(self, field_name, tzinfo):
+        bounds = self.order_by().aggregate(
+            first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first = start_of(self.localize(bounds['first'], tzinfo), 'year')
+        last = self.localize(bounds['last'], tzinfo)
+        return [first.replace(year=year)
+                for year in range(first.year, last.year + 1)]
+
+    def months(self, field_name, tzinfo):
+        queryset = self.order_by()
+        months = []
+        first = queryset.aggregate(first=Min(field_name))['first']
+        while first is not None:
+            month = start_of(self.localize(first, tzinfo), 'month')
+            months.append(month)
+            month = (month.replace(year=month.year + 1, month=1)
+                     if month.month == 12
+                     else month.replace(month=month.month + 1))
+            first = queryset.filter(**{f'{field_name}__gte': month}).aggregate(
+                first=Min(field_name))['first']
+        return months
+
+    def periods(self, field_name, kind, order, tzinfo=None):
+        periods = (self.years if kind == 'year' else self.months)(
+            field_name, tzinfo)
+        return periods if order == 'ASC' else periods[::-1]
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None,
+                  is_dst=timezone.NOT_PASSED):
+        if kind not in ('year', 'month'):
+            return super().datetimes(field_name, kind, order, tzinfo, is_dst)
+        if settings.USE_TZ:
+            tzinfo = tzinfo or timezone.get_current_timezone()
+        return self.periods(field_name, kind, order, tzinfo)
+
+    def dates(self, field_name, kind, order='ASC'):
+        if kind not in ('year', 'month'):
+            return super().dates(field_name, kind, order)
+        return self.periods(field_name, kind, order)
+
+
+class LargeTableChangeList(ChangeList):
+    """
+    Список для больших таблиц: поля из list_preview_fields модели
+    админки не загружаются целиком — база отдаёт только начало значения
+    в <поле>_preview, — а периоды date_hierarchy выбираются
+    PeriodQuerySet. При поиске периоды считаются обычным DISTINCT:
+    выборку уже ограничивает поисковое условие, а MIN по индексу даты
+    с редким термом просматривал бы индекс почти целиком.
+    """
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        fields = self.model_admin.list_preview_fields
+        if fields:
+            # На символ больше: Truncator добавит многоточие, только если
+            # значение длиннее LIST_PREVIEW_LENGTH.
+            queryset = queryset.defer(*fields).annotate(**{
+                f'{field}_preview': Left(field, LIST_PREVIEW_LENGTH + 1)
+                for field in fields
+            })
+        if not self.date_hierarchy or self.query:
+            return queryset
+        return PeriodQuerySet(
+            queryset.model, query=queryset.query.chain(), using=queryset.db)
@@ -1,6 +1,9 @@
 from django.contrib.admin import SimpleListFilter
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Q
+from django.core.cache import cache
+from django.db.models import Count
+
+from .constants import ORDERS_COUNT_HISTOGRAM_KEY, ORDERS_COUNT_HISTOGRAM_TTL
 
 User = get_user_model()
 
@@ -20,17 +23,39 @@ class AgeGroupFilter(SimpleListFilter):
     def lookups(self, request, model_admin):
         return self.LOOKUPS
 
+    AGE_RANGES = {
+        '<18': (None, 17),
+        '18-25': (18, 25),
+        '26-35': (26, 35),
+        '36-50': (36, 50),
+        '50+': (51, None),
+    }
+
     def queryset(self, request, queryset):
-        age_filters = {
-            '<18': Q(age__lt=18),
-            '18-25': Q(age__gte=18, age__lte=25),
-            '26-35': Q(age__gte=26, age__lte=35),
-            '36-50': Q(age__gte=36, age__lte=50),
-            '50+': Q(age__gt=50),
-            'not specified': Q(birth_date__isnull=True),
-        }
-        condition = age_filters.get(self.value())
-        return queryset.filter(condition) if condition else queryset
+        if self.value() == 'not specified':
+            return queryset.filter(birth_date__isnull=True)
+        if self.value() not in self.AGE_RANGES:
+            return queryset
+        return queryset.filter(
+            User.age_condition(*self.AGE_RANGES[self.value()]))
+
+
+def get_orders_count_histogram():
+    """
+    Распределение пользователей по числу заказов {число заказов: число
+    пользователей}, посчитанное одним сгруппированным запросом и закешированное
+    на ORDERS_COUNT_HISTOGRAM_TTL секунд.
+    """
+    histogram = cache.get(ORDERS_COUNT_HISTOGRAM_KEY)
+    if histogram is None:
+        histogram = dict(
+            User.objects.order_by().values_list('orders_count')
+            .annotate(users=Count('id'))
+        )
+        cache.set(
+            ORDERS_COUNT_HISTOGRAM_KEY, histogram, ORDERS_COUNT_HISTOGRAM_TTL
+        )
+    return histogram
 
 
 class OrdersCountFilter(SimpleListFilter):
@@ -38,18 +63,20 @@ class OrdersCountFilter(SimpleListFilter):
     parameter_name = 'orders_count'
 
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
         self.few = None
         self.medium = None
         self.ranges = None
+        self.histogram = None
+        super().__init__(*args, **kwargs)
 
     def set_ranges(self):
-        unique_counts = set(User.objects.annotate(count=Count('orders'))
-                                .values_list('count', flat=True))
-        if len(unique_counts) < 3:
+        if self.histogram is not None:
+            return
+        self.histogram = get_orders_count_histogram()
+        if len(self.histogram) < 3:
             self.ranges = None
             return
-        max_count = max(unique_counts)
+        max_count = max(self.histogram)
         self.few = max_count // 3
         self.medium = (2 * max_count) // 3
         self.ranges = {
@@ -59,13 +86,19 @@ class OrdersCountFilter(SimpleListFilter):
             'many': (self.medium + 1, max_count),
         }
 
+    def range_size(self, key):
+        low, high = self.ranges[key]
+        return sum(
+            users for count, users in self.histogram.items()
+            if low <= count <= high
+        )
+
     def filter_by_range(self, key, users=None):
         if key not in self.ranges:
             return User.objects.none()
-        users = users or User.objects.all()
+        users = User.objects.all() if users is None else users
         low, high = self.ranges[key]
-        return users.annotate(count=Count('orders'))\
-            .filter(count__range=(low, high))
+        return users.filter(orders_count__range=(low, high))
 
     def lookups(self, request, model_admin):
         self.set_ranges()
@@ -74,23 +107,20 @@ class OrdersCountFilter(SimpleListFilter):
         return [
             (
                 'none',
-                f'Нет заказов '
-                f'({self.filter_by_range("none").count()})'
+                f'Нет заказов ({self.range_size("none")})'
             ),
             (
                 'few',
-                f'Мало (1–{self.few}) '
-                f'({self.filter_by_range("few").count()})'
+                f'Мало (1–{self.few}) ({self.range_size("few")})'
             ),
             (
                 'medium',
                 f'Средне ({self.few + 1}–{self.medium}) '
-                f'({self.filter_by_range("medium").count()})'
+                f'({self.range_size("medium")})'
             ),
             (
                 'many',
-                f'Много ({self.medium + 1}+) '
-                f'({self.filter_by_range("many").count()})'
+                f'Много ({self.medium + 1}+) ({self.range_size("many")})'
             )
         ]
 
@@ -0,0 +1,57 @@
+"""
+Архив заказов. Команда archive_orders переносит заказы, не изменявшиеся
+дольше ORDERS_ARCHIVE_AFTER_DAYS дней, из Order в ArchivedOrder
+частями, чтобы таблица Order и её индексы оставались небольшими.
+Представление базы данных OrderWithArchived (миграция
+0015_archivedorder_orderwitharchived) объединяет обе таблицы для чтения
+заказов API с ?include_archived=1. Миграция, которая пересоздаёт таблицу
+Order в SQLite, должна удалить представление до этого и создать заново
+после: иначе SQLite не переименует новую таблицу.
+
+User.orders_count учитывает и архивные заказы: на таблице архива
+установлены те же триггеры счётчика (orders.counters).
+"""
+from django.db import transaction
+
+from .models import ArchivedOrder, Order
+
+
+def archive(orders):
+    """
+    Переносит заказы queryset orders (может быть срезом) в архив одной
+    транзакцией и возвращает их число. Заказы, заблокированные другими
+    транзакциями, пропускаются.
+    """
+    fields = [field.attname for field in ArchivedOrder._meta.concrete_fields]
+    using = orders.db
+    with transaction.atomic(using=using):
+        archived = [
+            ArchivedOrder(**dict(zip(fields, row)))
+            for row in orders.select_for_update(skip_locked=True)
+            .values_list(*fields)
+        ]
+        if not archived:
+            return 0
+        ArchivedOrder.objects.using(using).bulk_create(archived)
+        # Граница по created_at отбрасывает секции более новых заказов
+        # (orders.partitions).
+        Order.objects.using(using).filter(
+            id__in=[order.id for order in archived],
+            created_at__lte=max(order.created_at for order in archived),
+        ).delete()
+    return len(archived)
+
+
+def archive_before(moment, batch_size, using):
+    """
+    Переносит в архив заказы, не изменявшиеся с moment, частями
+    по batch_size — от самых давних. Выдаёт число заказов каждой
+    перенесённой части.
+    """
+    # created_at <= updated_at: условие по created_at отбрасывает секции
+    # более новых заказов.
+    orders = Order.objects.using(using).filter(
+        updated_at__lt=moment, created_at__lt=moment,
+    ).order_by('updated_at', 'id')
+    while moved := archive(orders[:batch_size]):
+        yield moved
@@ -4,4 +4,14 @@ AGE_MAX_VALUE = 120
 TITLE_MAX_LENGTH = 200
 DESCRIPTION_MAX_LENGTH = 2000
 TRIM_LEN = 30
+LIST_PREVIEW_LENGTH = 100
 PATTERN = r'[^\w.@+-]'
+SEARCH_CONFIG = 'russian'
+TRIGRAM_MIN_LENGTH = 3
+ORDERS_COUNT_HISTOGRAM_KEY = 'orders:orders_count_histogram'
+ORDERS_COUNT_HISTOGRAM_TTL = 60
+USER_CACHE_KEY = 'auth:user-fields:{}'
+COUNT_CACHE_KEY = 'orders:count:{}'
+COUNT_CACHE_TTL = 60
+COUNT_ESTIMATE_THRESHOLD = 10000
+PRIMARY_PIN_KEY = 'db:primary_pin:{}'
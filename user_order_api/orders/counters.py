@@ -0,0 +1,37 @@
+"""
+User.orders_count поддерживают триггеры базы данных при вставке,
+удалении и переназначении заказов (миграции 0010_user_orders_count
+и 0015_archivedorder_orderwitharchived): счётчик меняется в той же
+транзакции, что и заказы, в том числе при bulk_create, queryset.delete()
+и каскадном удалении.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .constants import ORDERS_COUNT_HISTOGRAM_KEY
+
+
+def recount_orders(users, *orders):
+    """
+    Пересчитывает orders_count для переданных пользователей по таблицам
+    заказов orders (заказы и архив). Обновляются только строки
+    с расхождением; возвращает их число.
+    """
+    actual = sum(
+        Coalesce(
+            Subquery(
+                queryset.filter(user=OuterRef('pk')).order_by()
+                .values('user').annotate(count=Count('pk')).values('count')
+            ),
+            0
+        )
+        for queryset in orders
+    )
+    return users.exclude(orders_count=actual).update(orders_count=actual)
+
+
+def invalidate_orders_count_histogram():
+    """Сбрасывает кеш распределения числа заказов после фиксации транзакции."""
+    transaction.on_commit(lambda: cache.delete(ORDERS_COUNT_HISTOGRAM_KEY))
@@ -0,0 +1,62 @@
+from hashlib import md5
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .constants import (COUNT_CACHE_KEY, COUNT_CACHE_TTL,
+                        COUNT_ESTIMATE_THRESHOLD)
+
+
+def planner_estimate(queryset):
+    """
+    Оценка числа строк queryset по статистике планировщика PostgreSQL
+    (EXPLAIN без выполнения запроса). Для других СУБД — None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def cached_count(queryset):
+    """
+    Точный COUNT(*), закешированный на COUNT_CACHE_TTL секунд.
+    Ключ — SQL запроса с параметрами, то есть набор фильтров.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = COUNT_CACHE_KEY.format(
+        md5(repr((queryset.db, sql, params)).encode()).hexdigest())
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TTL)
+    return count
+
+
+def estimate_count(queryset):
+    """
+    Приблизительное число строк queryset. На PostgreSQL — оценка
+    планировщика; если она меньше COUNT_ESTIMATE_THRESHOLD, точный
+    подсчёт дёшев и выполняется он. На других СУБД — кешированный
+    точный подсчёт.
+    """
+    estimate = planner_estimate(queryset)
+    if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+        return estimate
+    if estimate is not None:
+        return queryset.count()
+    return cached_count(queryset)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, считающий страницы по estimate_count."""
+
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from orders.archive import archive_before
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит заказы, не изменявшиеся дольше --days дней, в архив '
+        '(orders.archive). Каждая часть переносится своей транзакцией, '
+        'поэтому команду можно прервать и запустить снова.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ORDERS_ARCHIVE_AFTER_DAYS,
+            help='Возраст заказа по времени последнего изменения.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Число заказов в одной транзакции.'
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, days, batch_size, database, **options):
+        moment = timezone.now() - timedelta(days=days)
+        total = 0
+        for moved in archive_before(moment, batch_size, database):
+            total += moved
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Перенесено заказов: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'В архив перенесено заказов, не изменявшихся с '
+            f'{timezone.localtime(moment):%Y-%m-%d %H:%M}: {total}.'
+        ))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (setup_databases, setup_test_environment,
+                               teardown_databases, teardown_test_environment)
+
+from api.tests.budget_sweep import get_problems, measure
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет бюджеты SQL-запросов (user_order_api.query_budgets): '
+        'выполняет запросы к API и админке на тестовой базе, которая '
+        'растёт по шагам --sizes, и сообщает о запросах без бюджета, '
+        'сверх бюджета и с числом SQL-запросов, растущим вместе с данными.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='15,150,1500',
+            type=lambda value: [int(size) for size in value.split(',')],
+            help='Заказов у проверяемого пользователя на каждом шаге; '
+                 'всего создаётся в десять раз больше пользователей '
+                 'и в сто раз больше заказов.'
+        )
+
+    def handle(self, *args, sizes, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = measure(sizes)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        self.report(sizes, results)
+
+    def report(self, sizes, results):
+        self.stdout.write(
+            f'{"запрос":<28}' + ''.join(f'{size:>8}' for size in sizes)
+            + f'{"бюджет":>8}  статус'
+        )
+        problems = []
+        for name, result in results.items():
+            counts, budget = result['counts'], result['budget']
+            errors = get_problems(result)
+            if errors:
+                problems.append(name)
+            line = (f'{name:<28}' + ''.join(f'{count:>8}' for count in counts)
+                    + f'{"—" if budget is None else budget:>8}  '
+                    + (', '.join(errors) or 'ok'))
+            self.stdout.write(
+                self.style.ERROR(line) if errors else line)
+        if problems:
+            raise CommandError(
+                f'Нарушены бюджеты SQL-запросов: {", ".join(problems)}.')
+        self.stdout.write(
+            self.style.SUCCESS('Бюджеты SQL-запросов соблюдены.'))
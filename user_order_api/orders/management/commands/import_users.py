@@ -0,0 +1,199 @@
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from math import ceil
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from orders.constants import EMAIL_MAX_LENGTH, USERNAME_MAX_LENGTH
+from orders.counters import invalidate_orders_count_histogram
+from orders.validators import birth_date_validator, username_validator
+
+User = get_user_model()
+
+FORMATS = ('csv', 'ndjson')
+
+
+class UserImportSerializer(serializers.Serializer):
+    """Проверка строки импорта теми же правилами, что и при регистрации."""
+    username = serializers.CharField(
+        max_length=USERNAME_MAX_LENGTH, validators=[username_validator])
+    email = serializers.EmailField(max_length=EMAIL_MAX_LENGTH)
+    password = serializers.CharField(
+        min_length=settings.PASSWORD_MIN_LENGTH, trim_whitespace=False)
+    birth_date = serializers.DateField(
+        required=False, allow_null=True, validators=[birth_date_validator])
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        yield {key: value or None for key, value in row.items()}
+
+
+def read_ndjson(stream):
+    for line in stream:
+        if not line.strip():
+            yield None
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            yield error
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует пользователей из CSV или NDJSON (поля username, email, '
+        'password, birth_date). Пароли хешируются параллельно в пуле '
+        'процессов, пользователи вставляются через bulk_create пачками. '
+        'Дубликаты и ошибочные строки выводятся и пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Путь к файлу или «-» для стандартного ввода.')
+        parser.add_argument(
+            '--format', dest='file_format', choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Число пользователей в одной транзакции.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов для хеширования паролей.'
+        )
+
+    def handle(self, *args, path, file_format, batch_size, workers,
+               **options):
+        file_format = (file_format
+                       or os.path.splitext(path)[1].lstrip('.').lower())
+        if file_format not in FORMATS:
+            raise CommandError(
+                f'Не удалось определить формат файла, укажите --format '
+                f'({", ".join(FORMATS)}).'
+            )
+        self.created = self.duplicates = self.invalid = 0
+        self.seen_usernames, self.seen_emails = set(), set()
+        stream = (sys.stdin if path == '-'
+                  else open(path, encoding='utf-8', newline=''))
+        executor = (
+            ProcessPoolExecutor(workers, initializer=django.setup)
+            if workers > 1 else None
+        )
+        try:
+            rows = enumerate(
+                read_csv(stream) if file_format == 'csv'
+                else read_ndjson(stream),
+                start=2 if file_format == 'csv' else 1
+            )
+            while batch := list(islice(rows, batch_size)):
+                self.import_batch(batch, executor, workers)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if stream is not sys.stdin:
+                stream.close()
+        if self.created:
+            invalidate_orders_count_histogram()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {self.created}, '
+            f'дубликатов: {self.duplicates}, '
+            f'строк с ошибками: {self.invalid}.'
+        ))
+
+    def import_batch(self, batch, executor, workers):
+        valid = []
+        for line, row in batch:
+            if row is None:
+                continue
+            if isinstance(row, ValueError):
+                self.report_invalid(line, f'некорректный JSON: {row}')
+                continue
+            if not isinstance(row, dict):
+                self.report_invalid(line, 'ожидается JSON-объект.')
+                continue
+            serializer = UserImportSerializer(data=row)
+            if not serializer.is_valid():
+                self.report_invalid(line, '; '.join(
+                    f'{field}: {" ".join(map(str, errors))}'
+                    for field, errors in serializer.errors.items()
+                ))
+                continue
+            data = serializer.validated_data
+            if (data['username'] in self.seen_usernames
+                    or data['email'] in self.seen_emails):
+                self.report_duplicate(line, data, 'повторяется в файле')
+                continue
+            self.seen_usernames.add(data['username'])
+            self.seen_emails.add(data['email'])
+            valid.append((line, data))
+        existing = User.objects.filter(
+            Q(username__in=[data['username'] for _, data in valid])
+            | Q(email__in=[data['email'] for _, data in valid])
+        ).values_list('username', 'email')
+        existing_usernames = {username for username, _ in existing}
+        existing_emails = {email for _, email in existing}
+        new = []
+        for line, data in valid:
+            if (data['username'] in existing_usernames
+                    or data['email'] in existing_emails):
+                self.report_duplicate(line, data, 'уже существует')
+            else:
+                new.append((line, data))
+        if not new:
+            return
+        passwords = [data['password'] for _, data in new]
+        hashes = (
+            map(make_password, passwords) if executor is None
+            else executor.map(
+                make_password, passwords,
+                chunksize=ceil(len(passwords) / (workers * 4)))
+        )
+        users = [
+            (line, User(
+                username=data['username'],
+                email=data['email'],
+                birth_date=data.get('birth_date'),
+                password=password,
+            ))
+            for (line, data), password in zip(new, hashes)
+        ]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user for _, user in users])
+            self.created += len(users)
+        except IntegrityError:
+            # Пользователя успели создать параллельно: вставляем пачку
+            # построчно, чтобы пропустить только конфликтующие строки.
+            for line, user in users:
+                try:
+                    with transaction.atomic():
+                        user.save(force_insert=True)
+                    self.created += 1
+                except IntegrityError:
+                    self.report_duplicate(
+                        line, {'username': user.username,
+                               'email': user.email}, 'уже существует')
+
+    def report_invalid(self, line, message):
+        self.invalid += 1
+        self.stderr.write(f'Строка {line}: {message}')
+
+    def report_duplicate(self, line, data, reason):
+        self.duplicates += 1
+        self.stderr.write(
+            f'Строка {line}: пользователь {data["username"]} '
+            f'({data["email"]}) {reason}, пропущен.'
+        )
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from api.filters import OrderFilter
+from api.pagination import OrderKeysetPagination
+from orders import partitions
+from orders.models import Order
+
+
+def get_explain_cases(connection):
+    """
+    Запросы заказов для проверки отбрасывания секций: (название,
+    queryset) — как их строят фильтры и пагинация API.
+    """
+    orders = Order.objects.using(connection.alias)
+    ordering = OrderKeysetPagination.ordering
+    page_size = OrderKeysetPagination.page_size
+    month = partitions.add_months(
+        partitions.month_start(timezone.now()), -1)
+    month_range = {
+        'after': month.date().isoformat(),
+        'before': (partitions.add_months(month, 1).date()
+                   - timedelta(days=1)).isoformat(),
+    }
+    year_ago = timezone.now() - timedelta(days=365)
+    cursor = OrderKeysetPagination().get_keyset_condition(
+        Order, f'{year_ago.isoformat()}|0', reverse=False)
+    return (
+        ('список, первая страница', orders.order_by(*ordering)[:page_size]),
+        ('created_at за прошлый месяц', OrderFilter(
+            {f'created_at_{key}': value for key, value in month_range.items()},
+            queryset=orders).qs.order_by(*ordering)[:page_size]),
+        ('updated_at за прошлый месяц', OrderFilter(
+            {f'updated_at_{key}': value for key, value in month_range.items()},
+            queryset=orders).qs.order_by(*ordering)[:page_size]),
+        ('курсор годичной давности',
+         orders.filter(cursor).order_by(*ordering)[:page_size]),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Секционирование таблицы заказов PostgreSQL по месяцам created_at '
+        '(orders.partitions): создаёт секции на --months-ahead месяцев '
+        'вперёд, с --convert — переводит обычную таблицу на секции, '
+        'с --explain — показывает, какие секции читают типовые запросы API.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=3,
+            help='Сколько месяцев после текущего должны иметь секции.'
+        )
+        parser.add_argument(
+            '--convert', action='store_true',
+            help='Перевести таблицу на секции. Таблица заблокирована '
+                 'на всё время копирования.'
+        )
+        parser.add_argument('--explain', action='store_true')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, months_ahead, convert, explain, database,
+               **options):
+        connection = connections[database]
+        if connection.vendor != 'postgresql':
+            raise CommandError('Секционирование доступно только в PostgreSQL.')
+        table = Order._meta.db_table
+        if convert:
+            if partitions.is_partitioned(connection, table):
+                raise CommandError(f'Таблица {table} уже секционирована.')
+            try:
+                moved = partitions.convert(connection, table, months_ahead)
+            except ValueError as error:
+                raise CommandError(error)
+            self.stdout.write(self.style.SUCCESS(
+                f'Таблица {table} секционирована, перенесено строк: {moved}.'
+            ))
+        elif not partitions.is_partitioned(connection, table):
+            raise CommandError(
+                f'Таблица {table} не секционирована: запустите команду '
+                f'с --convert.')
+        else:
+            now = timezone.now()
+            created = partitions.create_partitions(
+                connection, table, partitions.months_between(
+                    now, partitions.add_months(now, months_ahead)))
+            self.stdout.write(self.style.SUCCESS(
+                f'Создано секций: {len(created)}'
+                + (f' ({", ".join(created)}).' if created else '.')
+            ))
+        default_rows = partitions.count_default_rows(connection, table)
+        if default_rows:
+            self.stderr.write(self.style.WARNING(
+                f'В {partitions.default_partition_name(table)} строк: '
+                f'{default_rows}. Их месяцам нужны секции.'
+            ))
+        if explain:
+            self.explain(connection, table)
+
+    def explain(self, connection, table):
+        total = len(partitions.get_partitions(connection, table))
+        for name, queryset in get_explain_cases(connection):
+            planned, scanned, rows, duration = partitions.explain(queryset)
+            self.stdout.write(
+                f'{name}: в плане {planned} из {total} секций, '
+                f'прочитано {scanned}, строк {rows}, {duration:.1f} мс')
@@ -0,0 +1,109 @@
+import io
+import pstats
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from user_order_api.profiling import is_idle, load_profiles
+
+SORT_KEYS = ('duration', 'cpu', 'queries', 'peak_memory')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка профилей запросов из PROFILING_DIR: по каждому '
+        'представлению — самые медленные запросы и функции, на которые '
+        'в них ушло больше всего собственного времени. С --show — '
+        'подробный отчёт одного профиля.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', help='Только это представление.')
+        parser.add_argument(
+            '--sort', choices=SORT_KEYS, default='duration',
+            help='Показатель для выбора худших запросов.'
+        )
+        parser.add_argument('--limit', type=int, default=5)
+        parser.add_argument(
+            '--show', metavar='ID',
+            help='Граф вызовов и места выделения памяти профиля ID.'
+        )
+
+    def handle(self, *args, view, sort, limit, show, **options):
+        directory = Path(settings.PROFILING_DIR)
+        if show:
+            return self.show(directory, show, limit)
+        by_view = defaultdict(list)
+        for report in load_profiles(directory):
+            if view is None or report['view'] == view:
+                by_view[report['view']].append(report)
+        if not by_view:
+            self.stdout.write(f'Нет профилей в {directory}.')
+            return
+        for name, reports in sorted(
+                by_view.items(),
+                key=lambda item: -max(report['duration']
+                                      for report in item[1])):
+            durations = sorted(report['duration'] for report in reports)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name}: {len(reports)} профилей, медиана '
+                f'{durations[len(durations) // 2] * 1000:.1f} мс, '
+                f'максимум {durations[-1] * 1000:.1f} мс'
+            ))
+            worst = sorted(reports, key=lambda report: -(report[sort] or 0))
+            for report in worst[:limit]:
+                self.stdout.write(
+                    f'  {report["id"]}  {report["method"]} {report["path"]} '
+                    f'→ {report["status"]}: '
+                    f'{report["duration"] * 1000:.1f} мс, '
+                    f'CPU {report["cpu"] * 1000:.1f} мс, '
+                    f'SQL {report["queries"]}, '
+                    f'пик памяти {report["peak_memory"] / 2 ** 20:.1f} МБ'
+                )
+            stats = self.load_stats(
+                directory, [report['id'] for report in worst[:limit]])
+            if stats is not None:
+                self.stdout.write('  Собственное время функций:')
+                functions = sorted(
+                    (item for item in stats.stats.items()
+                     if not is_idle(item[0])),
+                    key=lambda item: -item[1][2])
+                for function, (_, calls, tottime, _, _) in functions[:limit]:
+                    self.stdout.write(
+                        f'    {tottime * 1000:9.1f} мс  {calls:>7}  '
+                        f'{pstats.func_std_string(function)}'
+                    )
+
+    def load_stats(self, directory, profile_ids):
+        paths = [str(directory / f'{profile_id}.prof')
+                 for profile_id in profile_ids
+                 if (directory / f'{profile_id}.prof').exists()]
+        return pstats.Stats(*paths) if paths else None
+
+    def show(self, directory, profile_id, limit):
+        report = next((report for report in load_profiles(directory)
+                       if report['id'] == profile_id), None)
+        if report is None:
+            raise CommandError(f'Профиль {profile_id} не найден.')
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{report["view"]}: {report["method"]} {report["path"]} '
+            f'→ {report["status"]}'
+        ))
+        self.stdout.write(
+            f'Время {report["duration"] * 1000:.1f} мс, '
+            f'CPU {report["cpu"] * 1000:.1f} мс, SQL {report["queries"]}, '
+            f'пик памяти {report["peak_memory"] / 2 ** 20:.1f} МБ'
+        )
+        stats = self.load_stats(directory, [profile_id])
+        if stats is not None:
+            stats.stream = io.StringIO()
+            stats.sort_stats('cumulative').print_stats(limit * 6)
+            self.stdout.write(stats.stream.getvalue())
+        self.stdout.write('Выделено памяти за запрос:')
+        for allocation in report['allocations'][:limit * 4]:
+            self.stdout.write(
+                f'  {allocation["size"] / 1024:10.1f} КБ  '
+                f'{allocation["count"]:>7}  {allocation["line"]}'
+            )
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from orders.counters import invalidate_orders_count_histogram, recount_orders
+from orders.models import ArchivedOrder, Order
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённое число заказов пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Число пользователей (по диапазону id) в одной транзакции.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        last_id = User.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        fixed = 0
+        for start in range(0, last_id + 1, batch_size):
+            with transaction.atomic():
+                fixed += recount_orders(
+                    User.objects.filter(
+                        id__gte=start, id__lt=start + batch_size),
+                    Order.objects.all(),
+                    ArchivedOrder.objects.all(),
+                )
+        if fixed:
+            invalidate_orders_count_histogram()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено пользователей: {fixed}.'
+        ))
@@ -0,0 +1,294 @@
+import os
+import random
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate, islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+
+from orders.counters import invalidate_orders_count_histogram
+from orders.models import Order
+
+User = get_user_model()
+
+# Доля пользователей без даты рождения и без заказов.
+NO_BIRTH_DATE_SHARE = 0.08
+NO_ORDERS_SHARE = 0.25
+# Параметр Парето для числа заказов на пользователя: около 20%
+# пользователей делают около 80% заказов.
+ORDERS_PARETO_ALPHA = 1.16
+TITLES = (
+    'Ремонт ноутбука', 'Замена экрана', 'Доставка техники',
+    'Настройка роутера', 'Диагностика телефона', 'Чистка ноутбука',
+    'Установка программ', 'Замена аккумулятора', 'Сборка компьютера',
+    'Восстановление данных',
+)
+WORDS = (
+    'ремонт', 'ноутбук', 'замена', 'экран', 'доставка', 'телефон', 'монитор',
+    'клавиатура', 'диагностика', 'настройка', 'матрица', 'аккумулятор',
+    'гарантия', 'срочно', 'корпус', 'разъём', 'зарядка', 'драйвер',
+    'система', 'данные', 'курьер', 'адрес', 'оплата', 'чек',
+)
+USER_FIELDS = (
+    'password', 'is_superuser', 'first_name', 'last_name', 'is_staff',
+    'is_active', 'date_joined', 'username', 'email', 'birth_date',
+    'orders_count',
+)
+ORDER_FIELDS = ('user', 'title', 'description', 'created_at', 'updated_at')
+
+
+def get_number(username, prefix):
+    """Номер n из <prefix><n> или None для других имён."""
+    suffix = username[len(prefix):]
+    return int(suffix) if suffix.isascii() and suffix.isdigit() else None
+
+
+def get_numbers(prefix):
+    """(номер, pk, date_joined) пользователей <prefix><n>."""
+    for pk, username, date_joined in User.objects.filter(
+        username__startswith=prefix
+    ).values_list('pk', 'username', 'date_joined').iterator():
+        number = get_number(username, prefix)
+        if number is not None:
+            yield number, pk, date_joined
+
+
+def user_rows(numbers, prefix, password, until, years):
+    """Строки пользователей; случайные значения зависят только от номера."""
+    for number, seed in numbers:
+        rng = random.Random(f'{seed}:user:{number}')
+        username = f'{prefix}{number}'
+        age = min(max(rng.gauss(36, 13), 14), 90)
+        yield (
+            password, False, '', '', False, True,
+            until - timedelta(seconds=rng.uniform(0, years * 365 * 86400)),
+            username, f'{username}@example.com',
+            None if rng.random() < NO_BIRTH_DATE_SHARE
+            else until.date() - timedelta(days=int(age * 365.25)),
+            0,
+        )
+
+
+def order_rows(users, until):
+    """Строки заказов: users — (номер, зерно, id, дата регистрации, число)."""
+    for number, seed, user_id, date_joined, count in users:
+        rng = random.Random(f'{seed}:orders:{number}')
+        span = (until - date_joined).total_seconds()
+        for _ in range(count):
+            created_at = date_joined + timedelta(
+                seconds=span * rng.random() ** 0.5)
+            updated_at = (
+                created_at if rng.random() < 0.7
+                else created_at + timedelta(seconds=rng.uniform(
+                    0, (until - created_at).total_seconds()))
+            )
+            yield (
+                user_id,
+                f'{rng.choice(TITLES)} №{rng.randrange(1, 100000)}',
+                ' '.join(rng.choices(WORDS, k=rng.randint(5, 30))),
+                created_at, updated_at,
+            )
+
+
+def adapt(connection, value):
+    if isinstance(value, datetime):
+        return connection.ops.adapt_datetimefield_value(value)
+    if isinstance(value, date):
+        return connection.ops.adapt_datefield_value(value)
+    return value
+
+
+def write_rows(model, fields, rows, batch_size):
+    """
+    Запись строк одной транзакцией: COPY на PostgreSQL, executemany
+    пачками по batch_size на остальных СУБД. Триггеры (счётчик заказов,
+    поисковые индексы) срабатывают как при обычной вставке.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    columns = [model._meta.get_field(name).column for name in fields]
+    table = quote(model._meta.db_table)
+    column_list = ', '.join(map(quote, columns))
+    written = 0
+    with transaction.atomic(using=connection.alias), \
+            connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            with cursor.copy(
+                    f'COPY {table} ({column_list}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    written += 1
+            return written
+        sql = (f'INSERT INTO {table} ({column_list}) '
+               f'VALUES ({", ".join(["%s"] * len(columns))})')
+        while batch := list(islice(rows, batch_size)):
+            cursor.executemany(sql, [
+                [adapt(connection, value) for value in row] for row in batch
+            ])
+            written += len(batch)
+    return written
+
+
+def seed_users(numbers, prefix, password, until, years, batch_size):
+    return write_rows(
+        User, USER_FIELDS,
+        user_rows(numbers, prefix, password, until, years), batch_size)
+
+
+def seed_orders(users, until, batch_size):
+    return write_rows(
+        Order, ORDER_FIELDS, order_rows(users, until), batch_size)
+
+
+def allocate_orders(count, users, random_seed):
+    """
+    Распределяет count заказов между users по весам Парето (часть
+    пользователей остаётся без заказов) методом наибольших остатков.
+    """
+    rng = random.Random(f'{random_seed}:weights')
+    weights = [
+        0 if rng.random() < NO_ORDERS_SHARE
+        else rng.paretovariate(ORDERS_PARETO_ALPHA)
+        for _ in users
+    ]
+    if not any(weights):
+        weights = [1] * len(users)
+    total = sum(weights)
+    shares = [count * weight / total for weight in weights]
+    counts = [int(share) for share in shares]
+    for index in sorted(range(len(users)),
+                        key=lambda index: counts[index] - shares[index]
+                        )[:count - sum(counts)]:
+        counts[index] += 1
+    return counts
+
+
+def chunks(items, sizes, chunk_size):
+    """Разбивает items на части с суммой sizes не больше chunk_size."""
+    bounds = list(accumulate(sizes))
+    start = 0
+    while start < len(items):
+        offset = bounds[start - 1] if start else 0
+        end = max(bisect_left(bounds, offset + chunk_size, lo=start),
+                  start + 1)
+        yield items[start:end]
+        start = end
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетических пользователей <prefix><n> с общим паролем '
+        'и их заказы: COPY на PostgreSQL (параллельно частями при '
+        '--workers > 1), executemany пачками на SQLite. Данные '
+        'определяются --random-seed и --until и совпадают между запусками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--orders', type=int, default=10000,
+            help='Заказы распределяются между созданными пользователями, '
+                 'а при --users 0 — между существующими <prefix><n>.'
+        )
+        parser.add_argument('--prefix', default='bench_')
+        parser.add_argument('--password', default='bench-password')
+        parser.add_argument('--random-seed', type=int, default=1)
+        parser.add_argument(
+            '--until', type=date.fromisoformat, default=date.today(),
+            help='Дата, до которой созданы пользователи и заказы '
+                 '(YYYY-MM-DD), по умолчанию сегодня.'
+        )
+        parser.add_argument(
+            '--years', type=float, default=5,
+            help='За сколько лет до --until регистрировались пользователи.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=100000,
+            help='Строк в одной части (транзакции).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Строк в одном executemany на SQLite.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Процессов для записи частей на PostgreSQL.'
+        )
+
+    def handle(self, *args, users, orders, prefix, password, random_seed,
+               until, years, chunk_size, batch_size, workers, **options):
+        until = datetime.combine(until, datetime.min.time(), timezone.utc)
+        connection = connections[router.db_for_write(User)]
+        if connection.vendor != 'postgresql':
+            # SQLite допускает одну пишущую транзакцию.
+            workers = 1
+        # Новые номера идут после наибольшего существующего: число
+        # пользователей <prefix><n> меньше него, если номера с пропусками.
+        start = max(
+            (number for number, _, _ in get_numbers(prefix)), default=-1
+        ) + 1
+        self.executor = None
+        if workers > 1:
+            connections.close_all()
+            self.executor = ProcessPoolExecutor(
+                workers, initializer=django.setup)
+        try:
+            if users:
+                numbers = [(number, random_seed)
+                           for number in range(start, start + users)]
+                hashed = make_password(password)
+                self.run('пользователей', seed_users, [
+                    (part, prefix, hashed, until, years, batch_size)
+                    for part in chunks(numbers, [1] * users, chunk_size)
+                ])
+            if orders:
+                self.seed_orders(
+                    orders, prefix, random_seed, until, batch_size,
+                    chunk_size, start if users else 0)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+        # Свежая статистика планировщика (в том числе для оценки числа
+        # записей в пагинации).
+        with connection.cursor() as cursor:
+            for model in (User, Order):
+                table = connection.ops.quote_name(model._meta.db_table)
+                cursor.execute(f'ANALYZE {table}')
+        invalidate_orders_count_histogram()
+
+    def seed_orders(self, orders, prefix, random_seed, until, batch_size,
+                    chunk_size, first_number):
+        users = sorted(
+            (number, random_seed, pk, date_joined)
+            for number, pk, date_joined in get_numbers(prefix)
+            if number >= first_number
+        )
+        if not users:
+            raise CommandError(
+                f'Нет пользователей {prefix}<n> для заказов, укажите --users.')
+        counts = allocate_orders(orders, users, random_seed)
+        users = [(*user, count) for user, count in zip(users, counts)
+                 if count]
+        self.run('заказов', seed_orders, [
+            (part, until, batch_size)
+            for part in chunks(users, [user[-1] for user in users],
+                               chunk_size)
+        ])
+
+    def run(self, name, function, tasks):
+        started = time.perf_counter()
+        if self.executor is None:
+            written = sum(function(*task) for task in tasks)
+        else:
+            written = sum(self.executor.map(function, *zip(*tasks)))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {name}: {written} за {elapsed:.1f} с '
+            f'({written / elapsed:.0f} в секунду).'
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_alter_user_options_alter_order_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-updated_at', '-id'], name='orders_orde_user_id_e01a43_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-updated_at', '-id'], name='orders_orde_updated_564ed1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', '-id'], name='orders_user_date_jo_39b36e_idx'),
+        ),
+    ]
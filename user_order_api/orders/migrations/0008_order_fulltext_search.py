@@ -0,0 +1,87 @@
+from django.db import migrations
+
+# SQL зафиксирован в миграции: её результат не меняется вместе с кодом
+# поиска (orders.search).
+INSTALL_SQL = {
+    'postgresql': (
+        'ALTER TABLE orders_order ADD COLUMN search_vector tsvector',
+        '''
+        CREATE FUNCTION orders_order_search_vector_update()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('russian',
+                                      coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector('russian',
+                                      coalesce(NEW.description, '')), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql''',
+        '''
+        CREATE TRIGGER orders_order_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description ON orders_order
+        FOR EACH ROW EXECUTE FUNCTION orders_order_search_vector_update()''',
+        # Триггер заполняет колонку и для уже существующих строк.
+        'UPDATE orders_order SET title = title',
+        'CREATE INDEX orders_order_search_vector_idx '
+        'ON orders_order USING GIN (search_vector)',
+    ),
+    'sqlite': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS orders_order_fts USING fts5("
+        "title, description, content='orders_order', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        'DROP TRIGGER IF EXISTS orders_order_fts_ai',
+        'DROP TRIGGER IF EXISTS orders_order_fts_ad',
+        'DROP TRIGGER IF EXISTS orders_order_fts_au',
+        'CREATE TRIGGER orders_order_fts_ai AFTER INSERT ON orders_order '
+        'BEGIN INSERT INTO orders_order_fts(rowid, title, description) '
+        'VALUES (new.id, new.title, new.description); END',
+        'CREATE TRIGGER orders_order_fts_ad AFTER DELETE ON orders_order '
+        'BEGIN INSERT INTO orders_order_fts(orders_order_fts, rowid, title, '
+        "description) VALUES ('delete', old.id, old.title, "
+        'old.description); END',
+        'CREATE TRIGGER orders_order_fts_au AFTER UPDATE OF title, '
+        'description ON orders_order '
+        'BEGIN INSERT INTO orders_order_fts(orders_order_fts, rowid, title, '
+        "description) VALUES ('delete', old.id, old.title, "
+        'old.description); '
+        'INSERT INTO orders_order_fts(rowid, title, description) '
+        'VALUES (new.id, new.title, new.description); END',
+        "INSERT INTO orders_order_fts(orders_order_fts) VALUES ('rebuild')",
+    ),
+}
+UNINSTALL_SQL = {
+    'postgresql': (
+        'DROP TRIGGER IF EXISTS orders_order_search_vector_trigger '
+        'ON orders_order',
+        'DROP FUNCTION IF EXISTS orders_order_search_vector_update()',
+        'ALTER TABLE orders_order DROP COLUMN IF EXISTS search_vector',
+    ),
+    'sqlite': (
+        'DROP TRIGGER IF EXISTS orders_order_fts_ai',
+        'DROP TRIGGER IF EXISTS orders_order_fts_ad',
+        'DROP TRIGGER IF EXISTS orders_order_fts_au',
+        'DROP TABLE IF EXISTS orders_order_fts',
+    ),
+}
+
+
+def install_search(apps, schema_editor):
+    for sql in INSTALL_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def uninstall_search(apps, schema_editor):
+    for sql in UNINSTALL_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_orders_orde_user_id_e01a43_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
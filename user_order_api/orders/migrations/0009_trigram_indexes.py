@@ -0,0 +1,104 @@
+from django.db import migrations
+
+# SQL зафиксирован в миграции: её результат не меняется вместе с кодом
+# поиска (orders.search). В SQLite таблицы FTS5 с токенизатором trigram
+# доступны с версии 3.34; в более старых поиск подстроки идёт через LIKE.
+INSTALL_SQL = {
+    'postgresql': (
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        'CREATE INDEX IF NOT EXISTS orders_user_username_trgm_idx '
+        'ON orders_user USING GIN ((UPPER(username::text)) gin_trgm_ops)',
+        'CREATE INDEX IF NOT EXISTS orders_user_email_trgm_idx '
+        'ON orders_user USING GIN ((UPPER(email::text)) gin_trgm_ops)',
+        'CREATE INDEX IF NOT EXISTS orders_order_title_trgm_idx '
+        'ON orders_order USING GIN ((UPPER(title::text)) gin_trgm_ops)',
+    ),
+    'sqlite': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS orders_user_trgm USING fts5("
+        "username, email, content='orders_user', content_rowid='id', "
+        "tokenize='trigram')",
+        'DROP TRIGGER IF EXISTS orders_user_trgm_ai',
+        'DROP TRIGGER IF EXISTS orders_user_trgm_ad',
+        'DROP TRIGGER IF EXISTS orders_user_trgm_au',
+        'CREATE TRIGGER orders_user_trgm_ai AFTER INSERT ON orders_user '
+        'BEGIN INSERT INTO orders_user_trgm(rowid, username, email) '
+        'VALUES (new.id, new.username, new.email); END',
+        'CREATE TRIGGER orders_user_trgm_ad AFTER DELETE ON orders_user '
+        'BEGIN INSERT INTO orders_user_trgm(orders_user_trgm, rowid, '
+        "username, email) VALUES ('delete', old.id, old.username, "
+        'old.email); END',
+        'CREATE TRIGGER orders_user_trgm_au AFTER UPDATE OF username, email '
+        'ON orders_user '
+        'BEGIN INSERT INTO orders_user_trgm(orders_user_trgm, rowid, '
+        "username, email) VALUES ('delete', old.id, old.username, "
+        'old.email); '
+        'INSERT INTO orders_user_trgm(rowid, username, email) '
+        'VALUES (new.id, new.username, new.email); END',
+        "INSERT INTO orders_user_trgm(orders_user_trgm) VALUES ('rebuild')",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS orders_order_trgm USING fts5("
+        "title, content='orders_order', content_rowid='id', "
+        "tokenize='trigram')",
+        'DROP TRIGGER IF EXISTS orders_order_trgm_ai',
+        'DROP TRIGGER IF EXISTS orders_order_trgm_ad',
+        'DROP TRIGGER IF EXISTS orders_order_trgm_au',
+        'CREATE TRIGGER orders_order_trgm_ai AFTER INSERT ON orders_order '
+        'BEGIN INSERT INTO orders_order_trgm(rowid, title) '
+        'VALUES (new.id, new.title); END',
+        'CREATE TRIGGER orders_order_trgm_ad AFTER DELETE ON orders_order '
+        'BEGIN INSERT INTO orders_order_trgm(orders_order_trgm, rowid, '
+        "title) VALUES ('delete', old.id, old.title); END",
+        'CREATE TRIGGER orders_order_trgm_au AFTER UPDATE OF title '
+        'ON orders_order '
+        'BEGIN INSERT INTO orders_order_trgm(orders_order_trgm, rowid, '
+        "title) VALUES ('delete', old.id, old.title); "
+        'INSERT INTO orders_order_trgm(rowid, title) '
+        'VALUES (new.id, new.title); END',
+        "INSERT INTO orders_order_trgm(orders_order_trgm) VALUES ('rebuild')",
+    ),
+}
+UNINSTALL_SQL = {
+    'postgresql': (
+        'DROP INDEX IF EXISTS orders_user_username_trgm_idx',
+        'DROP INDEX IF EXISTS orders_user_email_trgm_idx',
+        'DROP INDEX IF EXISTS orders_order_title_trgm_idx',
+    ),
+    'sqlite': (
+        'DROP TRIGGER IF EXISTS orders_user_trgm_ai',
+        'DROP TRIGGER IF EXISTS orders_user_trgm_ad',
+        'DROP TRIGGER IF EXISTS orders_user_trgm_au',
+        'DROP TABLE IF EXISTS orders_user_trgm',
+        'DROP TRIGGER IF EXISTS orders_order_trgm_ai',
+        'DROP TRIGGER IF EXISTS orders_order_trgm_ad',
+        'DROP TRIGGER IF EXISTS orders_order_trgm_au',
+        'DROP TABLE IF EXISTS orders_order_trgm',
+    ),
+}
+
+
+def get_statements(statements, connection):
+    if (connection.vendor == 'sqlite'
+            and connection.Database.sqlite_version_info < (3, 34)):
+        return ()
+    return statements.get(connection.vendor, ())
+
+
+def install_trigram_indexes(apps, schema_editor):
+    for sql in get_statements(INSTALL_SQL, schema_editor.connection):
+        schema_editor.execute(sql)
+
+
+def uninstall_trigram_indexes(apps, schema_editor):
+    for sql in UNINSTALL_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            install_trigram_indexes, uninstall_trigram_indexes),
+    ]
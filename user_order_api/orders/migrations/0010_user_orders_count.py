@@ -0,0 +1,158 @@
+# Generated by Django 4.2.23 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+# SQL зафиксирован в миграции: её результат не меняется вместе с кодом
+# поиска и счётчиков (orders.search, orders.counters).
+
+# AddField/RemoveField пересоздают таблицу пользователей в SQLite вместе
+# с триггерами триграммного индекса (0009_trigram_indexes).
+USER_TRIGRAM_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS orders_user_trgm USING fts5("
+    "username, email, content='orders_user', content_rowid='id', "
+    "tokenize='trigram')",
+    'DROP TRIGGER IF EXISTS orders_user_trgm_ai',
+    'DROP TRIGGER IF EXISTS orders_user_trgm_ad',
+    'DROP TRIGGER IF EXISTS orders_user_trgm_au',
+    'CREATE TRIGGER orders_user_trgm_ai AFTER INSERT ON orders_user '
+    'BEGIN INSERT INTO orders_user_trgm(rowid, username, email) '
+    'VALUES (new.id, new.username, new.email); END',
+    'CREATE TRIGGER orders_user_trgm_ad AFTER DELETE ON orders_user '
+    'BEGIN INSERT INTO orders_user_trgm(orders_user_trgm, rowid, '
+    "username, email) VALUES ('delete', old.id, old.username, "
+    'old.email); END',
+    'CREATE TRIGGER orders_user_trgm_au AFTER UPDATE OF username, email '
+    'ON orders_user '
+    'BEGIN INSERT INTO orders_user_trgm(orders_user_trgm, rowid, '
+    "username, email) VALUES ('delete', old.id, old.username, "
+    'old.email); '
+    'INSERT INTO orders_user_trgm(rowid, username, email) '
+    'VALUES (new.id, new.username, new.email); END',
+    "INSERT INTO orders_user_trgm(orders_user_trgm) VALUES ('rebuild')",
+)
+
+# В PostgreSQL вставка и удаление обрабатываются триггерами уровня
+# оператора с таблицами переходов: один UPDATE пользователей на оператор.
+COUNTER_SQL = {
+    'postgresql': (
+        '''
+        CREATE FUNCTION orders_order_orders_count_update()
+        RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE orders_user AS u
+                SET orders_count = u.orders_count + d.n
+                FROM (SELECT user_id, COUNT(*) AS n FROM new_rows
+                      GROUP BY user_id) AS d
+                WHERE u.id = d.user_id;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE orders_user AS u
+                SET orders_count = u.orders_count - d.n
+                FROM (SELECT user_id, COUNT(*) AS n FROM old_rows
+                      GROUP BY user_id) AS d
+                WHERE u.id = d.user_id;
+            ELSE
+                UPDATE orders_user SET orders_count = orders_count - 1
+                WHERE id = OLD.user_id;
+                UPDATE orders_user SET orders_count = orders_count + 1
+                WHERE id = NEW.user_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql''',
+        '''
+        CREATE TRIGGER orders_order_orders_count_insert
+        AFTER INSERT ON orders_order REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION orders_order_orders_count_update()
+        ''',
+        '''
+        CREATE TRIGGER orders_order_orders_count_delete
+        AFTER DELETE ON orders_order REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION orders_order_orders_count_update()
+        ''',
+        '''
+        CREATE TRIGGER orders_order_orders_count_move
+        AFTER UPDATE OF user_id ON orders_order FOR EACH ROW
+        WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id)
+        EXECUTE FUNCTION orders_order_orders_count_update()''',
+    ),
+    'sqlite': (
+        'DROP TRIGGER IF EXISTS orders_order_orders_count_insert',
+        'DROP TRIGGER IF EXISTS orders_order_orders_count_delete',
+        'DROP TRIGGER IF EXISTS orders_order_orders_count_move',
+        'CREATE TRIGGER orders_order_orders_count_insert '
+        'AFTER INSERT ON orders_order '
+        'BEGIN UPDATE orders_user SET orders_count = orders_count + 1 '
+        'WHERE id = new.user_id; END',
+        'CREATE TRIGGER orders_order_orders_count_delete '
+        'AFTER DELETE ON orders_order '
+        'BEGIN UPDATE orders_user SET orders_count = orders_count - 1 '
+        'WHERE id = old.user_id; END',
+        'CREATE TRIGGER orders_order_orders_count_move '
+        'AFTER UPDATE OF user_id ON orders_order '
+        'WHEN old.user_id IS NOT new.user_id '
+        'BEGIN UPDATE orders_user SET orders_count = orders_count - 1 '
+        'WHERE id = old.user_id; '
+        'UPDATE orders_user SET orders_count = orders_count + 1 '
+        'WHERE id = new.user_id; END',
+    ),
+}
+UNINSTALL_COUNTER_SQL = {
+    'postgresql': (
+        'DROP TRIGGER IF EXISTS orders_order_orders_count_insert '
+        'ON orders_order',
+        'DROP TRIGGER IF EXISTS orders_order_orders_count_delete '
+        'ON orders_order',
+        'DROP TRIGGER IF EXISTS orders_order_orders_count_move '
+        'ON orders_order',
+        'DROP FUNCTION IF EXISTS orders_order_orders_count_update()',
+    ),
+    'sqlite': (
+        'DROP TRIGGER IF EXISTS orders_order_orders_count_insert',
+        'DROP TRIGGER IF EXISTS orders_order_orders_count_delete',
+        'DROP TRIGGER IF EXISTS orders_order_orders_count_move',
+    ),
+}
+RECOUNT_SQL = (
+    'UPDATE orders_user SET orders_count = (SELECT COUNT(*) '
+    'FROM orders_order WHERE orders_order.user_id = orders_user.id)'
+)
+
+
+def reinstall_user_trigram(apps, schema_editor):
+    connection = schema_editor.connection
+    if (connection.vendor == 'sqlite'
+            and connection.Database.sqlite_version_info >= (3, 34)):
+        for sql in USER_TRIGRAM_SQL:
+            schema_editor.execute(sql)
+
+
+def install_orders_counter(apps, schema_editor):
+    reinstall_user_trigram(apps, schema_editor)
+    for sql in COUNTER_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+    schema_editor.execute(RECOUNT_SQL)
+
+
+def uninstall_orders_counter(apps, schema_editor):
+    for sql in UNINSTALL_COUNTER_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, reinstall_user_trigram),
+        migrations.AddField(
+            model_name='user',
+            name='orders_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Поддерживается триггерами базы данных', verbose_name='Число заказов'),
+        ),
+        migrations.RunPython(
+            install_orders_counter, uninstall_orders_counter),
+    ]
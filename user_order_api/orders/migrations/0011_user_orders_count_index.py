@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_user_orders_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['orders_count'], name='orders_user_orders__ac5f32_idx'),
+        ),
+    ]
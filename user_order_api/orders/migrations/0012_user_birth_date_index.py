@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_user_orders_count_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['birth_date'], name='orders_user_birth_d_cf5267_idx'),
+        ),
+    ]
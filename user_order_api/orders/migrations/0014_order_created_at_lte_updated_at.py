@@ -0,0 +1,116 @@
+# Generated by Django 4.2.23 on 2026-10-18 17:03
+
+from django.db import migrations, models
+
+# SQL зафиксирован в миграции: её результат не меняется вместе с кодом
+# поиска и счётчиков (orders.search, orders.counters).
+
+# AddConstraint/RemoveConstraint пересоздают таблицу заказов в SQLite
+# вместе с триггерами поиска (0008), триграммного индекса (0009)
+# и счётчика заказов (0010).
+ORDER_TRIGGERS_SQL = (
+    'DROP TRIGGER IF EXISTS orders_order_fts_ai',
+    'DROP TRIGGER IF EXISTS orders_order_fts_ad',
+    'DROP TRIGGER IF EXISTS orders_order_fts_au',
+    'CREATE TRIGGER orders_order_fts_ai AFTER INSERT ON orders_order '
+    'BEGIN INSERT INTO orders_order_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER orders_order_fts_ad AFTER DELETE ON orders_order '
+    'BEGIN INSERT INTO orders_order_fts(orders_order_fts, rowid, title, '
+    "description) VALUES ('delete', old.id, old.title, "
+    'old.description); END',
+    'CREATE TRIGGER orders_order_fts_au AFTER UPDATE OF title, '
+    'description ON orders_order '
+    'BEGIN INSERT INTO orders_order_fts(orders_order_fts, rowid, title, '
+    "description) VALUES ('delete', old.id, old.title, "
+    'old.description); '
+    'INSERT INTO orders_order_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    "INSERT INTO orders_order_fts(orders_order_fts) VALUES ('rebuild')",
+    'DROP TRIGGER IF EXISTS orders_order_orders_count_insert',
+    'DROP TRIGGER IF EXISTS orders_order_orders_count_delete',
+    'DROP TRIGGER IF EXISTS orders_order_orders_count_move',
+    'CREATE TRIGGER orders_order_orders_count_insert '
+    'AFTER INSERT ON orders_order '
+    'BEGIN UPDATE orders_user SET orders_count = orders_count + 1 '
+    'WHERE id = new.user_id; END',
+    'CREATE TRIGGER orders_order_orders_count_delete '
+    'AFTER DELETE ON orders_order '
+    'BEGIN UPDATE orders_user SET orders_count = orders_count - 1 '
+    'WHERE id = old.user_id; END',
+    'CREATE TRIGGER orders_order_orders_count_move '
+    'AFTER UPDATE OF user_id ON orders_order '
+    'WHEN old.user_id IS NOT new.user_id '
+    'BEGIN UPDATE orders_user SET orders_count = orders_count - 1 '
+    'WHERE id = old.user_id; '
+    'UPDATE orders_user SET orders_count = orders_count + 1 '
+    'WHERE id = new.user_id; END',
+)
+ORDER_TRIGRAM_SQL = (
+    'DROP TRIGGER IF EXISTS orders_order_trgm_ai',
+    'DROP TRIGGER IF EXISTS orders_order_trgm_ad',
+    'DROP TRIGGER IF EXISTS orders_order_trgm_au',
+    'CREATE TRIGGER orders_order_trgm_ai AFTER INSERT ON orders_order '
+    'BEGIN INSERT INTO orders_order_trgm(rowid, title) '
+    'VALUES (new.id, new.title); END',
+    'CREATE TRIGGER orders_order_trgm_ad AFTER DELETE ON orders_order '
+    'BEGIN INSERT INTO orders_order_trgm(orders_order_trgm, rowid, '
+    "title) VALUES ('delete', old.id, old.title); END",
+    'CREATE TRIGGER orders_order_trgm_au AFTER UPDATE OF title '
+    'ON orders_order '
+    'BEGIN INSERT INTO orders_order_trgm(orders_order_trgm, rowid, '
+    "title) VALUES ('delete', old.id, old.title); "
+    'INSERT INTO orders_order_trgm(rowid, title) '
+    'VALUES (new.id, new.title); END',
+    "INSERT INTO orders_order_trgm(orders_order_trgm) VALUES ('rebuild')",
+)
+
+
+def reinstall_order_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    for sql in ORDER_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+    if connection.Database.sqlite_version_info >= (3, 34):
+        for sql in ORDER_TRIGRAM_SQL:
+            schema_editor.execute(sql)
+
+
+class AddConstraintNotValid(migrations.AddConstraint):
+    """
+    В PostgreSQL ограничение добавляется с NOT VALID: оно проверяет
+    новые и изменённые строки, но не существующие, поэтому миграция
+    не читает всю таблицу и не зависит от старых данных. Существующие
+    строки проверяет ALTER TABLE ... VALIDATE CONSTRAINT (его выполняет
+    команда partitions --convert). В SQLite NOT VALID нет, и таблица
+    пересоздаётся с ограничением.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+        schema_editor.execute(
+            'ALTER TABLE orders_order '
+            'ADD CONSTRAINT order_created_at_lte_updated_at '
+            'CHECK (created_at <= updated_at) NOT VALID')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_order_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, reinstall_order_triggers),
+        AddConstraintNotValid(
+            model_name='order',
+            constraint=models.CheckConstraint(check=models.Q(('created_at__lte', models.F('updated_at'))), name='order_created_at_lte_updated_at'),
+        ),
+        migrations.RunPython(
+            reinstall_order_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,190 @@
+# Generated by Django 4.2.23 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# SQL зафиксирован в миграции: её результат не меняется вместе с кодом
+# архива и счётчиков (orders.archive, orders.counters).
+
+# Представление «заказы вместе с архивными». Миграция, которая
+# пересоздаёт таблицу заказов в SQLite, должна удалить представление
+# до этого и создать заново после: иначе SQLite не переименует новую
+# таблицу. В PostgreSQL в представлении есть колонка полнотекстового
+# поиска: в архиве она не хранится, а вычисляется тем же выражением,
+# что и у заказов, а GIN-индекс по этому выражению позволяет искать
+# по архиву без полного просмотра.
+ARCHIVE_SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+)
+VIEW_SQL = {
+    'postgresql': (
+        'CREATE INDEX orders_archivedorder_search_vector_idx '
+        f'ON orders_archivedorder USING GIN (({ARCHIVE_SEARCH_VECTOR}))',
+        'CREATE VIEW orders_order_with_archived AS '
+        'SELECT id, title, description, created_at, updated_at, user_id, '
+        'search_vector FROM orders_order '
+        'UNION ALL '
+        'SELECT id, title, description, created_at, updated_at, user_id, '
+        f'{ARCHIVE_SEARCH_VECTOR} FROM orders_archivedorder',
+    ),
+    'sqlite': (
+        'CREATE VIEW orders_order_with_archived AS '
+        'SELECT id, title, description, created_at, updated_at, user_id '
+        'FROM orders_order '
+        'UNION ALL '
+        'SELECT id, title, description, created_at, updated_at, user_id '
+        'FROM orders_archivedorder',
+    ),
+}
+UNINSTALL_VIEW_SQL = {
+    'postgresql': (
+        'DROP VIEW IF EXISTS orders_order_with_archived',
+        'DROP INDEX IF EXISTS orders_archivedorder_search_vector_idx',
+    ),
+    'sqlite': (
+        'DROP VIEW IF EXISTS orders_order_with_archived',
+    ),
+}
+# Счётчик User.orders_count учитывает и архивные заказы: на таблице
+# архива те же триггеры, что и на таблице заказов (0010_user_orders_count).
+COUNTER_SQL = {
+    'postgresql': (
+        '''
+        CREATE FUNCTION orders_archivedorder_orders_count_update()
+        RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE orders_user AS u
+                SET orders_count = u.orders_count + d.n
+                FROM (SELECT user_id, COUNT(*) AS n FROM new_rows
+                      GROUP BY user_id) AS d
+                WHERE u.id = d.user_id;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE orders_user AS u
+                SET orders_count = u.orders_count - d.n
+                FROM (SELECT user_id, COUNT(*) AS n FROM old_rows
+                      GROUP BY user_id) AS d
+                WHERE u.id = d.user_id;
+            ELSE
+                UPDATE orders_user SET orders_count = orders_count - 1
+                WHERE id = OLD.user_id;
+                UPDATE orders_user SET orders_count = orders_count + 1
+                WHERE id = NEW.user_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql''',
+        '''
+        CREATE TRIGGER orders_archivedorder_orders_count_insert
+        AFTER INSERT ON orders_archivedorder
+        REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT
+        EXECUTE FUNCTION orders_archivedorder_orders_count_update()''',
+        '''
+        CREATE TRIGGER orders_archivedorder_orders_count_delete
+        AFTER DELETE ON orders_archivedorder
+        REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT
+        EXECUTE FUNCTION orders_archivedorder_orders_count_update()''',
+        '''
+        CREATE TRIGGER orders_archivedorder_orders_count_move
+        AFTER UPDATE OF user_id ON orders_archivedorder FOR EACH ROW
+        WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id)
+        EXECUTE FUNCTION orders_archivedorder_orders_count_update()''',
+    ),
+    'sqlite': (
+        'DROP TRIGGER IF EXISTS orders_archivedorder_orders_count_insert',
+        'DROP TRIGGER IF EXISTS orders_archivedorder_orders_count_delete',
+        'DROP TRIGGER IF EXISTS orders_archivedorder_orders_count_move',
+        'CREATE TRIGGER orders_archivedorder_orders_count_insert '
+        'AFTER INSERT ON orders_archivedorder '
+        'BEGIN UPDATE orders_user SET orders_count = orders_count + 1 '
+        'WHERE id = new.user_id; END',
+        'CREATE TRIGGER orders_archivedorder_orders_count_delete '
+        'AFTER DELETE ON orders_archivedorder '
+        'BEGIN UPDATE orders_user SET orders_count = orders_count - 1 '
+        'WHERE id = old.user_id; END',
+        'CREATE TRIGGER orders_archivedorder_orders_count_move '
+        'AFTER UPDATE OF user_id ON orders_archivedorder '
+        'WHEN old.user_id IS NOT new.user_id '
+        'BEGIN UPDATE orders_user SET orders_count = orders_count - 1 '
+        'WHERE id = old.user_id; '
+        'UPDATE orders_user SET orders_count = orders_count + 1 '
+        'WHERE id = new.user_id; END',
+    ),
+}
+UNINSTALL_COUNTER_SQL = {
+    'postgresql': (
+        'DROP TRIGGER IF EXISTS orders_archivedorder_orders_count_insert '
+        'ON orders_archivedorder',
+        'DROP TRIGGER IF EXISTS orders_archivedorder_orders_count_delete '
+        'ON orders_archivedorder',
+        'DROP TRIGGER IF EXISTS orders_archivedorder_orders_count_move '
+        'ON orders_archivedorder',
+        'DROP FUNCTION IF EXISTS orders_archivedorder_orders_count_update()',
+    ),
+    'sqlite': (
+        'DROP TRIGGER IF EXISTS orders_archivedorder_orders_count_insert',
+        'DROP TRIGGER IF EXISTS orders_archivedorder_orders_count_delete',
+        'DROP TRIGGER IF EXISTS orders_archivedorder_orders_count_move',
+    ),
+}
+
+
+def install_archive(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in (*VIEW_SQL.get(vendor, ()), *COUNTER_SQL.get(vendor, ())):
+        schema_editor.execute(sql)
+
+
+def uninstall_archive(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in (*UNINSTALL_COUNTER_SQL.get(vendor, ()),
+                *UNINSTALL_VIEW_SQL.get(vendor, ())):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0014_order_created_at_lte_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderWithArchived',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='Наименование')),
+                ('description', models.TextField(max_length=2000, verbose_name='Описание')),
+                ('created_at', models.DateTimeField(verbose_name='Создан')),
+                ('updated_at', models.DateTimeField(verbose_name='Обновлён')),
+            ],
+            options={
+                'verbose_name': 'заказ',
+                'verbose_name_plural': 'Заказы с архивными',
+                'db_table': 'orders_order_with_archived',
+                'ordering': ('-updated_at',),
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200, verbose_name='Наименование')),
+                ('description', models.TextField(max_length=2000, verbose_name='Описание')),
+                ('created_at', models.DateTimeField(verbose_name='Создан')),
+                ('updated_at', models.DateTimeField(verbose_name='Обновлён')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'архивный заказ',
+                'verbose_name_plural': 'Архивные заказы',
+                'ordering': ('-updated_at',),
+                'default_related_name': 'archived_orders',
+                'indexes': [models.Index(fields=['user', '-updated_at', '-id'], name='orders_arch_user_id_20a5a7_idx'), models.Index(fields=['-updated_at', '-id'], name='orders_arch_updated_5055ec_idx')],
+            },
+        ),
+        migrations.RunPython(install_archive, uninstall_archive),
+    ]
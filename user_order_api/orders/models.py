@@ -1,15 +1,30 @@
+from datetime import MINYEAR, date
+from math import ceil, floor
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.db.models import Case, ExpressionWrapper, F, IntegerField, Q, When
 from django.db.models.functions import (ExtractDay, ExtractMonth, ExtractYear,
                                         Now)
+from django.utils import timezone
 from django.utils.text import Truncator
 
 from .constants import (DESCRIPTION_MAX_LENGTH, EMAIL_MAX_LENGTH,
                         TITLE_MAX_LENGTH, TRIM_LEN, USERNAME_MAX_LENGTH)
+from .counters import invalidate_orders_count_histogram
+from .user_cache import invalidate_user
 from .validators import birth_date_validator, username_validator
 
 
+def years_before(day, years):
+    """Дата за years лет до day (29 февраля переходит в 28 февраля)."""
+    year = day.year - min(max(years, 0), day.year - MINYEAR)
+    try:
+        return day.replace(year=year)
+    except ValueError:
+        return date(year, day.month, day.day - 1)
+
+
 class User(AbstractUser):
     username = models.CharField(
         'Логин',
@@ -30,10 +45,34 @@ class User(AbstractUser):
         null=True,
         blank=True
     )
+    orders_count = models.PositiveIntegerField(
+        'Число заказов',
+        default=0,
+        editable=False,
+        help_text='Поддерживается триггерами базы данных'
+    )
 
     def __str__(self):
         return Truncator(self.username).chars(TRIM_LEN)
 
+    def save(self, *args, **kwargs):
+        # Счётчик заказов меняют только триггеры: полное сохранение
+        # не должно перезаписывать его устаревшим значением из памяти.
+        if (not self._state.adding and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            skipped = {'orders_count', *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+        invalidate_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        invalidate_orders_count_histogram()
+        invalidate_user(self.pk)
+        return super().delete(*args, **kwargs)
+
     @staticmethod
     def calculate_age_expression():
         now, birth = Now(), F('birth_date')
@@ -52,10 +91,31 @@ class User(AbstractUser):
             output_field=IntegerField()
         )
 
+    @staticmethod
+    def age_condition(min_age=None, max_age=None):
+        """
+        Условие «возраст в диапазоне [min_age, max_age]» в виде диапазона
+        birth_date относительно текущей даты. В отличие от фильтра по
+        calculate_age_expression, использует индекс по birth_date.
+        """
+        today = timezone.localdate()
+        condition = Q()
+        if min_age is not None:
+            condition &= Q(birth_date__lte=years_before(today, ceil(min_age)))
+        if max_age is not None:
+            condition &= Q(
+                birth_date__gt=years_before(today, floor(max_age) + 1))
+        return condition
+
     class Meta:
         verbose_name = 'пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('-date_joined',)
+        indexes = [
+            models.Index(fields=['-date_joined', '-id']),
+            models.Index(fields=['orders_count']),
+            models.Index(fields=['birth_date']),
+        ]
 
 
 class Order(models.Model):
@@ -73,9 +133,91 @@ class Order(models.Model):
         return (f'Заказ #{self.id}: {Truncator(self.title).chars(TRIM_LEN)} '
                 f'(пользователь: {self.user})')
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            invalidate_orders_count_histogram()
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        invalidate_orders_count_histogram()
+        return super().delete(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
         default_related_name = 'orders'
         ordering = ('-updated_at',)
-        indexes = [models.Index(fields=['user'])]
+        indexes = [
+            models.Index(fields=['user']),
+            models.Index(fields=['user', '-updated_at', '-id']),
+            models.Index(fields=['-updated_at', '-id']),
+            models.Index(fields=['-created_at', '-id']),
+        ]
+        constraints = [
+            # На этом опирается курсорная пагинация по updated_at
+            # (api.pagination.OrderKeysetPagination.upper_bounds).
+            # В PostgreSQL миграция добавляет его с NOT VALID; старые
+            # строки проверяет partitions --convert.
+            models.CheckConstraint(
+                check=Q(created_at__lte=F('updated_at')),
+                name='order_created_at_lte_updated_at',
+            ),
+        ]
+
+
+class ArchivedOrder(models.Model):
+    """
+    Заказ, перенесённый в архив командой archive_orders, с прежним id.
+    Архив только читается, поэтому индексов у таблицы меньше, чем
+    у Order: по пользователю и по времени изменения.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField('Наименование', max_length=TITLE_MAX_LENGTH)
+    description = models.TextField(
+        'Описание', max_length=DESCRIPTION_MAX_LENGTH,
+    )
+    # Отдельный индекс user_id не нужен: его заменяет составной.
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name='Пользователь',
+        db_index=False,
+    )
+    created_at = models.DateTimeField('Создан')
+    updated_at = models.DateTimeField('Обновлён')
+
+    class Meta:
+        verbose_name = 'архивный заказ'
+        verbose_name_plural = 'Архивные заказы'
+        default_related_name = 'archived_orders'
+        ordering = ('-updated_at',)
+        indexes = [
+            models.Index(fields=['user', '-updated_at', '-id']),
+            models.Index(fields=['-updated_at', '-id']),
+        ]
+
+
+class OrderWithArchived(models.Model):
+    """
+    Заказы вместе с архивными — представление базы данных (UNION ALL
+    Order и ArchivedOrder, см. orders.archive) для чтения заказов
+    с ?include_archived=1. Условия запросов СУБД применяет к каждой
+    таблице по её индексам.
+    """
+    title = models.CharField('Наименование', max_length=TITLE_MAX_LENGTH)
+    description = models.TextField(
+        'Описание', max_length=DESCRIPTION_MAX_LENGTH,
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, verbose_name='Пользователь',
+        related_name='+',
+    )
+    created_at = models.DateTimeField('Создан')
+    updated_at = models.DateTimeField('Обновлён')
+
+    __str__ = Order.__str__
+
+    class Meta:
+        managed = False
+        db_table = 'orders_order_with_archived'
+        verbose_name = 'заказ'
+        verbose_name_plural = 'Заказы с архивными'
+        ordering = ('-updated_at',)
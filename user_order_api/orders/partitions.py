@@ -0,0 +1,248 @@
+"""
+Секционирование таблицы заказов PostgreSQL по месяцам created_at
+(PARTITION BY RANGE). Необязательно: таблица переводится на секции
+командой manage.py partitions --convert, будущие секции заранее
+создаёт та же команда без --convert.
+
+Первичный ключ секционированной таблицы — (id, created_at): уникальный
+ключ должен включать ключ секционирования. Уникальность id обеспечивает
+последовательность. Секция — месяц в TIME_ZONE, строки вне созданных
+секций попадают в секцию <таблица>_default.
+"""
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+PARTITION_KEY = 'created_at'
+
+
+def month_start(value):
+    """Начало месяца value в текущем часовом поясе."""
+    return timezone.localtime(value).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, count):
+    index = month.month - 1 + count
+    return month.replace(year=month.year + index // 12, month=index % 12 + 1)
+
+
+def months_between(first, last):
+    """Начала месяцев от first до last включительно."""
+    month, last = month_start(first), month_start(last)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)',
+            [table])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def get_partitions(connection, table):
+    """Имена секций таблицы по порядку."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname',
+            [table])
+        return [name for name, in cursor.fetchall()]
+
+
+def count_default_rows(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {default_partition_name(table)}')
+        return cursor.fetchone()[0]
+
+
+def exists(cursor, sql):
+    cursor.execute(f'SELECT EXISTS ({sql})')
+    return cursor.fetchone()[0]
+
+
+def create_partitions(connection, table, months):
+    """
+    Создаёт недостающие секции месяцев months, возвращает их имена.
+    Строки этих месяцев из секции по умолчанию переносятся в новую
+    секцию напрямую, минуя родительскую таблицу, поэтому триггеры
+    уровня оператора (счётчик заказов) не срабатывают.
+    """
+    existing = set(get_partitions(connection, table))
+    default = default_partition_name(table)
+    created = []
+    for month in months:
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+        bounds = f"FROM ('{start}') TO ('{end}')"
+        with transaction.atomic(using=connection.alias), \
+                connection.cursor() as cursor:
+            condition = (f"{PARTITION_KEY} >= '{start}' "
+                         f"AND {PARTITION_KEY} < '{end}'")
+            moved = default in existing and exists(
+                cursor, f'SELECT 1 FROM {default} WHERE {condition}')
+            if moved:
+                # Секция по умолчанию не может содержать строки нового
+                # диапазона в момент создания секции.
+                cursor.execute(
+                    f'ALTER TABLE {table} DETACH PARTITION {default}')
+            cursor.execute(
+                f'CREATE TABLE {name} PARTITION OF {table} '
+                f'FOR VALUES {bounds}')
+            if moved:
+                cursor.execute(
+                    f'INSERT INTO {name} SELECT * FROM {default} '
+                    f'WHERE {condition}')
+                cursor.execute(f'DELETE FROM {default} WHERE {condition}')
+                cursor.execute(
+                    f'ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT')
+        created.append(name)
+    return created
+
+
+def convert(connection, table, months_ahead):
+    """
+    Переводит обычную таблицу table на секции по месяцам: секции от
+    месяца самого старого заказа до months_ahead месяцев вперёд
+    и секция по умолчанию. Данные копируются одной транзакцией под
+    исключительной блокировкой таблицы; ограничения, добавленные
+    с NOT VALID, сначала проверяются; индексы, ограничения, триггеры
+    и зависящие от таблицы представления пересоздаются по их
+    определениям с прежними именами. Возвращает число перенесённых
+    строк.
+    """
+    old = f'{table}_unpartitioned'
+    sequence = f'{table}_id_seq'
+    with transaction.atomic(using=connection.alias), \
+            connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+        if exists(cursor, 'SELECT 1 FROM pg_constraint WHERE confrelid = '
+                          f"'{table}'::regclass"):
+            raise ValueError(
+                f'На {table} ссылаются внешние ключи: они должны включать '
+                f'{PARTITION_KEY}.')
+        cursor.execute(
+            'SELECT pg_get_indexdef(indexrelid), indisunique FROM pg_index '
+            'WHERE indrelid = %s::regclass AND NOT indisprimary', [table])
+        indexes = cursor.fetchall()
+        if any(unique for _, unique in indexes):
+            raise ValueError(
+                f'Уникальные индексы {table} должны включать '
+                f'{PARTITION_KEY}.')
+        # Ограничения, добавленные с NOT VALID (например,
+        # created_at <= updated_at, на котором держится отбрасывание
+        # секций), проверяются на существующих строках.
+        cursor.execute(
+            'SELECT conname FROM pg_constraint WHERE conrelid = '
+            "%s::regclass AND contype = 'c' AND NOT convalidated", [table])
+        for name, in cursor.fetchall():
+            try:
+                cursor.execute(
+                    f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+            except IntegrityError:
+                raise ValueError(
+                    f'Строки {table} нарушают ограничение {name}: '
+                    f'их нужно исправить до секционирования.')
+        cursor.execute(
+            'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+            "WHERE conrelid = %s::regclass AND contype IN ('c', 'f')",
+            [table])
+        constraints = cursor.fetchall()
+        cursor.execute(
+            'SELECT pg_get_triggerdef(oid) FROM pg_trigger '
+            'WHERE tgrelid = %s::regclass AND NOT tgisinternal', [table])
+        triggers = [definition for definition, in cursor.fetchall()]
+        cursor.execute(
+            'SELECT DISTINCT r.ev_class::regclass::text, '
+            'pg_get_viewdef(r.ev_class) FROM pg_depend d '
+            'JOIN pg_rewrite r ON r.oid = d.objid '
+            'WHERE d.refobjid = %s::regclass AND r.ev_class <> d.refobjid',
+            [table])
+        views = cursor.fetchall()
+        cursor.execute(
+            f'SELECT MIN({PARTITION_KEY}), MAX(id) FROM {table}')
+        first, last_id = cursor.fetchone()
+
+        for name, _ in views:
+            cursor.execute(f'DROP VIEW {name}')
+        cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        cursor.execute(
+            f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS '
+            f'INCLUDING STORAGE) PARTITION BY RANGE ({PARTITION_KEY})')
+        cursor.execute(
+            f'CREATE TABLE {default_partition_name(table)} '
+            f'PARTITION OF {table} DEFAULT')
+        until = add_months(month_start(timezone.now()), months_ahead)
+        create_partitions(
+            connection, table, months_between(first or until, until))
+        # Индексы и триггеры создаются после копирования: так быстрее,
+        # и триггеры не пересчитывают перенесённые строки.
+        cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+        moved = cursor.rowcount
+        cursor.execute(f'DROP TABLE {old}')
+
+        cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {table}.id')
+        cursor.execute(
+            f"ALTER TABLE {table} ALTER COLUMN id "
+            f"SET DEFAULT nextval('{sequence}')")
+        cursor.execute(
+            'SELECT setval(%s, %s, %s)',
+            [sequence, last_id or 1, last_id is not None])
+        cursor.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey '
+            f'PRIMARY KEY (id, {PARTITION_KEY})')
+        for definition, _ in indexes:
+            cursor.execute(definition)
+        for name, definition in constraints:
+            cursor.execute(
+                f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+        for definition in triggers:
+            cursor.execute(definition)
+        for name, definition in views:
+            cursor.execute(f'CREATE VIEW {name} AS {definition}')
+        cursor.execute(f'ANALYZE {table}')
+    return moved
+
+
+def explain(queryset):
+    """
+    Секции, которые затрагивает запрос: (в плане, прочитаны, всего
+    строк прочитано, время выполнения в мс) по EXPLAIN ANALYZE.
+    Секции, отброшенные при планировании, в план не попадают;
+    не прочитанные — выполнялись ноль раз (отбрасывание при выполнении
+    или LIMIT в Merge Append).
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    partitions = set(get_partitions(connection, table))
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    planned, scanned, rows = set(), set(), 0
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get('Plans', ()))
+        name = node.get('Relation Name')
+        if name not in partitions:
+            continue
+        planned.add(name)
+        if node.get('Actual Loops'):
+            scanned.add(name)
+            rows += round(node['Actual Rows'] * node['Actual Loops'])
+    return len(planned), len(scanned), rows, plan[0]['Execution Time']
@@ -0,0 +1,165 @@
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.middleware import get_user
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject
+
+from .constants import PRIMARY_PIN_KEY
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Состояние текущего запроса (RoutingState), его задаёт
+# replica_routing_middleware.
+replica_request = ContextVar('replica_request', default=None)
+
+# Реплики, к которым не удалось подключиться: {alias: момент повтора}.
+unavailable_replicas = {}
+
+
+class RoutingState:
+    """
+    Метод запроса и пользователь, о котором сообщила аутентификация
+    (set_request_user). Пока пользователь неизвестен, запрос не закреплён
+    за primary.
+    """
+
+    def __init__(self, method):
+        self.safe = method in SAFE_METHODS
+        self.user_id = None
+        self.pinned = False
+
+    def set_user(self, user):
+        if user is None or not user.is_authenticated:
+            return
+        if user.pk != self.user_id:
+            self.user_id = user.pk
+            self.pinned = self.safe and bool(
+                cache.get(PRIMARY_PIN_KEY.format(user.pk)))
+
+
+def set_request_user(user):
+    """
+    Сообщает роутеру пользователя текущего запроса. Вызывается после
+    аутентификации: по токену (api.authentication) и по сессии
+    (ленивый request.user, см. replica_routing_middleware).
+    """
+    state = replica_request.get()
+    if state is not None:
+        state.set_user(user)
+    return user
+
+
+def pin_to_primary(user_id):
+    """Чтения пользователя идут с primary REPLICA_PIN_SECONDS секунд."""
+    cache.set(PRIMARY_PIN_KEY.format(user_id), True,
+              settings.REPLICA_PIN_SECONDS)
+
+
+def get_available_replica():
+    """
+    Случайная доступная реплика или None. Реплика, к которой не удалось
+    подключиться, пропускается REPLICA_RETRY_SECONDS секунд.
+    """
+    now = time.monotonic()
+    replicas = [
+        alias for alias in settings.DATABASE_REPLICAS
+        if unavailable_replicas.get(alias, 0) <= now
+    ]
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            unavailable_replicas[alias] = now + settings.REPLICA_RETRY_SECONDS
+            continue
+        unavailable_replicas.pop(alias, None)
+        return alias
+    return None
+
+
+class ReplicaRouter:
+    """
+    Чтение моделей orders с реплик из DATABASE_REPLICAS в запросах
+    с безопасными методами (см. replica_routing_middleware). Запись,
+    чтение внутри транзакции на primary, чтение пользователя, недавно
+    изменявшего данные, и остальные приложения (сессии, журнал админки)
+    идут в primary.
+    """
+    app_labels = {'orders'}
+
+    def db_for_read(self, model, **hints):
+        state = replica_request.get()
+        if (state is None or not state.safe
+                or model._meta.app_label not in self.app_labels
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block
+                or state.pinned):
+            return None
+        return get_available_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """
+    Разрешает ReplicaRouter читать с реплик в запросах GET, HEAD и OPTIONS.
+    После успешного запроса с другим методом аутентифицированный
+    пользователь закрепляется за primary, чтобы сразу видеть свои
+    изменения, пока реплики их догоняют. Без реплик не подключается.
+    """
+    if not settings.DATABASE_REPLICAS:
+        raise MiddlewareNotUsed
+
+    def start(request):
+        state = RoutingState(request.method)
+        if 'user' in request.__dict__:
+            # Пользователь сессии (AuthenticationMiddleware) загружается
+            # лениво; при загрузке он передаётся роутеру.
+            request.user = SimpleLazyObject(
+                lambda: set_request_user(get_user(request)))
+        return state, replica_request.set(state)
+
+    def pin_writer(state, response):
+        if state.safe or response.status_code >= 400:
+            return None
+        return state.user_id
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state, token = start(request)
+            try:
+                response = await get_response(request)
+            finally:
+                replica_request.reset(token)
+            user_id = pin_writer(state, response)
+            if user_id is not None:
+                await cache.aset(PRIMARY_PIN_KEY.format(user_id), True,
+                                 settings.REPLICA_PIN_SECONDS)
+            return response
+    else:
+        def middleware(request):
+            state, token = start(request)
+            try:
+                response = get_response(request)
+            finally:
+                replica_request.reset(token)
+            user_id = pin_writer(state, response)
+            if user_id is not None:
+                pin_to_primary(user_id)
+            return response
+
+    return middleware
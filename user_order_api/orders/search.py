@@ -0,0 +1,217 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import BooleanField, CharField, FloatField, Q, TextField
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import RawSQL
+
+from .constants import SEARCH_CONFIG, TRIGRAM_MIN_LENGTH
+
+TRIGRAM_FIELDS = {
+    'orders.User': ('username', 'email'),
+    'orders.Order': ('title',),
+}
+
+existing_tables = {}
+
+
+def table_exists(connection, name):
+    key = (connection.alias, name)
+    if key not in existing_tables:
+        existing_tables[key] = (
+            name in connection.introspection.table_names()
+        )
+    return existing_tables[key]
+
+
+class SearchBackend:
+    """
+    Полнотекстовый поиск по заказам для конкретной СУБД.
+    Индекс поддерживается триггерами базы данных (миграция
+    0008_order_fulltext_search), поэтому остаётся согласованным при
+    save/delete, bulk_create, update и каскадном удалении.
+    """
+    vendor = None
+
+    def is_available(self, connection, model):
+        return True
+
+    def match(self, model, terms):
+        """Q-условие «запись соответствует всем термам»."""
+        raise NotImplementedError
+
+    def search(self, queryset, terms):
+        """Отфильтрованный и упорядоченный по релевантности queryset."""
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Колонка tsvector с весами (название — A, описание — B), триггер
+    пересчёта и GIN-индекс. Результаты упорядочены по релевантности.
+    """
+    vendor = 'postgresql'
+    column = 'search_vector'
+
+    def match(self, model, terms):
+        # Условие на саму строку, а не id IN (подзапрос): при частом
+        # терме подзапрос не помещается в work_mem и проверяется
+        # перебором для каждой строки.
+        return Q(RawSQL(
+            f'{model._meta.db_table}.{self.column} '
+            f'@@ websearch_to_tsquery(%s::regconfig, %s)',
+            (SEARCH_CONFIG, ' '.join(terms)), output_field=BooleanField()
+        ))
+
+    def search(self, queryset, terms):
+        query = SearchQuery(
+            ' '.join(terms), config=SEARCH_CONFIG, search_type='websearch')
+        vector = RawSQL(
+            f'{queryset.model._meta.db_table}.{self.column}', [],
+            output_field=SearchVectorField()
+        )
+        return (
+            queryset.alias(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(vector, query))
+            .order_by('-search_rank', *queryset.query.order_by
+                      or queryset.model._meta.ordering)
+        )
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    Теневая таблица FTS5 с внешним содержимым (content=orders_order),
+    синхронизируемая триггерами. Термы ищутся по префиксу,
+    релевантность — bm25 (меньше — лучше).
+    """
+    vendor = 'sqlite'
+    suffix = 'fts'
+
+    def get_table(self, model):
+        return f'{model._meta.db_table}_{self.suffix}'
+
+    def is_available(self, connection, model):
+        return table_exists(connection, self.get_table(model))
+
+    @staticmethod
+    def build_match(terms):
+        return ' '.join(
+            '"{}"*'.format(term.replace('"', '""')) for term in terms
+        )
+
+    def match(self, model, terms):
+        fts = self.get_table(model)
+        return Q(id__in=RawSQL(
+            f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s',
+            (self.build_match(terms),)
+        ))
+
+    def search(self, queryset, terms):
+        table = queryset.model._meta.db_table
+        fts = self.get_table(queryset.model)
+        return (
+            queryset.filter(self.match(queryset.model, terms))
+            # LIMIT -1 не даёт SQLite встроить подзапрос рангов: он
+            # выполняется один раз, а не отдельным MATCH на каждую строку.
+            .annotate(search_rank=RawSQL(
+                f'SELECT ranks.value FROM (SELECT rowid AS id, '
+                f'bm25({fts}) AS value FROM {fts} WHERE {fts} MATCH %s '
+                f'LIMIT -1) AS ranks WHERE ranks.id = {table}.id',
+                (self.build_match(terms),), output_field=FloatField()
+            ))
+            .order_by('search_rank', *queryset.query.order_by
+                      or queryset.model._meta.ordering)
+        )
+
+
+SEARCH_BACKENDS = {
+    backend.vendor: backend
+    for backend in (PostgresSearchBackend(), SQLiteSearchBackend())
+}
+
+
+def get_search_backend(connection, model):
+    """Возвращает доступный движок поиска или None (поиск через LIKE)."""
+    backend = SEARCH_BACKENDS.get(connection.vendor)
+    if backend is None or not backend.is_available(connection, model):
+        return None
+    return backend
+
+
+class TrigramBackend:
+    """
+    Индексы для поиска подстроки без учёта регистра по полям из
+    TRIGRAM_FIELDS. Базовая реализация — обычный icontains.
+    """
+    vendor = None
+
+    def contains(self, connection, model, field, path, value):
+        return Q(**{f'{path}__icontains': value})
+
+
+class PostgresTrigramBackend(TrigramBackend):
+    """
+    GIN-индексы pg_trgm по UPPER(column) (миграция 0009_trigram_indexes):
+    именно это выражение Django строит для icontains, поэтому запросы
+    используют индекс без изменений.
+    """
+    vendor = 'postgresql'
+
+
+class SQLiteTrigramBackend(TrigramBackend):
+    """
+    Таблица FTS5 с токенизатором trigram (SQLite 3.34+, миграция
+    0009_trigram_indexes): LIKE '%term%' по её колонкам выполняется
+    по индексу. Короткие термы и термы
+    с символами шаблона LIKE ищутся обычным icontains.
+    """
+    vendor = 'sqlite'
+    suffix = 'trgm'
+
+    def get_table(self, model):
+        return f'{model._meta.db_table}_{self.suffix}'
+
+    def contains(self, connection, model, field, path, value):
+        if (len(value) < TRIGRAM_MIN_LENGTH or '%' in value or '_' in value
+                or not table_exists(connection, self.get_table(model))):
+            return super().contains(connection, model, field, path, value)
+        prefix = path[:-len(field.name)]
+        return Q(**{f'{prefix}pk__in': RawSQL(
+            f'SELECT rowid FROM {self.get_table(model)} '
+            f'WHERE {field.column} LIKE %s', (f'%{value}%',)
+        )})
+
+
+TRIGRAM_BACKENDS = {
+    backend.vendor: backend
+    for backend in (PostgresTrigramBackend(), SQLiteTrigramBackend())
+}
+
+
+def resolve_field(model, path):
+    """Модель и поле, на которые указывает путь вида user__email."""
+    *relations, name = path.split(LOOKUP_SEP)
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model, model._meta.get_field(name)
+
+
+def contains(queryset, path, value):
+    """
+    Q-условие «поле по пути path содержит value» в индексируемой форме:
+    триграммный индекс для полей из TRIGRAM_FIELDS, точное совпадение
+    для нетекстовых полей (например, id), icontains для остальных.
+    """
+    model, field = resolve_field(queryset.model, path)
+    if not isinstance(field, (CharField, TextField)):
+        try:
+            return Q(**{path: field.to_python(value)})
+        except ValidationError:
+            return Q(pk__in=[])
+    if field.name not in TRIGRAM_FIELDS.get(model._meta.label, ()):
+        return Q(**{f'{path}__icontains': value})
+    connection = connections[queryset.db]
+    backend = TRIGRAM_BACKENDS.get(connection.vendor, TrigramBackend())
+    return backend.contains(connection, model, field, path, value)
@@ -0,0 +1,102 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+
+from .constants import USER_CACHE_KEY
+
+# Поля, которые читают аутентификация, права доступа и профиль.
+# Хеш пароля и остальные поля в кеш не попадают: у пользователя из кеша
+# они отложены и при обращении читаются из базы.
+CACHED_FIELDS = (
+    'id', 'username', 'email', 'birth_date',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+# Кеш процесса: {pk: (момент устаревания, значения CACHED_FIELDS)}.
+local_users = {}
+
+
+def get_local_values(pk):
+    entry = local_users.get(pk)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def set_local_values(pk, values):
+    local_users[pk] = (
+        time.monotonic() + settings.AUTH_USER_LOCAL_CACHE_TTL, values
+    )
+
+
+def primary_alias(model):
+    return router.db_for_write(model)
+
+
+def make_user(model, values):
+    """
+    Новый экземпляр из значений CACHED_FIELDS, поэтому изменения
+    request.user не попадают в кеш.
+    """
+    # from_db ждёт значения в порядке полей модели.
+    values = dict(zip(CACHED_FIELDS, values))
+    names = [field.attname for field in model._meta.concrete_fields
+             if field.attname in values]
+    return model.from_db(
+        primary_alias(model), names, [values[name] for name in names])
+
+
+def values_queryset(model):
+    return (
+        model._default_manager.db_manager(primary_alias(model))
+        .values_list(*CACHED_FIELDS)
+    )
+
+
+def get_cached_user(model, pk):
+    """
+    Пользователь по первичному ключу: сначала кеш процесса с коротким TTL,
+    затем общий кеш Django, затем база данных. Кешируются только
+    CACHED_FIELDS. DoesNotExist не кешируется. Из базы пользователь
+    читается с primary: реплика может вернуть состояние до изменения
+    профиля или блокировки.
+    """
+    values = get_local_values(pk)
+    if values is None:
+        key = USER_CACHE_KEY.format(pk)
+        values = cache.get(key)
+        if values is None:
+            values = values_queryset(model).get(pk=pk)
+            cache.set(key, values, settings.AUTH_USER_CACHE_TTL)
+        set_local_values(pk, values)
+    return make_user(model, values)
+
+
+async def aget_cached_user(model, pk):
+    """Асинхронный вариант get_cached_user."""
+    values = get_local_values(pk)
+    if values is None:
+        key = USER_CACHE_KEY.format(pk)
+        values = await cache.aget(key)
+        if values is None:
+            values = await values_queryset(model).aget(pk=pk)
+            await cache.aset(key, values, settings.AUTH_USER_CACHE_TTL)
+        set_local_values(pk, values)
+    return make_user(model, values)
+
+
+def invalidate_user(pk):
+    """
+    Сбрасывает кешированного пользователя сразу и ещё раз после фиксации
+    транзакции, чтобы параллельный запрос не успел закешировать
+    незафиксированное состояние. Кеши других процессов устаревают
+    по AUTH_USER_LOCAL_CACHE_TTL.
+    """
+    def delete():
+        local_users.pop(pk, None)
+        cache.delete(USER_CACHE_KEY.format(pk))
+
+    delete()
+    transaction.on_commit(delete)
@@ -0,0 +1,173 @@
+"""
+PostgreSQL с пулом соединений psycopg_pool в каждом процессе воркера.
+
+Параметры пула задаются в OPTIONS['pool'] аргументами ConnectionPool
+(min_size, max_size, timeout, max_idle, max_lifetime). Соединение берётся
+из пула при первом обращении к базе и возвращается в него, когда Django
+закрывает соединение, то есть в конце запроса при CONN_MAX_AGE = 0.
+Перед выдачей соединение проверяется (ConnectionPool.check_connection).
+"""
+import os
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+
+# Пулы процесса: {alias: (параметры подключения, пул)}.
+pools = {}
+pools_lock = threading.Lock()
+# Ожидание соединения из пула: {alias: [число выдач, сумма, максимум]}.
+# Соединения берут потоки воркера, поэтому изменения — под checkouts_lock.
+checkouts = {}
+checkouts_lock = threading.Lock()
+
+POOL_KEY_PARAMS = ('dbname', 'host', 'port', 'user', 'service')
+
+
+def forget_pools():
+    """
+    Сбрасывает пулы, унаследованные дочерним процессом при fork: потоков
+    пула в нём нет, а сокеты общие с родителем, поэтому соединения
+    не закрываются (это закрыло бы их и у родителя).
+    """
+    global pools_lock, checkouts_lock
+    pools_lock = threading.Lock()
+    checkouts_lock = threading.Lock()
+    pools.clear()
+    checkouts.clear()
+
+
+os.register_at_fork(after_in_child=forget_pools)
+
+
+def close_pools():
+    """Закрывает все пулы процесса вместе с их соединениями."""
+    with pools_lock:
+        for _, pool in pools.values():
+            pool.close()
+        pools.clear()
+    with checkouts_lock:
+        checkouts.clear()
+
+
+def pool_stats():
+    """
+    Состояние пулов процесса по алиасам баз: размер, занятые и свободные
+    соединения, ожидающие запросы, число ожиданий и тайм-аутов, число
+    выдач и время ожидания соединения в секундах.
+    """
+    stats = {}
+    with checkouts_lock:
+        checkout_stats = {alias: tuple(values)
+                          for alias, values in checkouts.items()}
+    for alias, (_, pool) in list(pools.items()):
+        pool_stats = pool.get_stats()
+        count, total, maximum = checkout_stats.get(alias, (0, 0.0, 0.0))
+        stats[alias] = {
+            'size': pool_stats['pool_size'],
+            'min_size': pool_stats['pool_min'],
+            'max_size': pool_stats['pool_max'],
+            'in_use': pool_stats['pool_size'] - pool_stats['pool_available'],
+            'idle': pool_stats['pool_available'],
+            'waiting': pool_stats['requests_waiting'],
+            'waits': pool_stats.get('requests_queued', 0),
+            'timeouts': pool_stats.get('requests_errors', 0),
+            'checkouts': count,
+            'checkout_seconds_total': total,
+            'checkout_seconds_max': maximum,
+        }
+    return stats
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Соединения пулов (в том числе зеркал-реплик) не дают удалить
+        # тестовую базу.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool_options(self):
+        if self.alias == NO_DB_ALIAS:
+            return None
+        return self.settings_dict['OPTIONS'].get('pool')
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_pool(self, conn_params):
+        key = tuple(conn_params.get(name) for name in POOL_KEY_PARAMS)
+        with pools_lock:
+            entry = pools.get(self.alias)
+            if entry is not None and entry[0] == key:
+                return entry[1]
+            if self.settings_dict['CONN_MAX_AGE']:
+                raise ImproperlyConfigured(
+                    'Пул соединений несовместим с CONN_MAX_AGE: соединение '
+                    'должно возвращаться в пул в конце запроса.'
+                )
+            if entry is not None:
+                # Изменились параметры подключения (например, тестовая база).
+                entry[1].close()
+            pool = ConnectionPool(
+                kwargs=conn_params,
+                check=ConnectionPool.check_connection,
+                name=self.alias,
+                open=False,
+                **self.pool_options,
+            )
+            pool.open()
+            pools[self.alias] = (key, pool)
+            with checkouts_lock:
+                checkouts[self.alias] = [0, 0.0, 0.0]
+            return pool
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_options:
+            return super().get_new_connection(conn_params)
+        pool = self.get_pool(conn_params)
+        started = time.perf_counter()
+        connection = pool.getconn()
+        # Пул запоминается: при смене параметров подключения get_pool
+        # создаёт новый, а соединение возвращается в тот, откуда взято.
+        self._pool = pool
+        elapsed = time.perf_counter() - started
+        with checkouts_lock:
+            stats = checkouts.setdefault(self.alias, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(
+                IsolationLevel.READ_COMMITTED if isolation_level is None
+                else isolation_level)
+        except ValueError:
+            pool.putconn(connection)
+            raise ImproperlyConfigured(
+                f'Invalid transaction isolation level {isolation_level} '
+                f'specified. Use one of the psycopg.IsolationLevel values.'
+            )
+        if (isolation_level is not None
+                and connection.isolation_level != self.isolation_level):
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self.pool_options:
+            return super()._close()
+        with self.wrap_database_errors:
+            self._pool.putconn(self.connection)
+        self.connection = None
+        self._pool = None
@@ -0,0 +1,297 @@
+"""
+Метрики запросов: число SQL-запросов и время по фазам (аутентификация,
+база данных, сериализация, рендеринг) для каждого запроса.
+
+Фазы отмечаются контекстным менеджером timed(), SQL-запросы считает
+обёртка execute_wrapper на всех соединениях. middleware добавляет
+в ответ заголовок Server-Timing и накапливает гистограммы по
+представлениям, которые metrics_view отдаёт в текстовом формате
+Prometheus. Метрики хранятся в памяти процесса воркера. Запросы сверх
+бюджета представления (user_order_api.query_budgets) записываются
+в журнал вместе с их SQL.
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import (HttpResponse, HttpResponseForbidden,
+                         HttpResponseNotFound)
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import sync_and_async_middleware
+
+from .query_budgets import check_query_budget
+
+PHASES = ('auth', 'db', 'serialization', 'render')
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Метрики текущего запроса; None вне запроса.
+request_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'queries', 'phases', 'statements')
+
+    def __init__(self, statements=False):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        # {SQL: число выполнений}, если нужен текст запросов.
+        self.statements = {} if statements else None
+
+
+@contextmanager
+def timed(phase):
+    """
+    Добавляет время блока к фазе текущего запроса. SQL-запросы внутри
+    блока учитываются только в фазе db.
+    """
+    state = request_metrics.get()
+    if state is None:
+        yield
+        return
+    phases = state.phases
+    db = phases['db']
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[phase] += (time.perf_counter() - started
+                          - (phases['db'] - db))
+
+
+def count_query(execute, sql, params, many, context):
+    state = request_metrics.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state.phases['db'] += time.perf_counter() - started
+        state.queries += 1
+        if state.statements is not None:
+            state.statements[sql] = state.statements.get(sql, 0) + 1
+
+
+def install_query_counter(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """Счётчики и гистограммы процесса с метками."""
+    histograms = {
+        'http_request_duration_seconds': (
+            'Время обработки запроса.', ('view', 'method'),
+            DURATION_BUCKETS),
+        'http_request_phase_seconds': (
+            'Время фаз обработки запроса.', ('view', 'method', 'phase'),
+            DURATION_BUCKETS),
+        'http_request_db_queries': (
+            'Число SQL-запросов на запрос.', ('view', 'method'),
+            QUERIES_BUCKETS),
+    }
+    counters = {
+        'http_requests_total': (
+            'Число запросов.', ('view', 'method', 'status')),
+        'http_request_query_budget_exceeded_total': (
+            'Число запросов сверх бюджета SQL-запросов.', ('view', 'method')),
+    }
+
+    def __init__(self):
+        self.lock = Lock()
+        self.values = {name: {} for name in (*self.histograms, *self.counters)}
+
+    def observe(self, name, labels, value):
+        series = self.values[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series.setdefault(
+                labels, Histogram(self.histograms[name][2]))
+        histogram.observe(value)
+
+    def increment(self, name, labels):
+        counter = self.values[name]
+        counter[labels] = counter.get(labels, 0) + 1
+
+    def record(self, view, method, status, state, duration, over_budget):
+        with self.lock:
+            self.increment('http_requests_total', (view, method, str(status)))
+            if over_budget:
+                self.increment('http_request_query_budget_exceeded_total',
+                               (view, method))
+            self.observe('http_request_duration_seconds',
+                         (view, method), duration)
+            self.observe('http_request_db_queries',
+                         (view, method), state.queries)
+            for phase, seconds in state.phases.items():
+                if seconds:
+                    self.observe('http_request_phase_seconds',
+                                 (view, method, phase), seconds)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, (help_text, label_names) in self.counters.items():
+                lines += (f'# HELP {name} {help_text}',
+                          f'# TYPE {name} counter')
+                for labels, value in sorted(self.values[name].items()):
+                    lines.append(
+                        f'{name}{format_labels(label_names, labels)} {value}')
+            for name, (help_text, label_names, buckets) in (
+                    self.histograms.items()):
+                lines += (f'# HELP {name} {help_text}',
+                          f'# TYPE {name} histogram')
+                for labels, histogram in sorted(self.values[name].items()):
+                    total = 0
+                    for bound, count in zip(
+                            (*map(format_value, buckets), '+Inf'),
+                            histogram.counts):
+                        total += count
+                        lines.append(f'{name}_bucket' + format_labels(
+                            (*label_names, 'le'), (*labels, bound)
+                        ) + f' {total}')
+                    suffix = format_labels(label_names, labels)
+                    lines += (
+                        f'{name}_sum{suffix} {format_value(histogram.sum)}',
+                        f'{name}_count{suffix} {total}',
+                    )
+        lines += pool_lines()
+        return '\n'.join(lines) + '\n'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(names, values):
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values)
+    ) + '}'
+
+
+def pool_lines():
+    """Состояние пулов соединений PostgreSQL (db_pool_*) по алиасам баз."""
+    if not any(database['ENGINE'] == 'user_order_api.db.postgresql_pool'
+               for database in settings.DATABASES.values()):
+        return []
+    from .db.postgresql_pool.base import pool_stats
+
+    lines = []
+    stats = pool_stats()
+    for key in next(iter(stats.values()), {}):
+        name = f'db_pool_{key}'
+        kind = 'gauge'
+        if key in ('waits', 'timeouts', 'checkouts', 'checkout_seconds_total'):
+            kind = 'counter'
+            name = name if name.endswith('_total') else f'{name}_total'
+        lines.append(f'# TYPE {name} {kind}')
+        for alias, values in sorted(stats.items()):
+            lines.append(f'{name}{format_labels(("alias",), (alias,))} '
+                         f'{format_value(values[key])}')
+    return lines
+
+
+registry = Registry()
+connection_created.connect(install_query_counter)
+
+
+def server_timing(state, duration):
+    entries = [f'total;dur={duration * 1000:.2f}']
+    for phase, seconds in state.phases.items():
+        if phase == 'db':
+            entries.append(f'db;dur={seconds * 1000:.2f};'
+                           f'desc="{state.queries} queries"')
+        elif seconds:
+            entries.append(f'{phase};dur={seconds * 1000:.2f}')
+    return ', '.join(entries)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """
+    Считает SQL-запросы и время фаз запроса, с SERVER_TIMING добавляет
+    заголовок Server-Timing и учитывает запрос в метриках
+    по имени представления. При QUERY_BUDGET_WARNINGS пишет в журнал
+    запросы сверх бюджета SQL-запросов. Стоит первым в MIDDLEWARE, чтобы
+    время включало остальные middleware. При METRICS_ENABLED = False
+    не подключается.
+    """
+    if not settings.METRICS_ENABLED:
+        raise MiddlewareNotUsed
+    for connection in connections.all(initialized_only=True):
+        install_query_counter(connection)
+
+    def finish(request, response, state):
+        duration = time.perf_counter() - state.started
+        match = request.resolver_match
+        registry.record(
+            match.view_name if match is not None else '<unresolved>',
+            request.method, response.status_code, state, duration,
+            state.statements is not None and check_query_budget(
+                request, state.queries, state.statements))
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = server_timing(state, duration)
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state = RequestMetrics(settings.QUERY_BUDGET_WARNINGS)
+            token = request_metrics.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                request_metrics.reset(token)
+            return finish(request, response, state)
+    else:
+        def middleware(request):
+            state = RequestMetrics(settings.QUERY_BUDGET_WARNINGS)
+            token = request_metrics.set(state)
+            try:
+                response = get_response(request)
+            finally:
+                request_metrics.reset(token)
+            return finish(request, response, state)
+
+    return middleware
+
+
+def metrics_view(request):
+    """
+    Метрики процесса в текстовом формате Prometheus. Нужен заголовок
+    Authorization: Bearer <METRICS_TOKEN>; без METRICS_TOKEN эндпоинт
+    отвечает 404.
+    """
+    if not settings.METRICS_TOKEN:
+        return HttpResponseNotFound()
+    if not constant_time_compare(
+            request.headers.get('Authorization', ''),
+            f'Bearer {settings.METRICS_TOKEN}'):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,252 @@
+"""
+Выборочное профилирование запросов: cProfile и tracemalloc вокруг
+представления.
+
+Профилируется доля запросов PROFILING_SAMPLE_RATE и запросы
+администраторов с заголовком X-Profile: 1 (если PROFILING_HEADER).
+Для каждого запроса в PROFILING_DIR сохраняются граф вызовов
+<id>.prof (формат pstats) и отчёт <id>.json: представление, время,
+число SQL-запросов, пик памяти, самые затратные функции и места
+выделения памяти. Хранятся последние PROFILING_MAX_FILES отчётов.
+Сводку выводит команда manage.py profiles.
+"""
+import cProfile
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .metrics import request_metrics
+
+PROFILE_HEADER = 'X-Profile'
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+# Кадры служебного кода, которые не показываются в местах выделения.
+ALLOCATION_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+)
+
+# Ожидание в цикле событий и в потоках asgiref, а не работа запроса.
+IDLE_FUNCTIONS = {
+    "<method 'get' of '_queue.SimpleQueue' objects>",
+    "<method 'poll' of 'select.epoll' objects>",
+    "<method 'acquire' of '_thread.lock' objects>",
+}
+
+# Одновременно профилируется один запрос процесса: tracemalloc общий
+# для всего процесса. Запросы, пришедшие во время профилирования,
+# выполняются без него.
+profiling_lock = threading.Lock()
+
+
+def is_idle(function):
+    """Функция из ключа pstats — ожидание (см. IDLE_FUNCTIONS)."""
+    return function[:2] == ('~', 0) and function[2] in IDLE_FUNCTIONS
+
+
+def is_staff_request(request):
+    """Запрос от администратора: по сессии или по токену API."""
+    if request.user.is_authenticated:
+        return request.user.is_staff
+    drf_request = Request(request, authenticators=[
+        authenticator()
+        for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        return drf_request.user.is_staff
+    except APIException:
+        return False
+
+
+class RequestProfile:
+    """
+    Профиль одного запроса. cProfile работает в одном потоке, поэтому
+    под ASGI профилировщик включается и в потоке цикла событий,
+    и в потоке синхронного кода запроса (enable в каждом из них).
+    """
+
+    def __init__(self):
+        self.profilers = {}
+        self.started_tracing = False
+
+    def enable(self):
+        profiler = self.profilers.setdefault(
+            threading.get_ident(), cProfile.Profile())
+        profiler.enable()
+
+    def disable(self):
+        self.profilers[threading.get_ident()].disable()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        tracemalloc.reset_peak()
+        self.memory_before = tracemalloc.take_snapshot()
+        state = request_metrics.get()
+        self.queries_before = 0 if state is None else state.queries
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.enable()
+
+    def stop(self):
+        self.disable()
+        self.duration = time.perf_counter() - self.started
+        self.cpu = time.process_time() - self.cpu_started
+        state = request_metrics.get()
+        self.queries = (None if state is None
+                        else state.queries - self.queries_before)
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        self.allocations = tracemalloc.take_snapshot().filter_traces(
+            ALLOCATION_FILTERS
+        ).compare_to(
+            self.memory_before.filter_traces(ALLOCATION_FILTERS), 'lineno'
+        )[:TOP_ALLOCATIONS]
+        del self.memory_before
+        if self.started_tracing:
+            tracemalloc.stop()
+
+    def save(self, request, response):
+        """Сохраняет граф вызовов и отчёт, возвращает id профиля."""
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        # id сортируются по времени: по ним удаляются старые профили.
+        now = datetime.now()
+        profile_id = (f'{now:%Y%m%d-%H%M%S-%f}-'
+                      f'{uuid.uuid4().hex[:4]}')
+        stats = pstats.Stats(*self.profilers.values())
+        stats.dump_stats(directory / f'{profile_id}.prof')
+        match = request.resolver_match
+        report = {
+            'id': profile_id,
+            'time': now.timestamp(),
+            'view': match.view_name if match is not None else '<unresolved>',
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration': self.duration,
+            'cpu': self.cpu,
+            'queries': self.queries,
+            'peak_memory': self.peak_memory,
+            'functions': [
+                {
+                    'function': pstats.func_std_string(function),
+                    'calls': calls,
+                    'tottime': tottime,
+                    'cumtime': cumtime,
+                }
+                for function, (_, calls, tottime, cumtime, _) in sorted(
+                    stats.stats.items(), key=lambda item: -item[1][3]
+                )[:TOP_FUNCTIONS]
+                if not is_idle(function)
+            ],
+            'allocations': [
+                {
+                    'line': str(statistic.traceback),
+                    'size': statistic.size_diff,
+                    'count': statistic.count_diff,
+                }
+                for statistic in self.allocations
+            ],
+        }
+        (directory / f'{profile_id}.json').write_text(
+            json.dumps(report, ensure_ascii=False, indent=1), encoding='utf-8')
+        prune_profiles(directory, settings.PROFILING_MAX_FILES)
+        return profile_id
+
+
+def prune_profiles(directory, keep):
+    """Удаляет самые старые профили сверх keep."""
+    reports = sorted(directory.glob('*.json'))
+    for report in reports[:max(len(reports) - keep, 0)]:
+        for path in (report, report.with_suffix('.prof')):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def load_profiles(directory):
+    """Отчёты профилей из directory, от старых к новым."""
+    reports = []
+    for path in sorted(Path(directory).glob('*.json')):
+        try:
+            reports.append(json.loads(path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            continue
+    return reports
+
+
+@sync_and_async_middleware
+def profiling_middleware(get_response):
+    """
+    Профилирует выбранные запросы (см. модуль). Стоит последним
+    в MIDDLEWARE, чтобы профиль охватывал представление. Id профиля
+    возвращается в заголовке X-Profile-Id. Без выборки
+    и заголовка не подключается.
+    """
+    if not settings.PROFILING_SAMPLE_RATE and not settings.PROFILING_HEADER:
+        raise MiddlewareNotUsed
+
+    def requested(request):
+        return (settings.PROFILING_HEADER
+                and request.headers.get(PROFILE_HEADER) == '1')
+
+    def sampled():
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not ((sampled() or requested(request)
+                     and await sync_to_async(is_staff_request)(request))
+                    and profiling_lock.acquire(blocking=False)):
+                return await get_response(request)
+            try:
+                profile = RequestProfile()
+                # Поток синхронного кода запроса (thread_sensitive).
+                await sync_to_async(profile.enable)()
+                profile.start()
+                try:
+                    response = await get_response(request)
+                finally:
+                    profile.stop()
+                    await sync_to_async(profile.disable)()
+                response['X-Profile-Id'] = await sync_to_async(
+                    profile.save)(request, response)
+            finally:
+                profiling_lock.release()
+            return response
+    else:
+        def middleware(request):
+            if not ((sampled() or requested(request)
+                     and is_staff_request(request))
+                    and profiling_lock.acquire(blocking=False)):
+                return get_response(request)
+            try:
+                profile = RequestProfile()
+                profile.start()
+                try:
+                    response = get_response(request)
+                finally:
+                    profile.stop()
+                response['X-Profile-Id'] = profile.save(request, response)
+            finally:
+                profiling_lock.release()
+            return response
+
+    return middleware
@@ -0,0 +1,61 @@
+"""
+Бюджеты SQL-запросов представлений.
+
+Наибольшее число SQL-запросов на запрос объявляется атрибутом
+query_budgets: у ViewSet и APIView — по действиям ('list',
+'current_user') или методам ('post'), у функциональных представлений
+DRF — декоратором declare_query_budgets, у ModelAdmin — по страницам
+('changelist', 'change', 'add', 'delete', 'history'). Бюджет действия
+с несколькими методами может быть словарём по методам.
+
+metrics_middleware при QUERY_BUDGET_WARNINGS пишет предупреждение
+с SQL запроса, превысившего бюджет, команда check_query_budgets
+проверяет бюджеты на данных растущего объёма.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def declare_query_budgets(**budgets):
+    """Бюджеты функционального представления по методам (post=2)."""
+    def decorator(view):
+        view.query_budgets = budgets
+        return view
+    return decorator
+
+
+def get_query_budget(match, method):
+    """Бюджет представления из resolver_match для метода или None."""
+    if match is None:
+        return None
+    func = match.func
+    model_admin = getattr(func, 'model_admin', None)
+    if model_admin is not None:
+        return getattr(model_admin, 'query_budgets', {}).get(
+            (match.url_name or '').rsplit('_', 1)[-1])
+    budgets = (getattr(func, 'query_budgets', None)
+               or getattr(getattr(func, 'cls', None), 'query_budgets', None))
+    if not budgets:
+        return None
+    method = method.lower()
+    actions = getattr(func, 'actions', None) or {}
+    budget = budgets.get(actions.get(method, method))
+    return budget.get(method) if isinstance(budget, dict) else budget
+
+
+def check_query_budget(request, queries, statements):
+    """
+    Предупреждение, если запрос превысил бюджет; statements —
+    {SQL: число выполнений}. Возвращает True при превышении.
+    """
+    budget = get_query_budget(request.resolver_match, request.method)
+    if budget is None or queries <= budget:
+        return False
+    logger.warning(
+        '%s %s: %d SQL-запросов при бюджете %d\n%s',
+        request.method, request.get_full_path(), queries, budget,
+        '\n'.join(f'{count} × {sql}' for sql, count in sorted(
+            statements.items(), key=lambda item: -item[1])),
+    )
+    return True
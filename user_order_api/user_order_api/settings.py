@@ -37,13 +37,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'user_order_api.metrics.metrics_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'orders.routers.replica_routing_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'user_order_api.profiling.profiling_middleware',
 ]
 
 ROOT_URLCONF = 'user_order_api.urls'
@@ -66,15 +69,38 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'user_order_api.wsgi.application'
 
+# Пул соединений PostgreSQL в каждом воркере (DB_POOL=False отключает).
+# Бюджет соединений приложения DB_MAX_CONNECTIONS (меньше max_connections
+# сервера) делится между WEB_CONCURRENCY воркерами gunicorn.
+DB_POOL = os.getenv('DB_POOL', 'True') == 'True'
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', 80))
+DB_POOL_MAX_SIZE = int(os.getenv(
+    'DB_POOL_MAX_SIZE', max(DB_MAX_CONNECTIONS // WEB_CONCURRENCY, 1)
+))
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', min(2, DB_POOL_MAX_SIZE)))
+# Сколько секунд запрос ждёт свободное соединение.
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+
 DATABASES = {
     'default': (
         {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': (
+                'user_order_api.db.postgresql_pool' if DB_POOL
+                else 'django.db.backends.postgresql'
+            ),
             'NAME': os.getenv('POSTGRES_DB', 'django'),
             'USER': os.getenv('POSTGRES_USER', 'django'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', ''),
             'PORT': os.getenv('DB_PORT', 5432),
+            'OPTIONS': {
+                'pool': {
+                    'min_size': DB_POOL_MIN_SIZE,
+                    'max_size': DB_POOL_MAX_SIZE,
+                    'timeout': DB_POOL_TIMEOUT,
+                },
+            } if DB_POOL else {},
         }
         if os.getenv('DB_TYPE', 'sqlite') == 'postgres'
         else {
@@ -83,6 +109,38 @@ DATABASES = {
         }
     )
 }
+
+# Реплики только для чтения: DB_REPLICAS — через запятую хосты
+# PostgreSQL (host или host:port) либо пути к файлам SQLite. Остальные
+# параметры подключения — как у default. В тестах реплики зеркалируют
+# default.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    host, _, port = replica.strip().partition(':')
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        **({'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+           if os.getenv('DB_TYPE', 'sqlite') == 'postgres'
+           else {'NAME': replica.strip()}),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['orders.routers.ReplicaRouter']
+# Сколько секунд после записи пользователь читает с primary.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+# Через сколько секунд повторить подключение к недоступной реплике.
+REPLICA_RETRY_SECONDS = int(os.getenv('REPLICA_RETRY_SECONDS', 30))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
 PASSWORD_MIN_LENGTH = 8
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -118,7 +176,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
@@ -141,10 +210,61 @@ AUTH_USER_MODEL = 'orders.User'
 
 PROFILE_URL_SEGMENT = 'me'
 
+ORDERS_BULK_MAX_ITEMS = int(os.getenv('ORDERS_BULK_MAX_ITEMS', 10000))
+ORDERS_BULK_BATCH_SIZE = int(os.getenv('ORDERS_BULK_BATCH_SIZE', 500))
+ORDERS_EXPORT_CHUNK_SIZE = int(os.getenv('ORDERS_EXPORT_CHUNK_SIZE', 2000))
+# Заказы, не изменявшиеся дольше стольких дней, команда archive_orders
+# переносит в архив.
+ORDERS_ARCHIVE_AFTER_DAYS = int(os.getenv('ORDERS_ARCHIVE_AFTER_DAYS', 365))
+
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))
+AUTH_USER_LOCAL_CACHE_TTL = float(os.getenv('AUTH_USER_LOCAL_CACHE_TTL', 5))
+
+# Асинхронные представления заказов, профиля, регистрации и токена.
+# Включается при запуске под ASGI (см. Dockerfile).
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+PASSWORD_HASHING_WORKERS = int(
+    os.getenv('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1)
+)
+
+# Метрики запросов (user_order_api.metrics): эндпоинт /metrics/
+# для Prometheus и заголовок Server-Timing. Эндпоинт требует
+# Authorization: Bearer <METRICS_TOKEN>; если METRICS_TOKEN не задан,
+# он отвечает 404. Server-Timing раскрывает время фаз и число SQL-запросов
+# любому клиенту, поэтому включается явно (SERVER_TIMING=True).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Предупреждения в журнал о запросах сверх бюджета SQL-запросов
+# представления (user_order_api.query_budgets).
+QUERY_BUDGET_WARNINGS = os.getenv('QUERY_BUDGET_WARNINGS', 'True') == 'True'
+
+# Выборочное профилирование запросов (user_order_api.profiling): доля
+# запросов PROFILING_SAMPLE_RATE (0 — выключено) и запросы администраторов
+# с заголовком X-Profile: 1, если включён PROFILING_HEADER. По умолчанию
+# всё выключено: профили пишутся на диск и замедляют запрос. Отчёты
+# сохраняются в PROFILING_DIR, хранятся последние PROFILING_MAX_FILES.
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_HEADER = os.getenv('PROFILING_HEADER', 'False') == 'True'
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 200))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': f'{PROJECT_NAME} API',
     'DESCRIPTION': 'API для управления пользователями и заказами',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
     'DISABLE_ERRORS_AND_WARNINGS': False,
+    # MessagePack — альтернативное представление тех же данных,
+    # в схеме остаются только JSON и форматы выгрузки.
+    'RENDERER_WHITELIST': [
+        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.StreamingRenderer',
+    ],
+    'PARSER_WHITELIST': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'api.parsers.NDJSONParser',
+    ],
 }